@@ -0,0 +1,112 @@
+"""
+Block tick benchmark: time per tick of the random ticks over the chunks around
+the player against all chunks of the world, and of a budget of scheduled
+updates for sand falling through the air. Also checks that sand dropped into
+the sea doesn't lift water above SEA_LEVEL.
+
+    python -m benchmarks.block_ticks [num_ticks]
+"""
+import sys
+from settings import *
+from terrain_gen import get_height
+from lighting import encode_pos, get_indices
+from block_ticks import run_random_ticks, run_scheduled_ticks
+from benchmarks.common import generate_lit_world, timed, percentiles
+
+
+def get_chunks_around(x, z, radius):
+    return np.array(
+        [
+            cx + WORLD_W * cz + WORLD_AREA * cy
+            for cx in range(max(x - radius, 0), min(x + radius + 1, WORLD_W))
+            for cz in range(max(z - radius, 0), min(z + radius + 1, WORLD_D))
+            for cy in range(WORLD_H)
+        ],
+        dtype=np.int64,
+    )
+
+
+def main():
+    num_ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    world_voxels, light = generate_lit_world()
+
+    px, pz = int(PLAYER_POS.x // CHUNK_SIZE), int(PLAYER_POS.z // CHUNK_SIZE)
+    chunk_sets = (
+        ("around player", get_chunks_around(px, pz, RANDOM_TICK_RADIUS)),
+        ("whole world", np.arange(WORLD_VOL, dtype=np.int64)),
+    )
+    # compile first
+    run_random_ticks(world_voxels, light, chunk_sets[0][1], 1)
+    run_scheduled_ticks(world_voxels, np.zeros(1, dtype=np.int64))
+
+    for name, chunk_indices in chunk_sets:
+        times = []
+        for _ in range(num_ticks):
+            _, t = timed(
+                run_random_ticks,
+                world_voxels,
+                light,
+                chunk_indices,
+                RANDOM_TICKS_PER_CHUNK,
+            )
+            times.append(t * 1000)
+        p = percentiles(times)
+        print(
+            f"random ticks, {name:<13} ({len(chunk_indices):>3} chunks)"
+            f"  p50 {p[50]:.3f} ms  p99 {p[99]:.3f} ms"
+        )
+
+    # a full budget of sand blocks a few voxels above the surface
+    rng = np.random.default_rng(0)
+    size = WORLD_W * CHUNK_SIZE
+    due = []
+    for x, z in rng.integers(0, size, (4 * BLOCK_TICK_BUDGET, 2)):
+        y = int(get_height(x, z)) + 4
+        if y < WORLD_H * CHUNK_SIZE and len(due) < BLOCK_TICK_BUDGET:
+            world_voxels[get_indices(int(x), y, int(z))] = SAND
+            due.append(encode_pos(int(x), y, int(z)))
+    due = np.unique(np.array(due, dtype=np.int64))
+
+    positions, t = timed(run_scheduled_ticks, world_voxels, due)
+    print(
+        f"scheduled ticks: {len(due)} updates in {t * 1000:.3f} ms,"
+        f" {len(positions[0]) // 2} blocks fell"
+    )
+    check_sand_in_water(world_voxels)
+
+
+def check_sand_in_water(world_voxels):
+    # sand dropped on the sea sinks without lifting water above SEA_LEVEL
+    size = WORLD_W * CHUNK_SIZE
+    sea = [
+        (x, z)
+        for x in range(size)
+        for z in range(size)
+        if get_height(x, z) < SEA_LEVEL - 2
+    ]
+    if not sea:
+        print("no sea in this world, skipped the sand in water check")
+        return
+    x, z = sea[0]
+    world_voxels[get_indices(x, SEA_LEVEL, z)] = SAND
+    y = SEA_LEVEL
+    while True:
+        positions, voxel_ids = run_scheduled_ticks(
+            world_voxels, np.array([encode_pos(x, y, z)], dtype=np.int64)
+        )
+        if not len(positions):
+            break
+        for (px, py, pz), voxel_id in zip(positions, voxel_ids):
+            world_voxels[get_indices(px, py, pz)] = voxel_id
+        y -= 1
+
+    above = range(SEA_LEVEL, SEA_LEVEL + 4)
+    is_water = [
+        WATER_BASE <= world_voxels[get_indices(x, wy, z)] <= WATER for wy in above
+    ]
+    assert not any(is_water), "falling sand lifted water above SEA_LEVEL"
+    print(f"sand dropped into the sea settled at y {y}, no water above SEA_LEVEL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import time
+from settings import *
+from terrain_gen import generate_world_voxels, get_chunk_position
+from lighting import light_column
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def light_world(world_voxels, light, is_generated):
+    # initial light of every chunk column
+    for x in range(WORLD_W):
+        for z in range(WORLD_D):
+            light_column(world_voxels, light, is_generated, x, z)
+
+
+def generate_lit_world():
+    # voxels of the whole world and their initial light
+    world_voxels = generate_world_voxels()
+    light = np.zeros_like(world_voxels)
+    light_world(world_voxels, light, np.ones(WORLD_VOL, dtype=bool))
+    return world_voxels, light
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    samples = np.asarray(samples)
+    return {p: float(np.percentile(samples, p)) for p in points}
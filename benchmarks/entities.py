@@ -0,0 +1,51 @@
+"""
+Entity benchmark: batched physics and spatial hash updates as the entity
+count scales, in entity updates per second.
+
+    python -m benchmarks.entities [num_ticks]
+"""
+import sys
+from types import SimpleNamespace
+from settings import *
+from entities import EntitySystem, MOB, ITEM
+from benchmarks.common import generate_world_voxels, timed
+
+ENTITY_COUNTS = (100, 1000, 5000, 10000)
+
+
+def spawn_entities(entities, count, rng):
+    size = WORLD_W * CHUNK_SIZE
+    for i in range(count):
+        position = (rng.uniform(0, size), WORLD_H * CHUNK_SIZE, rng.uniform(0, size))
+        entities.spawn(MOB if i % 4 else ITEM, position)
+
+
+def main():
+    num_ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    world = SimpleNamespace(voxels=generate_world_voxels())
+    rng = np.random.default_rng(0)
+
+    # compile first
+    warmup = EntitySystem(world, capacity=8)
+    spawn_entities(warmup, 8, rng)
+    warmup.tick()
+    warmup.query_radius(warmup.positions[0], 8.0)
+
+    print(f"{'entities':>9} {'tick ms':>9} {'updates/s':>14} {'query us':>9}")
+    for count in ENTITY_COUNTS:
+        entities = EntitySystem(world, capacity=count)
+        spawn_entities(entities, count, rng)
+
+        _, tick_time = timed(lambda: [entities.tick() for _ in range(num_ticks)])
+        centers = entities.positions[rng.integers(0, count, 1000)]
+        _, query_time = timed(lambda: [entities.query_radius(c, 8.0) for c in centers])
+
+        tick_ms = tick_time * 1000 / num_ticks
+        updates = count * num_ticks / tick_time
+        print(
+            f"{count:>9} {tick_ms:>9.3f} {updates:>14,.0f} {query_time * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Lighting benchmark: initial light of a generated world, then the latency of
+incremental relighting for single block edits (place / remove a block and a
+lamp at random surface positions).
+
+    python -m benchmarks.lighting [num_edits]
+"""
+import sys
+from settings import *
+from terrain_gen import get_height
+from lighting import light_column, update_light
+import voxel_query
+from benchmarks.common import generate_world_voxels, light_world, timed, percentiles
+
+
+def edit(world_voxels, light, is_generated, position, voxel_id):
+    positions = np.array([position], dtype=np.int64)
+    old_ids = voxel_query.get_voxel_ids(world_voxels, positions)
+    voxel_query.set_voxel_ids(
+        world_voxels, positions, np.array([voxel_id], dtype=np.uint8)
+    )
+    return update_light(world_voxels, light, is_generated, positions, old_ids)
+
+
+def main():
+    num_edits = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    world_voxels = generate_world_voxels()
+    light = np.zeros_like(world_voxels)
+    is_generated = np.ones(WORLD_VOL, dtype=bool)
+
+    # compile first on a copy
+    light_column(world_voxels, light.copy(), is_generated, 0, 0)
+    _, light_time = timed(light_world, world_voxels, light, is_generated)
+
+    rng = np.random.default_rng(0)
+    size = WORLD_W * CHUNK_SIZE
+    surface = []
+    for x, z in rng.integers(0, size, (num_edits, 2)):
+        y = get_height(x, z)
+        if y < WORLD_H * CHUNK_SIZE:
+            surface.append((int(x), int(y), int(z)))
+
+    edit(world_voxels, light, is_generated, surface[0], DIRT)
+    edit(world_voxels, light, is_generated, surface[0], 0)
+
+    print(f"initial light: {light_time:.2f} s ({WORLD_AREA} columns)")
+    for name, voxel_id in (("block", DIRT), ("lamp", LAMP)):
+        place_times, remove_times, remeshed = [], [], []
+        for position in surface:
+            remesh, t = timed(
+                edit, world_voxels, light, is_generated, position, voxel_id
+            )
+            place_times.append(t * 1000)
+            remeshed.append(remesh.sum())
+            _, t = timed(edit, world_voxels, light, is_generated, position, 0)
+            remove_times.append(t * 1000)
+
+        for action, times in (("place", place_times), ("remove", remove_times)):
+            p = percentiles(times)
+            print(
+                f"{action} {name:<6} p50 {p[50]:.3f} ms  p90 {p[90]:.3f} ms"
+                f"  p99 {p[99]:.3f} ms"
+            )
+        print(f"  chunks remeshed per edit: {np.mean(remeshed):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Meshing benchmark: the scalar mesher against the occupancy bitmask mesher on
+the non-empty chunks of a generated, lit world. Also checks that both produce
+the same vertex data.
+
+    python -m benchmarks.meshing [repeats]
+"""
+import sys
+from settings import *
+from meshes.chunk_mesh_builder import build_chunk_mesh
+from meshes.bitmask_mesh_builder import build_chunk_mesh_bitmask
+from benchmarks.common import generate_lit_world, get_chunk_position, timed
+
+FORMAT_SIZE = 2
+
+
+def mesh_chunks(builder, world_voxels, world_light, chunk_indices):
+    meshes = []
+    for chunk_index in chunk_indices:
+        meshes.append(
+            builder(
+                world_voxels[chunk_index],
+                FORMAT_SIZE,
+                get_chunk_position(chunk_index),
+                world_voxels,
+                world_light,
+            )
+        )
+    return meshes
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    world_voxels, world_light = generate_lit_world()
+
+    chunk_indices = [i for i in range(WORLD_VOL) if world_voxels[i].any()]
+    args = world_voxels, world_light, chunk_indices
+
+    results = {}
+    for name, builder in (
+        ("scalar", build_chunk_mesh),
+        ("bitmask", build_chunk_mesh_bitmask),
+    ):
+        mesh_chunks(builder, world_voxels, world_light, chunk_indices[:1])  # compile
+        best = float("inf")
+        for _ in range(repeats):
+            meshes, t = timed(mesh_chunks, builder, *args)
+            best = min(best, t)
+        results[name] = meshes, best
+
+    scalar_meshes, scalar_time = results["scalar"]
+    bitmask_meshes, bitmask_time = results["bitmask"]
+    num_mismatches = sum(
+        not np.array_equal(a, b) for a, b in zip(scalar_meshes, bitmask_meshes)
+    )
+    num_vertices = sum(len(mesh) for mesh in scalar_meshes) // FORMAT_SIZE
+
+    print(f"chunks:   {len(chunk_indices)} non-empty, {num_vertices:,} vertices")
+    for name, (_, t) in results.items():
+        print(f"{name:<8}  {t * 1000 / len(chunk_indices):.3f} ms/chunk")
+    print(f"speedup:  {scalar_time / bitmask_time:.1f}x")
+    print(f"mismatched chunks: {num_mismatches}")
+
+
+if __name__ == "__main__":
+    main()
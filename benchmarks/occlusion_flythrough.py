@@ -0,0 +1,97 @@
+"""
+Replays a flythrough without a window and reports how many frustum-visible
+chunks the cave-aware occlusion culling removes per frame.
+
+    python -m benchmarks.occlusion_flythrough [flythrough.json]
+"""
+import sys
+from settings import *
+from camera import Camera
+from flythrough import load_path, get_scripted_path, apply_frame
+from occlusion import get_face_links, get_occlusion_mask, ALL_FACES
+from world_objects.chunk import Chunk
+from benchmarks.common import (
+    generate_world_voxels,
+    get_chunk_position,
+    timed,
+    percentiles,
+)
+
+
+def get_chunk_bounds(voxels):
+    bounds_min = np.zeros([WORLD_VOL, 3], dtype="float32")
+    bounds_max = np.zeros([WORLD_VOL, 3], dtype="float32")
+    is_empty = np.ones(WORLD_VOL, dtype=bool)
+    for chunk_index in range(WORLD_VOL):
+        bounds = Chunk.get_voxel_bounds(voxels[chunk_index])
+        if bounds[0] < 0:
+            continue
+        origin = np.array(get_chunk_position(chunk_index), dtype="float32")
+        bounds_min[chunk_index] = origin * CHUNK_SIZE + bounds[:3]
+        bounds_max[chunk_index] = origin * CHUNK_SIZE + bounds[3:]
+        is_empty[chunk_index] = False
+    return bounds_min, bounds_max, is_empty
+
+
+def get_all_face_links(voxels, is_empty):
+    face_links = np.full([WORLD_VOL, 6], ALL_FACES, dtype="uint8")
+    for chunk_index in np.flatnonzero(~is_empty):
+        face_links[chunk_index] = get_face_links(voxels[chunk_index])
+    return face_links
+
+
+def main():
+    frames = load_path(sys.argv[1]) if len(sys.argv) > 1 else get_scripted_path()
+
+    voxels, gen_time = timed(generate_world_voxels)
+    bounds_min, bounds_max, is_empty = get_chunk_bounds(voxels)
+
+    face_links, links_time = timed(get_all_face_links, voxels, is_empty)
+
+    centers = np.array(
+        [get_chunk_position(i) for i in range(WORLD_VOL)], dtype="float32"
+    )
+    centers = (centers + 0.5) * CHUNK_SIZE
+    all_chunks = np.ones(WORLD_VOL, dtype=bool)
+
+    camera = Camera(PLAYER_POS, yaw=-90, pitch=0)
+    frustum_counts, drawn_counts, search_times = [], [], []
+
+    for frame in frames:
+        apply_frame(camera, frame)
+        visible = camera.frustum.cull_chunks(bounds_min, bounds_max, ~is_empty)
+
+        traversal = np.zeros(WORLD_VOL, dtype=bool)
+        traversal[
+            camera.frustum.cull_chunks(
+                centers - H_CHUNK_SIZE, centers + H_CHUNK_SIZE, all_chunks
+            )
+        ] = True
+        cam_x, cam_y, cam_z = glm.ivec3(
+            glm.floor(camera.get_camera_position() / CHUNK_SIZE)
+        )
+        mask, search_time = timed(
+            get_occlusion_mask, face_links, traversal, cam_x, cam_y, cam_z
+        )
+
+        frustum_counts.append(len(visible))
+        drawn_counts.append(int(np.count_nonzero(mask[visible])))
+        search_times.append(search_time * 1000)
+
+    # drop the first frame, it includes the njit compilation
+    search_times = search_times[1:]
+    frustum_total, drawn_total = sum(frustum_counts), sum(drawn_counts)
+    culled = frustum_total - drawn_total
+
+    print(f"world generation:    {gen_time:.2f} s")
+    print(f"face links:          {links_time:.2f} s")
+    print(f"frames:              {len(frames)}")
+    print(f"frustum visible:     {frustum_total / len(frames):.1f} chunks/frame")
+    print(f"after occlusion:     {drawn_total / len(frames):.1f} chunks/frame")
+    print(f"occlusion culled:    {culled} ({100 * culled / max(frustum_total, 1):.1f}%)")
+    for p, value in percentiles(search_times).items():
+        print(f"search time p{p}:     {value:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
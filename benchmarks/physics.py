@@ -0,0 +1,58 @@
+"""
+Collision benchmark: swept AABB moves and overlap tests of player sized
+boxes against a generated world, in collisions per second.
+
+    python -m benchmarks.physics [num_boxes]
+"""
+import sys
+from settings import *
+from collision import move_box, box_overlaps_solid
+from player import HALF_EXTENTS
+from benchmarks.common import generate_world_voxels, timed
+
+
+@njit
+def run_moves(world_voxels, positions, deltas, half_extents):
+    num_hits = 0
+    for i in range(len(positions)):
+        _, hits = move_box(world_voxels, positions[i], half_extents, deltas[i])
+        num_hits += hits.any()
+    return num_hits
+
+
+@njit
+def run_overlaps(world_voxels, positions, half_extents):
+    num_hits = 0
+    for i in range(len(positions)):
+        pos = positions[i]
+        num_hits += box_overlaps_solid(
+            world_voxels, pos - half_extents, pos + half_extents
+        )
+    return num_hits
+
+
+def main():
+    num_boxes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    world_voxels = generate_world_voxels()
+
+    rng = np.random.default_rng(0)
+    size = WORLD_W * CHUNK_SIZE
+    positions = rng.uniform(
+        (0, 0, 0), (size, WORLD_H * CHUNK_SIZE, size), (num_boxes, 3)
+    )
+    # player-like steps: up to one tick of sprinting plus falling
+    deltas = rng.uniform(-0.5, 0.5, (num_boxes, 3))
+
+    # compile first
+    run_moves(world_voxels, positions[:10], deltas[:10], HALF_EXTENTS)
+    run_overlaps(world_voxels, positions[:10], HALF_EXTENTS)
+
+    hits, move_time = timed(run_moves, world_voxels, positions, deltas, HALF_EXTENTS)
+    print(f"swept moves:    {num_boxes / move_time:,.0f} /s ({hits} blocked)")
+
+    hits, overlap_time = timed(run_overlaps, world_voxels, positions, HALF_EXTENTS)
+    print(f"overlap tests:  {num_boxes / overlap_time:,.0f} /s ({hits} overlapping)")
+
+
+if __name__ == "__main__":
+    main()
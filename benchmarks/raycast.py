@@ -0,0 +1,39 @@
+"""
+Batched ray casting benchmark: random rays through a generated world.
+
+    python -m benchmarks.raycast [num_rays] [max_dist]
+"""
+import sys
+from settings import *
+from raycast import ray_cast_batch
+from benchmarks.common import generate_world_voxels, timed
+
+
+def main():
+    num_rays = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_dist = float(sys.argv[2]) if len(sys.argv) > 2 else 64.0
+    world_voxels = generate_world_voxels()
+
+    rng = np.random.default_rng(0)
+    size = WORLD_W * CHUNK_SIZE
+    origins = rng.uniform(
+        (0, 0, 0), (size, WORLD_H * CHUNK_SIZE, size), (num_rays, 3)
+    )
+    directions = rng.normal(size=(num_rays, 3))
+
+    # compile first
+    ray_cast_batch(world_voxels, origins[:10], directions[:10], max_dist)
+
+    (_, _, voxel_ids, distances), cast_time = timed(
+        ray_cast_batch, world_voxels, origins, directions, max_dist
+    )
+    hits = voxel_ids != 0
+    print(f"rays:          {num_rays:,} (max dist {max_dist})")
+    print(f"throughput:    {num_rays / cast_time:,.0f} rays/s")
+    print(f"hit rate:      {100 * hits.mean():.1f}%")
+    if hits.any():
+        print(f"mean hit dist: {distances[hits].mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Headless benchmark of the full render loop: renders a scripted (or recorded)
+flythrough into an offscreen framebuffer and reports frame time percentiles,
+per-frame render counters and the GPU time of each render pass. Set a fixed
+SEED in settings.py for comparable runs. Works with Mesa's software renderer:
+
+    LIBGL_ALWAYS_SOFTWARE=1 python -m benchmarks.render_flythrough --backend egl
+    python -m benchmarks.render_flythrough --path flythrough.json --json out.json
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from settings import *
+from main import VoxelEngine
+from flythrough import load_path, get_scripted_path, apply_frame
+from benchmarks.common import percentiles
+
+
+def run(app, frames, warmup):
+    frame_times, samples = [], []
+    app.gpu_timer.is_enabled = True
+    for i, frame in enumerate(frames):
+        if i == warmup:
+            app.gpu_timer.clear()
+        start = time.perf_counter()
+        apply_frame(app.player, frame)
+        app.time = i / 60
+        app.shader_program.update()
+        app.scene.update()
+        app.hotbar.update()
+        app.render()
+        app.ctx.finish()
+        frame_time = (time.perf_counter() - start) * 1000
+
+        if i >= warmup:
+            frame_times.append(frame_time)
+            samples.append(app.render_stats.as_dict())
+    app.gpu_timer.flush()
+    return frame_times, samples
+
+
+def get_report(frame_times, samples):
+    report = {
+        "frames": len(frame_times),
+        "frame_time_ms": {
+            **{f"p{p}": v for p, v in percentiles(frame_times).items()},
+            "max": float(np.max(frame_times)),
+            "mean": float(np.mean(frame_times)),
+        },
+    }
+    for key in samples[0]:
+        values = [sample[key] for sample in samples]
+        report[key] = {"mean": float(np.mean(values)), "max": int(np.max(values))}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--path", help="recorded flythrough json (default: scripted)")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--backend", help="moderngl standalone backend, e.g. egl")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    app = VoxelEngine(
+        headless=True,
+        win_res=glm.vec2(args.width, args.height),
+        gl_backend=args.backend,
+    )
+    startup_time = time.perf_counter() - start
+    app.scene.world.loader.load_all()
+    full_load_time = time.perf_counter() - start
+
+    frames = load_path(args.path) if args.path else get_scripted_path(args.frames)
+    frame_times, samples = run(app, frames, min(args.warmup, len(frames) - 1))
+
+    report = get_report(frame_times, samples)
+    report["first_frame_s"] = startup_time
+    report["full_load_s"] = full_load_time
+    report["gpu_pass_ms"] = app.gpu_timer.get_mean_times()
+    report["renderer"] = app.ctx.info["GL_RENDERER"]
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
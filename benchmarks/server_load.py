@@ -0,0 +1,154 @@
+"""
+Server load test: many simulated clients connect to a world server, walk
+around to pull chunks and place/remove blocks. Reports chunks served per
+second and edit round-trip latency.
+
+    python -m benchmarks.server_load [--clients 32] [--duration 10] [--spawn-server]
+"""
+import argparse
+import selectors
+import subprocess
+import sys
+import time
+from settings import *
+from net import *
+from benchmarks.common import percentiles
+
+
+class SimulatedClient:
+    def __init__(self, address, rng):
+        self.conn = Connection.connect(address)
+        self.rng = rng
+        self.client_id = None
+        self.position = np.array(
+            [
+                rng.uniform(0, WORLD_W * CHUNK_SIZE),
+                CHUNK_SIZE,
+                rng.uniform(0, WORLD_D * CHUNK_SIZE),
+            ]
+        )
+        self.conn.send(MSG_POSITION, POSITION.pack(*self.position))
+
+        self.num_chunks = 0
+        self.edit_seq = 0
+        self.pending_edits = {}
+        self.round_trips = []
+
+    def move(self):
+        # jump to a neighbouring column so the server streams new chunks
+        step = self.rng.integers(-1, 2, 2) * CHUNK_SIZE
+        world_max = [WORLD_W * CHUNK_SIZE - 1, WORLD_D * CHUNK_SIZE - 1]
+        self.position[[0, 2]] = np.clip(self.position[[0, 2]] + step, 0, world_max)
+        self.conn.send(MSG_POSITION, POSITION.pack(*self.position))
+
+    def edit(self):
+        self.edit_seq += 1
+        # toggle a block at the top of the world so edits always change a voxel
+        x, z = self.position[[0, 2]].astype(int)
+        y = WORLD_H * CHUNK_SIZE - 1
+        voxel_id = int(self.rng.integers(0, 2)) * DIRT
+        self.conn.send(MSG_EDIT, EDIT.pack(self.edit_seq, x, y, z, voxel_id))
+        self.pending_edits[self.edit_seq] = time.perf_counter()
+
+    def receive(self):
+        for msg_type, payload in self.conn.receive():
+            if msg_type == MSG_HELLO:
+                (self.client_id,) = HELLO.unpack(payload)
+            elif msg_type == MSG_CHUNK:
+                decode_chunk(payload)
+                self.num_chunks += 1
+            elif msg_type == MSG_EDIT_DELTA:
+                client_id, seq = EDIT_DELTA.unpack(payload)[:2]
+                if client_id == self.client_id and seq in self.pending_edits:
+                    sent = self.pending_edits.pop(seq)
+                    self.round_trips.append(time.perf_counter() - sent)
+
+
+def run_load_test(address, num_clients, duration, move_interval, edit_interval):
+    rng = np.random.default_rng(0)
+    selector = selectors.DefaultSelector()
+    clients = []
+    for _ in range(num_clients):
+        client = SimulatedClient(address, rng)
+        selector.register(client.conn.sock, selectors.EVENT_READ, client)
+        clients.append(client)
+
+    start = time.perf_counter()
+    next_move = start + move_interval
+    next_edit = start + edit_interval
+    while (now := time.perf_counter()) - start < duration:
+        if now >= next_move:
+            for client in clients:
+                client.move()
+            next_move += move_interval
+        if now >= next_edit:
+            for client in clients:
+                client.edit()
+            next_edit += edit_interval
+
+        for client in clients:
+            client.conn.flush()
+        for key, _ in selector.select(0.001):
+            key.data.receive()
+
+    elapsed = time.perf_counter() - start
+    num_chunks = sum(c.num_chunks for c in clients)
+    num_bytes = sum(c.conn.bytes_received for c in clients)
+    round_trips = [t * 1000 for c in clients for t in c.round_trips]
+    for client in clients:
+        client.conn.close()
+    selector.close()
+
+    return {
+        "clients": num_clients,
+        "duration_s": elapsed,
+        "chunks": num_chunks,
+        "chunks_per_s": num_chunks / elapsed,
+        "mb_per_s": num_bytes / elapsed / 1e6,
+        "edits": len(round_trips),
+        "edit_rtt_ms": percentiles(round_trips) if round_trips else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="World server load test")
+    parser.add_argument("--address", default=NET_ADDRESS)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--move-interval", type=float, default=1.0, help="seconds")
+    parser.add_argument("--edit-interval", type=float, default=0.1, help="seconds")
+    parser.add_argument(
+        "--spawn-server", action="store_true", help="start server.py in a subprocess"
+    )
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        server = subprocess.Popen(
+            [sys.executable, "server.py", "--address", args.address]
+        )
+        time.sleep(2.0)
+
+    try:
+        results = run_load_test(
+            args.address,
+            args.clients,
+            args.duration,
+            args.move_interval,
+            args.edit_interval,
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"clients:       {results['clients']}")
+    print(f"chunks served: {results['chunks']} ({results['chunks_per_s']:.1f}/s)")
+    print(f"throughput:    {results['mb_per_s']:.2f} MB/s")
+    print(f"edits:         {results['edits']}")
+    for p, value in results["edit_rtt_ms"].items():
+        print(f"  edit rtt p{p}: {value:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
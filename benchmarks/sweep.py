@@ -0,0 +1,163 @@
+"""
+Parameter sweep over CHUNK_SIZE, WORLD_W and WORLD_H. The sizes are baked into
+the njit kernels, so every combination runs generation, lighting and meshing
+in a fresh subprocess with the sizes set through the environment (see
+settings.py). Prints a comparison table of the results.
+
+    python -m benchmarks.sweep --chunk-sizes 16 32 48 --world-widths 10 20
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+from settings import *
+from world_objects.chunk import Chunk
+from lighting import light_column
+from meshes.chunk_mesh_builder import build_chunk_mesh
+from meshes.bitmask_mesh_builder import build_chunk_mesh_bitmask
+from benchmarks.common import (
+    generate_world_voxels,
+    get_chunk_position,
+    light_world,
+    timed,
+)
+
+# pack_data stores vertex positions 0..CHUNK_SIZE in 6 bits
+MAX_CHUNK_SIZE = 63
+
+COLUMNS = (
+    ("chunk", "chunk_size", "{}"),
+    ("w", "world_w", "{}"),
+    ("h", "world_h", "{}"),
+    ("mesher", "mesher", "{}"),
+    ("gen s", "generate_s", "{:.2f}"),
+    ("light s", "light_s", "{:.2f}"),
+    ("mesh s", "mesh_s", "{:.2f}"),
+    ("ms/chunk", "mesh_ms_per_chunk", "{:.2f}"),
+    ("draws", "draw_calls", "{}"),
+    ("vertices", "vertices", "{}"),
+    ("mesh MiB", "mesh_mib", "{:.1f}"),
+    ("voxel MiB", "voxel_mib", "{:.1f}"),
+    ("scratch MiB", "scratch_mib", "{:.1f}"),
+)
+
+
+def run_worker():
+    # one combination, with the sizes this process's settings were loaded with
+    format_size = 2
+    builder = build_chunk_mesh_bitmask if BITMASK_MESHER else build_chunk_mesh
+
+    # compile on one chunk, so only the steady state is timed
+    scratch = np.zeros([WORLD_VOL, CHUNK_VOL], dtype="uint8")
+    Chunk.generate_terrain(scratch[0], 0, 0, 0)
+    light_column(scratch, np.zeros_like(scratch), np.ones(WORLD_VOL, bool), 0, 0)
+    builder(scratch[0], format_size, (0, 0, 0), scratch, np.zeros_like(scratch))
+    del scratch
+
+    world_voxels, generate_time = timed(generate_world_voxels)
+    world_light = np.zeros_like(world_voxels)
+    is_generated = np.ones(WORLD_VOL, dtype=bool)
+    _, light_time = timed(light_world, world_voxels, world_light, is_generated)
+
+    def mesh_world():
+        # only the sizes are kept, each mesh is a view into its scratch array
+        sizes = np.zeros(WORLD_VOL, dtype=np.int64)
+        for chunk_index in range(WORLD_VOL):
+            mesh = builder(
+                world_voxels[chunk_index],
+                format_size,
+                get_chunk_position(chunk_index),
+                world_voxels,
+                world_light,
+            )
+            sizes[chunk_index] = len(mesh)
+        return sizes
+
+    mesh_sizes, mesh_time = timed(mesh_world)
+    mib = 1 / (1024 * 1024)
+    return {
+        "chunk_size": CHUNK_SIZE,
+        "world_w": WORLD_W,
+        "world_h": WORLD_H,
+        "world_area": WORLD_AREA,
+        "mesher": "bitmask" if BITMASK_MESHER else "scalar",
+        "generate_s": generate_time,
+        "light_s": light_time,
+        "mesh_s": mesh_time,
+        "mesh_ms_per_chunk": mesh_time * 1000 / WORLD_VOL,
+        "draw_calls": int(np.count_nonzero(mesh_sizes)),
+        "vertices": int(mesh_sizes.sum()) // format_size,
+        "mesh_mib": mesh_sizes.sum() * 4 * mib,
+        "voxel_mib": (world_voxels.nbytes + world_light.nbytes) * mib,
+        # worst-case vertex array a single mesh build allocates
+        "scratch_mib": CHUNK_VOL * 18 * format_size * 4 * mib,
+    }
+
+
+def run_combination(chunk_size, world_w, world_h, timeout):
+    env = dict(
+        os.environ,
+        VOXEL_CHUNK_SIZE=str(chunk_size),
+        VOXEL_WORLD_W=str(world_w),
+        VOXEL_WORLD_H=str(world_h),
+    )
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks.sweep", "--worker"],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if process.returncode:
+        print(process.stderr, file=sys.stderr)
+        return None
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+def format_table(results):
+    rows = [[title for title, _, _ in COLUMNS]]
+    for result in results:
+        rows.append([fmt.format(result[key]) for _, key, fmt in COLUMNS])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(COLUMNS))]
+    lines = ["  ".join(cell.rjust(w) for cell, w in zip(row, widths)) for row in rows]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[16, 32, 48])
+    parser.add_argument("--world-widths", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--world-heights", type=int, nargs="+", default=[2])
+    parser.add_argument("--timeout", type=float, default=1800, help="per run, s")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker()))
+        return
+
+    for chunk_size in args.chunk_sizes:
+        if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+            parser.error(f"chunk size {chunk_size} doesn't fit pack_data")
+
+    results = []
+    for chunk_size, world_w, world_h in itertools.product(
+        args.chunk_sizes, args.world_widths, args.world_heights
+    ):
+        print(f"chunk {chunk_size}, world {world_w}x{world_h}...", file=sys.stderr)
+        result = run_combination(chunk_size, world_w, world_h, args.timeout)
+        if result is not None:
+            results.append(result)
+
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
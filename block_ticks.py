@@ -0,0 +1,240 @@
+import heapq
+from settings import *
+from meshes.chunk_mesh_builder import get_voxel_id_at, get_light_at
+from lighting import encode_pos, decode_pos, is_in_world, get_indices
+from water_sim import get_cell
+
+
+@njit
+def get_tickable_around(world_voxels, positions):
+    """
+    Encoded positions and chunk indices of the falling blocks at or right above
+    the (N, 3) world positions, i.e. those an edit there may leave unsupported.
+    """
+    cells = np.empty(2 * len(positions), dtype=np.int64)
+    chunk_indices = np.empty(2 * len(positions), dtype=np.int64)
+    num_cells = 0
+    for i in range(len(positions)):
+        wx, wz = positions[i, 0], positions[i, 2]
+        for wy in (positions[i, 1], positions[i, 1] + 1):
+            if not is_in_world(wx, wy, wz):
+                continue
+            chunk_index, voxel_index = get_indices(wx, wy, wz)
+            if BLOCK_FALLS[world_voxels[chunk_index, voxel_index]]:
+                cells[num_cells] = encode_pos(wx, wy, wz)
+                chunk_indices[num_cells] = chunk_index
+                num_cells += 1
+    return cells[:num_cells], chunk_indices[:num_cells]
+
+
+@njit
+def run_scheduled_ticks(world_voxels, due):
+    """
+    Scheduled updates of the due (encoded) positions: a falling block over air
+    or water moves down one voxel. Displaced water isn't carried up, the cell
+    it leaves becomes air for the water simulation to refill, so a block
+    sinking through the sea can't lift sources above it. Everything is read
+    from the current state and returned as (positions, voxel_ids) of the
+    changes.
+    """
+    positions = np.empty((2 * len(due), 3), dtype=np.int64)
+    voxel_ids = np.empty(2 * len(due), dtype=np.uint8)
+    num_changed = 0
+
+    for i in range(len(due)):
+        wx, wy, wz = decode_pos(due[i])
+        voxel_id = get_cell(world_voxels, wx, wy, wz)
+        below = get_cell(world_voxels, wx, wy - 1, wz)
+        if not BLOCK_FALLS[voxel_id] or BLOCK_SOLID[below]:
+            continue
+
+        for dy, new_id in ((0, 0), (-1, voxel_id)):
+            positions[num_changed, 0] = wx
+            positions[num_changed, 1] = wy + dy
+            positions[num_changed, 2] = wz
+            voxel_ids[num_changed] = new_id
+            num_changed += 1
+
+    return positions[:num_changed], voxel_ids[:num_changed]
+
+
+@njit
+def is_near(world_voxels, wx, wy, wz, radius, voxel_id):
+    # any voxel_id in the cube of the given radius around (wx, wy, wz)
+    for x in range(wx - radius, wx + radius + 1):
+        for y in range(wy - radius, wy + radius + 1):
+            for z in range(wz - radius, wz + radius + 1):
+                if get_cell(world_voxels, x, y, z) == voxel_id:
+                    return True
+    return False
+
+
+@njit
+def get_random_tick_id(world_voxels, world_light, voxel_id, wx, wy, wz):
+    # what a randomly ticked voxel turns into
+    if voxel_id == GRASS:
+        # grass under a block dies back to dirt
+        if BLOCK_SOLID[get_voxel_id_at(world_voxels, wx, wy + 1, wz)]:
+            return DIRT
+
+    elif voxel_id == DIRT:
+        # grass spreads onto lit dirt with air above
+        if get_voxel_id_at(world_voxels, wx, wy + 1, wz):
+            return voxel_id
+        light = get_light_at(world_light, wx, wy + 1, wz)
+        if max(light >> 4, light & MAX_LIGHT) < GRASS_MIN_LIGHT:
+            return voxel_id
+        if is_near(world_voxels, wx, wy, wz, 1, GRASS):
+            return GRASS
+
+    elif voxel_id == LEAVES or voxel_id == GREEN_LEAF:
+        if not is_near(world_voxels, wx, wy, wz, LEAF_DECAY_RADIUS, WOOD):
+            return 0
+
+    return voxel_id
+
+
+@njit
+def run_random_ticks(world_voxels, world_light, chunk_indices, num_samples):
+    """
+    Random ticks of num_samples random voxels in each of the chunks. Returns
+    (positions, voxel_ids) of the voxels that change.
+    """
+    positions = np.empty((len(chunk_indices) * num_samples, 3), dtype=np.int64)
+    voxel_ids = np.empty(len(chunk_indices) * num_samples, dtype=np.uint8)
+    num_changed = 0
+
+    for chunk_index in chunk_indices:
+        cx = chunk_index % WORLD_W
+        cz = chunk_index // WORLD_W % WORLD_D
+        cy = chunk_index // WORLD_AREA
+        for _ in range(num_samples):
+            voxel_index = np.random.randint(0, CHUNK_VOL)
+            voxel_id = world_voxels[chunk_index, voxel_index]
+            if not voxel_id:
+                continue
+
+            wx = cx * CHUNK_SIZE + voxel_index % CHUNK_SIZE
+            wz = cz * CHUNK_SIZE + voxel_index // CHUNK_SIZE % CHUNK_SIZE
+            wy = cy * CHUNK_SIZE + voxel_index // CHUNK_AREA
+            new_id = get_random_tick_id(world_voxels, world_light, voxel_id, wx, wy, wz)
+            if new_id != voxel_id:
+                positions[num_changed, 0] = wx
+                positions[num_changed, 1] = wy
+                positions[num_changed, 2] = wz
+                voxel_ids[num_changed] = new_id
+                num_changed += 1
+
+    return positions[:num_changed], voxel_ids[:num_changed]
+
+
+class BlockTicker:
+    """
+    Block updates over time. Scheduled ticks wait in per-chunk priority queues
+    of (due tick, position), with a heap of the chunks' next due ticks on top,
+    so a tick only touches chunks with due work and at most BLOCK_TICK_BUDGET
+    updates. Random ticks sample RANDOM_TICKS_PER_CHUNK voxels in the chunks
+    around the player only. Either way the cost per tick doesn't grow with the
+    world, and all changes of a tick are applied as one batch, so each chunk
+    is relit and remeshed at most once per tick.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.num_ticks = 0
+
+        # chunk index -> heap of (due tick, encoded position)
+        self.queues = {}
+        # heap of (next due tick, chunk index), entries not matching
+        # self.chunk_due are stale and skipped
+        self.due_chunks = []
+        self.chunk_due = {}
+
+        # stats of the last tick
+        self.num_updated = 0
+        self.num_changed = 0
+
+    @property
+    def num_scheduled(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def schedule(self, pos, chunk_index, delay):
+        due = self.num_ticks + delay
+        heapq.heappush(self.queues.setdefault(chunk_index, []), (due, pos))
+        if due < self.chunk_due.get(chunk_index, due + 1):
+            self.chunk_due[chunk_index] = due
+            heapq.heappush(self.due_chunks, (due, chunk_index))
+
+    def schedule_around(self, positions):
+        """
+        Schedule the falling blocks at or above the (N, 3) world positions,
+        called for every voxel edit.
+        """
+        if len(positions):
+            cells, chunk_indices = get_tickable_around(
+                self.world.voxels, np.asarray(positions, dtype=np.int64)
+            )
+            for pos, chunk_index in zip(cells.tolist(), chunk_indices.tolist()):
+                self.schedule(pos, chunk_index, FALL_DELAY)
+
+    def pop_due(self):
+        # encoded positions due by now, up to the budget
+        due = []
+        while self.due_chunks and len(due) < BLOCK_TICK_BUDGET:
+            due_tick, chunk_index = self.due_chunks[0]
+            if due_tick > self.num_ticks:
+                break
+            heapq.heappop(self.due_chunks)
+            if self.chunk_due.get(chunk_index) != due_tick:
+                continue
+
+            queue = self.queues[chunk_index]
+            while (
+                queue and queue[0][0] <= self.num_ticks and len(due) < BLOCK_TICK_BUDGET
+            ):
+                due.append(heapq.heappop(queue)[1])
+
+            if queue:
+                self.chunk_due[chunk_index] = queue[0][0]
+                heapq.heappush(self.due_chunks, (queue[0][0], chunk_index))
+            else:
+                del self.queues[chunk_index], self.chunk_due[chunk_index]
+        return np.unique(np.array(due, dtype=np.int64))
+
+    def get_random_tick_chunks(self):
+        # non-empty generated chunks within RANDOM_TICK_RADIUS columns of the player
+        position = self.world.app.player.position
+        px, pz = int(position.x // CHUNK_SIZE), int(position.z // CHUNK_SIZE)
+        xs = np.arange(
+            max(px - RANDOM_TICK_RADIUS, 0), min(px + RANDOM_TICK_RADIUS + 1, WORLD_W)
+        )
+        zs = np.arange(
+            max(pz - RANDOM_TICK_RADIUS, 0), min(pz + RANDOM_TICK_RADIUS + 1, WORLD_D)
+        )
+        x, y, z = np.meshgrid(xs, np.arange(WORLD_H), zs, indexing="ij")
+        chunk_indices = (x + WORLD_W * z + WORLD_AREA * y).ravel()
+        is_tickable = (
+            self.world.loader.is_generated[chunk_indices]
+            & ~self.world.chunk_is_empty[chunk_indices]
+        )
+        return chunk_indices[is_tickable]
+
+    def tick(self):
+        self.num_ticks += 1
+        world = self.world
+
+        due = self.pop_due()
+        fall_positions, fall_ids = run_scheduled_ticks(world.voxels, due)
+        random_positions, random_ids = run_random_ticks(
+            world.voxels,
+            world.light,
+            self.get_random_tick_chunks(),
+            RANDOM_TICKS_PER_CHUNK,
+        )
+
+        positions = np.concatenate([fall_positions, random_positions])
+        voxel_ids = np.concatenate([fall_ids, random_ids])
+        self.num_updated, self.num_changed = len(due), len(positions)
+        if len(positions):
+            # one relight and remesh per chunk, schedules the blocks above
+            world.set_voxel_ids(positions, voxel_ids)
@@ -7,7 +7,7 @@ EYE_OFFSET = glm.vec3(0, HALF_HEIGHT * 0.9, 0)
 
 
 class Camera:
-    def __init__(self, position, yaw, pitch):
+    def __init__(self, position, yaw, pitch, aspect_ratio=ASPECT_RATIO):
         self.position = glm.vec3(position)
         self.yaw = glm.radians(yaw)
         self.pitch = glm.radians(pitch)
@@ -16,7 +16,9 @@ class Camera:
         self.right = glm.vec3(1, 0, 0)
         self.forward = glm.vec3(0, 0, -1)
 
-        self.m_proj = glm.perspective(V_FOV, ASPECT_RATIO, NEAR, FAR)
+        # of the framebuffer, a headless one can differ from WIN_RES
+        self.aspect_ratio = aspect_ratio
+        self.m_proj = glm.perspective(V_FOV, aspect_ratio, NEAR, FAR)
         self.m_view = glm.mat4()
 
         self.frustum = Frustum(self)
@@ -32,6 +34,9 @@ class Camera:
     def get_camera_position(self):
         return self.position + EYE_OFFSET
 
+    def teleport(self, position):
+        self.position = glm.vec3(position)
+
     def update_vectors(self):
         self.forward.x = glm.cos(self.yaw) * glm.cos(self.pitch)
         self.forward.y = glm.sin(self.pitch)
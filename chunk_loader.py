@@ -0,0 +1,367 @@
+import time
+from collections import deque
+from settings import *
+from terrain_gen import get_heightmap, fill_terrain, decorate
+from meshes.chunk_mesh import ChunkMesh
+
+# pipeline stages, a stage value is the last one finished. Chunk columns go
+# through HEIGHTMAP..LIGHT together, then each chunk through MESH and UPLOAD
+HEIGHTMAP, TERRAIN, DECORATION, LIGHT, MESH, UPLOAD = range(1, 7)
+STAGE_NAMES = {
+    HEIGHTMAP: "heightmap",
+    TERRAIN: "terrain",
+    DECORATION: "decoration",
+    LIGHT: "light",
+    MESH: "mesh",
+    UPLOAD: "upload",
+}
+
+# stage the 3x3 columns around a column (or chunk) must have finished before it
+# can run a stage: light spreads into the neighbours and the mesher reads one
+# voxel into every neighbour. Decoration stays inside its own chunk, so it only
+# needs its own terrain
+REQUIRED_AROUND = np.array([0, 0, 0, 0, DECORATION, LIGHT, 0], dtype=np.int8)
+
+# column index of every chunk
+CHUNK_COLUMNS = np.arange(WORLD_VOL) % WORLD_AREA
+
+
+def get_neighbour_min(grid):
+    # lowest value in the 3x3 neighbourhood of every cell, the world edge counts
+    # as finished
+    padded = np.pad(grid, 1, constant_values=np.iinfo(grid.dtype).max)
+    h, w = grid.shape
+    shifted = [padded[dz : dz + h, dx : dx + w] for dz in range(3) for dx in range(3)]
+    return np.min(shifted, axis=0)
+
+
+class ChunkLoader:
+    """
+    Chunk pipeline scheduler. Every column moves through the heightmap,
+    terrain, decoration and light stages and then every chunk through mesh and
+    upload, one stage per step. A stage only runs once the neighbours it reads
+    have finished the stage it depends on (REQUIRED_AROUND), and of the ready
+    work the step picks the closest to the player, with work outside the view
+    frustum pushed back by CHUNK_OFF_SCREEN_PENALTY chunks. Priorities are
+    recomputed every frame, so the pipeline follows the camera. Deferred tasks
+    (e.g. the cloud mesh) run once no stage is ready.
+    """
+
+    # RemoteChunkLoader gets its voxels and light from the server
+    generates_terrain = True
+
+    def __init__(self, world):
+        self.world = world
+        self.is_generated = np.zeros(WORLD_VOL, dtype=bool)
+        self.is_meshed = np.zeros(WORLD_VOL, dtype=bool)
+
+        self.column_stage = np.zeros(WORLD_AREA, dtype=np.int8)
+        self.chunk_stage = np.zeros(WORLD_VOL, dtype=np.int8)
+        # column index -> heightmap, between the heightmap and decoration stages
+        self.heightmaps = {}
+        # chunk index -> vertex data, between the mesh and upload stages
+        self.vertex_data = {}
+        self.tasks = deque()
+
+        # column boxes over the full world height, for the frustum test
+        columns = np.arange(WORLD_AREA)
+        column_min = np.zeros([WORLD_AREA, 3], dtype="float32")
+        column_min[:, 0] = columns % WORLD_W * CHUNK_SIZE
+        column_min[:, 2] = columns // WORLD_W * CHUNK_SIZE
+        self.column_bounds_min = column_min
+        self.column_bounds_max = column_min + (
+            CHUNK_SIZE,
+            WORLD_H * CHUNK_SIZE,
+            CHUNK_SIZE,
+        )
+        self.column_priority = np.zeros(WORLD_AREA)
+        self.chunk_priority = np.zeros(WORLD_VOL)
+
+        # stats per stage: count, total and max execution time, total latency
+        # (s), the time from finishing the previous stage to finishing this one
+        start = time.perf_counter()
+        self.column_done_time = np.full(WORLD_AREA, start)
+        self.chunk_done_time = np.full(WORLD_VOL, start)
+        self.stage_counts = np.zeros(UPLOAD + 1, dtype=np.int64)
+        self.stage_time = np.zeros(UPLOAD + 1)
+        self.stage_max_time = np.zeros(UPLOAD + 1)
+        self.stage_latency = np.zeros(UPLOAD + 1)
+
+    @property
+    def is_done(self):
+        return bool(np.all(self.chunk_stage == UPLOAD)) and not self.tasks
+
+    @property
+    def num_pending_meshes(self):
+        # chunks of lit columns that aren't uploaded yet
+        is_lit = self.column_stage[CHUNK_COLUMNS] >= LIGHT
+        return int(np.count_nonzero(is_lit & (self.chunk_stage < UPLOAD)))
+
+    def add_task(self, task):
+        self.tasks.append(task)
+
+    def load_initial(self):
+        # everything within STARTUP_RADIUS columns of the spawn, before the first frame
+        spawn_x = int(PLAYER_POS.x // CHUNK_SIZE)
+        spawn_z = int(PLAYER_POS.z // CHUNK_SIZE)
+        x0, x1 = max(spawn_x - STARTUP_RADIUS, 0), spawn_x + STARTUP_RADIUS + 1
+        z0, z1 = max(spawn_z - STARTUP_RADIUS, 0), spawn_z + STARTUP_RADIUS + 1
+        area = self.chunk_stage.reshape(WORLD_H, WORLD_D, WORLD_W)[:, z0:z1, x0:x1]
+
+        self.update_priorities()
+        while np.any(area < UPLOAD) and self.advance():
+            pass
+
+    def load_all(self):
+        self.update_priorities()
+        while self.step():
+            pass
+
+    def update(self):
+        deadline = time.perf_counter() + CHUNK_LOAD_BUDGET * 0.001
+        self.update_priorities()
+        while self.step() and time.perf_counter() < deadline:
+            pass
+
+    def step(self):
+        """
+        Run one pipeline stage, or a deferred task once no stage is ready.
+        Returns False when there is nothing left.
+        """
+        if self.advance():
+            return True
+        if self.tasks:
+            self.tasks.popleft()()
+            return True
+        return False
+
+    def update_priorities(self):
+        # distance to the camera in chunks, plus a penalty outside the frustum
+        player = self.world.app.player
+        cam_pos = np.array(player.get_camera_position(), dtype="float32")
+
+        def get_priority(bounds_min, bounds_max):
+            closest = np.clip(cam_pos, bounds_min, bounds_max)
+            dist = np.linalg.norm(closest - cam_pos, axis=1) / CHUNK_SIZE
+            in_view = np.zeros(len(bounds_min), dtype=bool)
+            in_view[player.frustum.cull_chunks(bounds_min, bounds_max, True)] = True
+            return dist + ~in_view * CHUNK_OFF_SCREEN_PENALTY
+
+        self.column_priority = get_priority(
+            self.column_bounds_min, self.column_bounds_max
+        )
+        chunk_min = self.world.chunk_centers - CHUNK_SIZE * 0.5
+        self.chunk_priority = get_priority(chunk_min, chunk_min + CHUNK_SIZE)
+
+    def get_ready(self):
+        """
+        Boolean masks of the columns and the chunks whose next stage can run.
+        """
+        around = get_neighbour_min(self.column_stage.reshape(WORLD_D, WORLD_W))
+        around = around.ravel()
+
+        next_stage = self.column_stage + 1
+        column_ready = (self.column_stage < LIGHT) & (
+            around >= REQUIRED_AROUND[next_stage]
+        )
+        column_ready &= self.generates_terrain
+
+        chunk_ready = (self.chunk_stage == MESH) | (
+            (self.chunk_stage == 0) & (around[CHUNK_COLUMNS] >= LIGHT)
+        )
+        return column_ready, chunk_ready
+
+    def get_queue_depths(self):
+        # number of columns or chunks ready for each stage
+        column_ready, chunk_ready = self.get_ready()
+        column_next = self.column_stage[column_ready] + 1
+        chunk_next = self.chunk_stage[chunk_ready] + 1
+        counts = np.bincount(column_next, minlength=UPLOAD + 1)
+        counts += np.bincount(chunk_next, minlength=UPLOAD + 1)
+        return {name: int(counts[stage]) for stage, name in STAGE_NAMES.items()}
+
+    def get_stage_times(self):
+        # stage name -> (mean, max execution ms, mean latency ms)
+        times = {}
+        for stage, name in STAGE_NAMES.items():
+            count = max(self.stage_counts[stage], 1)
+            times[name] = (
+                self.stage_time[stage] * 1000 / count,
+                self.stage_max_time[stage] * 1000,
+                self.stage_latency[stage] * 1000 / count,
+            )
+        return times
+
+    def advance(self):
+        """
+        Run the next stage of the most urgent ready column or chunk, later
+        stages first among equals. Returns False if nothing is ready.
+        """
+        column_ready, chunk_ready = self.get_ready()
+        best = None
+        for is_column, ready, priority, stage in (
+            (True, column_ready, self.column_priority, self.column_stage),
+            (False, chunk_ready, self.chunk_priority, self.chunk_stage),
+        ):
+            indices = np.flatnonzero(ready)
+            if not len(indices):
+                continue
+            # a tenth of a chunk of distance per stage
+            scores = priority[indices] - stage[indices] * 0.1
+            i = np.argmin(scores)
+            if best is None or scores[i] < best[0]:
+                best = scores[i], is_column, int(indices[i])
+
+        if best is None:
+            return False
+        _, is_column, index = best
+        if is_column:
+            self.run_column_stage(index)
+        else:
+            self.run_chunk_stage(index)
+        return True
+
+    def add_stage_time(self, stage, start, done_time):
+        end = time.perf_counter()
+        self.stage_counts[stage] += 1
+        self.stage_time[stage] += end - start
+        self.stage_max_time[stage] = max(self.stage_max_time[stage], end - start)
+        self.stage_latency[stage] += end - done_time
+        return end
+
+    def run_column_stage(self, column):
+        world = self.world
+        x, z = column % WORLD_W, column // WORLD_W
+        cx, cz = x * CHUNK_SIZE, z * CHUNK_SIZE
+        chunk_indices = column + WORLD_AREA * np.arange(WORLD_H)
+        stage = self.column_stage[column] + 1
+
+        start = time.perf_counter()
+        with world.app.profiler.zone(STAGE_NAMES[stage]):
+            if stage == HEIGHTMAP and world.is_column_stored(x, z):
+                # voxels and light are already in the world file
+                for chunk_index in chunk_indices:
+                    world.chunks[chunk_index].update_bounds()
+                self.is_generated[chunk_indices] = True
+                stage = LIGHT
+            elif stage == HEIGHTMAP:
+                self.heightmaps[column] = get_heightmap(cx, cz)
+            elif stage == TERRAIN:
+                heightmap = self.heightmaps[column]
+                for y, chunk_index in enumerate(chunk_indices):
+                    fill_terrain(
+                        world.voxels[chunk_index], cx, y * CHUNK_SIZE, cz, heightmap
+                    )
+            elif stage == DECORATION:
+                heightmap = self.heightmaps.pop(column)
+                for y, chunk_index in enumerate(chunk_indices):
+                    decorate(world.voxels[chunk_index], y * CHUNK_SIZE, heightmap)
+                    world.chunks[chunk_index].update_bounds()
+                self.is_generated[chunk_indices] = True
+            elif stage == LIGHT:
+                world.light_column(x, z)
+
+        end = self.add_stage_time(stage, start, self.column_done_time[column])
+        self.column_done_time[column] = end
+        self.column_stage[column] = stage
+        if stage == LIGHT:
+            self.chunk_done_time[chunk_indices] = end
+
+    def run_chunk_stage(self, chunk_index):
+        chunk = self.world.chunks[chunk_index]
+        stage = self.chunk_stage[chunk_index] + 1
+
+        start = time.perf_counter()
+        with self.world.app.profiler.zone(STAGE_NAMES[stage]):
+            if stage == MESH:
+                vertex_data = ChunkMesh.build_vertex_data(chunk).copy()
+                self.vertex_data[chunk_index] = vertex_data
+                # held until the upload, see ChunkMesh.get_vao
+                memory = self.world.app.memory
+                memory.set("mesh_scratch", chunk_index, cpu=vertex_data.nbytes)
+            else:
+                chunk.build_mesh(self.vertex_data.pop(chunk_index))
+                self.is_meshed[chunk_index] = True
+
+        done_time = self.chunk_done_time[chunk_index]
+        self.chunk_done_time[chunk_index] = self.add_stage_time(stage, start, done_time)
+        self.chunk_stage[chunk_index] = stage
+
+    def discard_mesh(self, chunk_index):
+        # voxels or light changed after the mesh stage, mesh the chunk again
+        if self.chunk_stage[chunk_index] == MESH:
+            del self.vertex_data[chunk_index]
+            self.world.app.memory.remove("mesh_scratch", chunk_index)
+            self.chunk_stage[chunk_index] = 0
+
+    def is_ground_loaded(self, position):
+        """
+        True once the chunk column under the position is generated and meshed,
+        or if the position is outside the world.
+        """
+        x, z = int(position.x // CHUNK_SIZE), int(position.z // CHUNK_SIZE)
+        if not (0 <= x < WORLD_W and 0 <= z < WORLD_D):
+            return True
+        column = [x + WORLD_W * z + WORLD_AREA * y for y in range(WORLD_H)]
+        return bool(np.all(self.is_meshed[column]))
+
+
+class RemoteChunkLoader(ChunkLoader):
+    """
+    Fills the world from a server's chunk stream (see server.py) instead of
+    generating it locally. A column enters the pipeline at the light stage
+    once all its chunks have arrived, meshing works as in ChunkLoader.
+    """
+
+    generates_terrain = False
+
+    def __init__(self, world, net):
+        super().__init__(world)
+        self.net = net
+        self.column = None
+
+    def load_initial(self):
+        # block until the ground under the spawn position has arrived
+        self.send_position(PLAYER_POS)
+        deadline = time.perf_counter() + NET_CONNECT_TIMEOUT
+        self.update_priorities()
+        while not self.is_ground_loaded(PLAYER_POS):
+            if time.perf_counter() > deadline:
+                raise TimeoutError("no chunks received from the server")
+            self.receive()
+            while self.advance():
+                pass
+            time.sleep(0.001)
+
+    def update(self):
+        self.send_position(self.world.app.player.position)
+        self.receive()
+        super().update()
+
+    def send_position(self, position):
+        # the server only needs to know when the player enters another column
+        column = int(position.x // CHUNK_SIZE), int(position.z // CHUNK_SIZE)
+        if column != self.column:
+            self.column = column
+            self.net.send_position(position)
+
+    def receive(self):
+        for event in self.net.poll():
+            if event[0] == "chunk":
+                _, chunk_index, voxels = event
+                chunk = self.world.chunks[chunk_index]
+                self.world.voxels[chunk_index] = voxels
+                chunk.update_bounds()
+                self.is_generated[chunk_index] = True
+
+                # light once the whole column has arrived
+                x, _, z = chunk.position
+                column = x + WORLD_W * z
+                chunk_indices = column + WORLD_AREA * np.arange(WORLD_H)
+                if np.all(self.is_generated[chunk_indices]):
+                    self.world.light_column(x, z)
+                    self.column_stage[column] = LIGHT
+                    self.chunk_done_time[chunk_indices] = time.perf_counter()
+            elif event[0] == "edit":
+                _, _, _, position, voxel_id = event
+                self.world.set_voxel_ids([position], voxel_id)
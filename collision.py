@@ -0,0 +1,101 @@
+from settings import *
+from meshes.chunk_mesh_builder import get_voxel_id_at
+
+# boxes that exactly touch a voxel face don't count as overlapping it
+EPS = 1e-5
+
+
+@njit
+def get_cell_range(lo, hi):
+    # integer cells overlapped by the open interval (lo, hi)
+    return int(math.floor(lo + EPS)), int(math.floor(hi - EPS))
+
+
+@njit
+def box_overlaps_solid(world_voxels, box_min, box_max):
+    """
+    True if any solid voxel intersects the box. Tests every overlapped cell,
+    so thin geometry between the box corners is not missed.
+    """
+    x0, x1 = get_cell_range(box_min[0], box_max[0])
+    y0, y1 = get_cell_range(box_min[1], box_max[1])
+    z0, z1 = get_cell_range(box_min[2], box_max[2])
+    for y in range(y0, y1 + 1):
+        for z in range(z0, z1 + 1):
+            for x in range(x0, x1 + 1):
+                if BLOCK_SOLID[get_voxel_id_at(world_voxels, x, y, z)]:
+                    return True
+    return False
+
+
+@njit
+def is_layer_solid(world_voxels, axis, cell, box_min, box_max):
+    # any solid voxel in the slab at `cell` along axis, across the box's other axes
+    a, b = (axis + 1) % 3, (axis + 2) % 3
+    a0, a1 = get_cell_range(box_min[a], box_max[a])
+    b0, b1 = get_cell_range(box_min[b], box_max[b])
+    for i in range(a0, a1 + 1):
+        for j in range(b0, b1 + 1):
+            if axis == 0:
+                voxel_id = get_voxel_id_at(world_voxels, cell, i, j)
+            elif axis == 1:
+                voxel_id = get_voxel_id_at(world_voxels, j, cell, i)
+            else:
+                voxel_id = get_voxel_id_at(world_voxels, i, j, cell)
+            if BLOCK_SOLID[voxel_id]:
+                return True
+    return False
+
+
+@njit
+def sweep_axis(world_voxels, box_min, box_max, axis, delta):
+    """
+    Distance the box can move along one axis (up to delta) before its leading
+    face hits a solid voxel layer.
+    """
+    if delta > 0:
+        face = box_max[axis]
+        first = int(math.floor(face - EPS)) + 1
+        last = int(math.floor(face + delta - EPS))
+        for cell in range(first, last + 1):
+            if is_layer_solid(world_voxels, axis, cell, box_min, box_max):
+                return max(cell - face, 0.0)
+    elif delta < 0:
+        face = box_min[axis]
+        first = int(math.floor(face + EPS)) - 1
+        last = int(math.floor(face + delta + EPS))
+        for cell in range(first, last - 1, -1):
+            if is_layer_solid(world_voxels, axis, cell, box_min, box_max):
+                return min(cell + 1 - face, 0.0)
+    return delta
+
+
+@njit
+def move_box(world_voxels, position, half_extents, delta):
+    """
+    Swept AABB vs voxel grid: moves a box (center position, half extents)
+    by delta, resolving the y, x and z axes in turn against the voxels it
+    overlaps. Returns the new position and per-axis collision flags.
+    """
+    pos = position.copy()
+    hits = np.zeros(3, dtype=np.bool_)
+    for axis in (1, 0, 2):
+        moved = sweep_axis(
+            world_voxels, pos - half_extents, pos + half_extents, axis, delta[axis]
+        )
+        hits[axis] = moved != delta[axis]
+        pos[axis] += moved
+    return pos, hits
+
+
+@njit
+def push_out_up(world_voxels, position, half_extents, max_dist):
+    """
+    Raise a box that overlaps terrain one voxel layer at a time until it is free.
+    """
+    pos = position.copy()
+    while pos[1] - position[1] <= max_dist:
+        if not box_overlaps_solid(world_voxels, pos - half_extents, pos + half_extents):
+            break
+        pos[1] = math.floor(pos[1] - half_extents[1] + EPS) + 1 + half_extents[1]
+    return pos
@@ -0,0 +1,220 @@
+from settings import *
+from collision import move_box
+
+# entity kinds and their box half extents
+MOB, ITEM = 0, 1
+ENTITY_HALF_EXTENTS = {
+    MOB: (0.3, 0.9, 0.3),
+    ITEM: (0.125, 0.125, 0.125),
+}
+
+ENTITY_GRAVITY = 28.0
+ENTITY_MAX_FALL_SPEED = 50.0
+MOB_SPEED = 2.0
+MOB_TURN_CHANCE = 0.02  # per tick
+ITEM_FRICTION = 6.0
+
+HASH_PRIMES = (73856093, 19349663, 83492791)
+
+
+@njit
+def integrate_entities(
+    world_voxels, positions, velocities, half_extents, kinds, on_ground, alive, dt
+):
+    """
+    One physics step for all entities: gravity, simple mob wandering,
+    item friction and swept voxel collision.
+    """
+    delta = np.empty(3)
+    for i in range(len(positions)):
+        if not alive[i]:
+            continue
+
+        vel = velocities[i]
+        if kinds[i] == MOB:
+            if on_ground[i] and np.random.random() < MOB_TURN_CHANCE:
+                angle = np.random.random() * 2.0 * math.pi
+                vel[0] = math.cos(angle) * MOB_SPEED
+                vel[2] = math.sin(angle) * MOB_SPEED
+        elif on_ground[i]:
+            damping = max(1.0 - ITEM_FRICTION * dt, 0.0)
+            vel[0] *= damping
+            vel[2] *= damping
+
+        vel[1] = max(vel[1] - ENTITY_GRAVITY * dt, -ENTITY_MAX_FALL_SPEED)
+
+        for axis in range(3):
+            delta[axis] = vel[axis] * dt
+        pos, hits = move_box(world_voxels, positions[i], half_extents[i], delta)
+        positions[i] = pos
+
+        on_ground[i] = hits[1] and vel[1] < 0
+        for axis in range(3):
+            if hits[axis]:
+                vel[axis] = 0.0
+
+
+@njit
+def get_cell_hash(cx, cy, cz, table_size):
+    h = (cx * HASH_PRIMES[0]) ^ (cy * HASH_PRIMES[1]) ^ (cz * HASH_PRIMES[2])
+    return h % table_size
+
+
+@njit
+def build_spatial_hash(positions, alive, cell_size, table_size):
+    """
+    Uniform-grid spatial hash built with a counting sort: the ids of the
+    entities in bucket b are sorted_ids[cell_start[b]:cell_start[b + 1]].
+    """
+    count = len(positions)
+    keys = np.full(count, -1, dtype=np.int64)
+    cell_start = np.zeros(table_size + 1, dtype=np.int32)
+
+    for i in range(count):
+        if not alive[i]:
+            continue
+        cx = int(math.floor(positions[i, 0] / cell_size))
+        cy = int(math.floor(positions[i, 1] / cell_size))
+        cz = int(math.floor(positions[i, 2] / cell_size))
+        keys[i] = get_cell_hash(cx, cy, cz, table_size)
+        cell_start[keys[i] + 1] += 1
+
+    for b in range(table_size):
+        cell_start[b + 1] += cell_start[b]
+
+    sorted_ids = np.empty(cell_start[table_size], dtype=np.int32)
+    fill = cell_start[:-1].copy()
+    for i in range(count):
+        if keys[i] >= 0:
+            sorted_ids[fill[keys[i]]] = i
+            fill[keys[i]] += 1
+
+    return cell_start, sorted_ids
+
+
+@njit
+def query_spatial_hash(
+    positions, cell_start, sorted_ids, cell_size, table_size, center, radius
+):
+    """
+    Ids of the entities within radius of center.
+    """
+    result = np.empty(len(sorted_ids), dtype=np.int32)
+    num_found = 0
+    radius_sq = radius * radius
+
+    lo = np.empty(3, dtype=np.int64)
+    hi = np.empty(3, dtype=np.int64)
+    for axis in range(3):
+        lo[axis] = int(math.floor((center[axis] - radius) / cell_size))
+        hi[axis] = int(math.floor((center[axis] + radius) / cell_size))
+
+    for cx in range(lo[0], hi[0] + 1):
+        for cy in range(lo[1], hi[1] + 1):
+            for cz in range(lo[2], hi[2] + 1):
+                bucket = get_cell_hash(cx, cy, cz, table_size)
+                for k in range(cell_start[bucket], cell_start[bucket + 1]):
+                    i = sorted_ids[k]
+                    pos = positions[i]
+                    # buckets are shared by hash collisions: keep only this cell
+                    if (
+                        int(math.floor(pos[0] / cell_size)) != cx
+                        or int(math.floor(pos[1] / cell_size)) != cy
+                        or int(math.floor(pos[2] / cell_size)) != cz
+                    ):
+                        continue
+                    dist_sq = (
+                        (pos[0] - center[0]) ** 2
+                        + (pos[1] - center[1]) ** 2
+                        + (pos[2] - center[2]) ** 2
+                    )
+                    if dist_sq <= radius_sq:
+                        result[num_found] = i
+                        num_found += 1
+
+    return result[:num_found]
+
+
+class EntitySystem:
+    """
+    Mobs and dropped items stored as struct-of-arrays. All entities are
+    integrated in one batched njit step per simulation tick, and a spatial
+    hash rebuilt every tick answers proximity queries.
+    """
+
+    def __init__(self, world, capacity=MAX_ENTITIES):
+        self.world = world
+        self.capacity = capacity
+
+        self.positions = np.zeros([capacity, 3], dtype="float64")
+        self.velocities = np.zeros([capacity, 3], dtype="float64")
+        self.half_extents = np.zeros([capacity, 3], dtype="float64")
+        self.kinds = np.zeros(capacity, dtype="uint8")
+        self.on_ground = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        # slots in use are [0, count); freed slots are reused first
+        self.count = 0
+        self.free_ids = []
+
+        self.table_size = 2 * capacity
+        self.cell_start = np.zeros(self.table_size + 1, dtype="int32")
+        self.sorted_ids = np.zeros(0, dtype="int32")
+
+    @property
+    def num_alive(self):
+        return int(np.count_nonzero(self.alive[: self.count]))
+
+    def spawn(self, kind, position, velocity=(0, 0, 0)):
+        if self.free_ids:
+            entity_id = self.free_ids.pop()
+        elif self.count < self.capacity:
+            entity_id = self.count
+            self.count += 1
+        else:
+            return -1
+
+        self.positions[entity_id] = position
+        self.velocities[entity_id] = velocity
+        self.half_extents[entity_id] = ENTITY_HALF_EXTENTS[kind]
+        self.kinds[entity_id] = kind
+        self.on_ground[entity_id] = False
+        self.alive[entity_id] = True
+        return entity_id
+
+    def despawn(self, entity_id):
+        if self.alive[entity_id]:
+            self.alive[entity_id] = False
+            self.free_ids.append(entity_id)
+
+    def tick(self, dt=SIM_DT):
+        if not self.count:
+            return
+        n = self.count
+        integrate_entities(
+            self.world.voxels,
+            self.positions[:n],
+            self.velocities[:n],
+            self.half_extents[:n],
+            self.kinds[:n],
+            self.on_ground[:n],
+            self.alive[:n],
+            dt,
+        )
+        self.cell_start, self.sorted_ids = build_spatial_hash(
+            self.positions[:n], self.alive[:n], ENTITY_CELL_SIZE, self.table_size
+        )
+
+    def query_radius(self, center, radius):
+        """
+        Ids of the entities within radius of center, as of the last tick.
+        """
+        return query_spatial_hash(
+            self.positions,
+            self.cell_start,
+            self.sorted_ids,
+            ENTITY_CELL_SIZE,
+            self.table_size,
+            np.asarray(center, dtype="float64"),
+            radius,
+        )
@@ -0,0 +1,65 @@
+import json
+from settings import *
+
+
+class FlythroughRecorder:
+    """
+    Records the camera pose once per frame so a flythrough
+    can be replayed by the benchmarks.
+    """
+
+    def __init__(self, camera):
+        self.camera = camera
+        self.frames = []
+        self.is_recording = False
+
+    def toggle(self, file_path=FLYTHROUGH_FILE):
+        if self.is_recording:
+            self.save(file_path)
+        else:
+            self.frames = []
+        self.is_recording = not self.is_recording
+
+    def update(self):
+        if self.is_recording:
+            x, y, z = self.camera.position
+            self.frames.append((x, y, z, self.camera.yaw, self.camera.pitch))
+
+    def save(self, file_path):
+        with open(file_path, "w") as file:
+            json.dump(self.frames, file)
+        print(f"Saved {len(self.frames)} flythrough frames to {file_path}")
+
+
+def load_path(file_path):
+    """
+    Returns a list of (x, y, z, yaw, pitch) frames, angles in radians.
+    """
+    with open(file_path) as file:
+        return [tuple(frame) for frame in json.load(file)]
+
+
+def get_scripted_path(num_frames=600):
+    """
+    Deterministic flythrough: one lap around the world center,
+    dipping from above the surface down into the cave layer and back.
+    """
+    radius = WORLD_W * CHUNK_SIZE * 0.3
+    frames = []
+    for i in range(num_frames):
+        angle = 2 * math.pi * i / num_frames
+        x = CENTER_XZ + radius * math.cos(angle)
+        z = CENTER_XZ + radius * math.sin(angle)
+        y = CHUNK_SIZE * (1.0 + 0.6 * math.cos(angle))
+        yaw = angle + math.pi * 0.5
+        pitch = -0.2 * math.cos(angle)
+        frames.append((x, y, z, yaw, pitch))
+    return frames
+
+
+def apply_frame(camera, frame):
+    x, y, z, yaw, pitch = frame
+    camera.teleport(glm.vec3(x, y, z))
+    camera.yaw, camera.pitch = yaw, pitch
+    camera.update_vectors()
+    camera.update_view_matrix()
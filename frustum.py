@@ -8,28 +8,50 @@ class Frustum:
         self.factor_y = 1.0 / math.cos(half_y := V_FOV * 0.5)
         self.tan_y = math.tan(half_y)
 
-        self.factor_x = 1.0 / math.cos(half_x := H_FOV * 0.5)
+        # horizontal FOV of the camera's aspect ratio, H_FOV is for WIN_RES
+        half_x = math.atan(self.tan_y * camera.aspect_ratio)
+        self.factor_x = 1.0 / math.cos(half_x)
         self.tan_x = math.tan(half_x)
 
-    def is_on_frustum(self, chunk):
-        # vector to sphere center
-        sphere_vec = chunk.center - self.cam.position
-
-        # outside the NEAR and FAR planes?
-        sz = glm.dot(sphere_vec, self.cam.forward)
-        if not (NEAR - CHUNK_SPHERE_RADIUS <= sz <= FAR + CHUNK_SPHERE_RADIUS):
-            return False
-
-        # outside the TOP and BOTTOM planes?
-        sy = glm.dot(sphere_vec, self.cam.up)
-        dist = self.factor_y * CHUNK_SPHERE_RADIUS + sz * self.tan_y
-        if not (-dist <= sy <= dist):
-            return False
-
-        # outside the LEFT and RIGHT planes?
-        sx = glm.dot(sphere_vec, self.cam.right)
-        dist = self.factor_x * CHUNK_SPHERE_RADIUS + sz * self.tan_x
-        if not (-dist <= sx <= dist):
-            return False
-
-        return True
+    def get_planes(self):
+        """
+        Frustum planes as rows of (nx, ny, nz, d) with inward facing normals,
+        so a point p is inside a plane when dot(n, p) + d >= 0.
+        """
+        pos = np.array(self.cam.get_camera_position(), dtype="float64")
+        forward = np.array(self.cam.forward, dtype="float64")
+        right = np.array(self.cam.right, dtype="float64")
+        up = np.array(self.cam.up, dtype="float64")
+
+        normals = np.array(
+            [
+                forward,  # near
+                -forward,  # far
+                (self.tan_x * forward - right) / self.factor_x,  # right
+                (self.tan_x * forward + right) / self.factor_x,  # left
+                (self.tan_y * forward - up) / self.factor_y,  # top
+                (self.tan_y * forward + up) / self.factor_y,  # bottom
+            ]
+        )
+        d = -normals @ pos
+        d[0] -= NEAR
+        d[1] += FAR
+        return np.column_stack([normals, d])
+
+    def cull_chunks(self, bounds_min, bounds_max, candidates):
+        """
+        Test the AABBs of all chunks against the frustum in one vectorized pass.
+        Returns the indices of the candidate chunks that may be visible.
+        """
+        planes = self.get_planes()
+        normals, d = planes[:, :3], planes[:, 3]
+
+        centers = (bounds_min + bounds_max) * 0.5
+        extents = (bounds_max - bounds_min) * 0.5
+
+        # signed distance of the box centers and the projected box radius per plane
+        dist = centers @ normals.T + d
+        radius = extents @ np.abs(normals).T
+
+        inside = np.all(dist >= -radius, axis=1) & candidates
+        return np.flatnonzero(inside)
@@ -0,0 +1,371 @@
+from settings import *
+import moderngl as mgl
+import pygame as pg
+
+# texture unit reserved for the GUI icon atlas
+GUI_TEXTURE_UNIT = 4
+
+HOTBAR_BLOCKS = [SAND, GRASS, DIRT, STONE, SNOW, LEAVES, WOOD, GREEN_LEAF, LAMP, WATER]
+ICON_FILES = {
+    SAND: "sand.png",
+    GRASS: "grass.png",
+    DIRT: "dirt.png",
+    STONE: "stone.png",
+    SNOW: "snow.png",
+    LEAVES: "leaves.png",
+    WOOD: "wood.png",
+    GREEN_LEAF: "green_leaf.png",
+}
+
+
+class QuadBatch:
+    """
+    Retained batch of 2D quads for the gui2d program: the quads are built
+    into one vertex buffer and drawn with a single call.
+    """
+
+    # x, y, u, v, r, g, b, a, use_texture
+    VERTEX_SIZE = 9
+
+    def __init__(self, ctx, program):
+        self.ctx = ctx
+        self.program = program
+        self.vertices = []
+        self.num_vertices = 0
+        self.vbo = None
+        self.vao = None
+
+    def begin(self):
+        self.vertices = []
+
+    def add_quad(self, x, y, w, h, color, uv=None):
+        """
+        uv: (u0, v0, u1, v1) of the texture region, or None for a flat colored quad
+        """
+        u0, v0, u1, v1 = uv if uv else (0.0, 0.0, 0.0, 0.0)
+        use_texture = 1.0 if uv else 0.0
+        corners = (
+            (x, y, u0, v1),  # bottom-left
+            (x + w, y, u1, v1),  # bottom-right
+            (x + w, y + h, u1, v0),  # top-right
+            (x, y + h, u0, v0),  # top-left
+        )
+        for i in (0, 1, 2, 0, 2, 3):
+            self.vertices.extend((*corners[i], *color, use_texture))
+
+    def upload(self):
+        vertex_data = np.array(self.vertices, dtype="f4")
+        self.num_vertices = len(vertex_data) // self.VERTEX_SIZE
+
+        if self.vbo is not None and vertex_data.nbytes <= self.vbo.size:
+            self.vbo.orphan()
+            self.vbo.write(vertex_data)
+            return
+
+        self.release()
+        self.vbo = self.ctx.buffer(vertex_data, dynamic=True)
+        self.vao = self.ctx.vertex_array(
+            self.program,
+            [(self.vbo, "2f 2f 4f 1f", "in_pos", "in_tex", "in_color", "in_use_texture")],
+        )
+
+    def release(self):
+        if self.vao is not None:
+            self.vao.release()
+            self.vao = None
+        if self.vbo is not None:
+            self.vbo.release()
+            self.vbo = None
+
+    def render(self):
+        if self.num_vertices:
+            self.vao.render(mode=mgl.TRIANGLES, vertices=self.num_vertices)
+
+
+class IconAtlas:
+    """
+    Packs the block icons into a single row texture so the hotbar needs one bind.
+    Blocks without an icon file (lamp, water) use a face of their texture.
+    """
+
+    CELL_SIZE = 128
+
+    def __init__(self, ctx, block_types, textures):
+        self.ctx = ctx
+        self.textures = textures
+        self.uvs = {}
+
+        num_icons = len(block_types)
+        atlas = pg.Surface((self.CELL_SIZE * num_icons, self.CELL_SIZE), pg.SRCALPHA)
+
+        for i, block_type in enumerate(block_types):
+            atlas.blit(self.load_icon(block_type), (i * self.CELL_SIZE, 0))
+            self.uvs[block_type] = (i / num_icons, 0.0, (i + 1) / num_icons, 1.0)
+
+        self.texture = self.ctx.texture(
+            atlas.get_size(), 4, pg.image.tostring(atlas, "RGBA", False)
+        )
+        self.texture.build_mipmaps()
+        self.texture.filter = (mgl.LINEAR_MIPMAP_LINEAR, mgl.LINEAR)
+
+    def load_icon(self, block_type):
+        try:
+            if block_type in ICON_FILES:
+                surf = pg.image.load(f"assets/icons/{ICON_FILES[block_type]}")
+            else:
+                surf = self.textures.get_block_face(block_type)
+        except Exception as e:
+            print("Failed to load icon:", e)
+            surf = pg.Surface((self.CELL_SIZE, self.CELL_SIZE), pg.SRCALPHA)
+
+        # copy into a 32-bit surface so palette images can be smoothscaled
+        icon = pg.Surface(surf.get_size(), pg.SRCALPHA)
+        icon.blit(pg.transform.flip(surf, True, False), (0, 0))
+        return pg.transform.smoothscale(icon, (self.CELL_SIZE, self.CELL_SIZE))
+
+    def release(self):
+        self.texture.release()
+
+
+class Hotbar:
+    ICON_SIZE = 64 * 1.5
+    GAP = 10
+    BORDER_COLOR = (0.3, 0.3, 0.3, 1.0)
+    BORDER_THICKNESS = 12.0
+    OUTER_PAD = 5.0
+    BG_COLOR = (0.5, 0.5, 0.5, 1.0)
+    HIGHLIGHT_COLOR = (1.0, 1.0, 1.0, 0.3)
+    HIGHLIGHT_PAD = 5.0
+    ICON_BORDER_COLOR = (0.2, 0.2, 0.2, 1.0)
+    ICON_BORDER_THICKNESS = 2.0
+
+    def __init__(self, app):
+        self.app = app
+        self.ctx = app.ctx
+        self.program = app.shader_program.gui2d
+        self.program["u_texture"] = GUI_TEXTURE_UNIT
+
+        self.atlas = IconAtlas(self.ctx, HOTBAR_BLOCKS, app.textures)
+        self.batch = QuadBatch(self.ctx, self.program)
+
+        # (selected block, screen size) the batch was last built for
+        self.state = None
+
+    def update(self):
+        voxel_handler = self.app.scene.world.voxel_handler
+        state = (voxel_handler.new_voxel_id, self.app.get_window_size())
+        if state != self.state:
+            self.state = state
+            self.build(*state)
+
+    def build(self, selected_block, screen_size):
+        screen_w, screen_h = screen_size
+        self.program["u_proj"].write(glm.ortho(0, screen_w, 0, screen_h, -1, 1))
+
+        icon_size, gap = self.ICON_SIZE, self.GAP
+        hotbar_width = len(HOTBAR_BLOCKS) * (icon_size + gap) + gap
+        hotbar_height = icon_size + gap * 2
+        hotbar_x = (screen_w - hotbar_width) // 2
+        hotbar_y = 30
+
+        batch = self.batch
+        batch.begin()
+
+        # dark grey outer border and lighter grey background
+        pad = self.OUTER_PAD + self.BORDER_THICKNESS
+        batch.add_quad(
+            hotbar_x - pad,
+            hotbar_y - pad,
+            hotbar_width + pad * 2,
+            hotbar_height + pad * 2,
+            self.BORDER_COLOR,
+        )
+        pad = self.OUTER_PAD
+        batch.add_quad(
+            hotbar_x - pad,
+            hotbar_y - pad,
+            hotbar_width + pad * 2,
+            hotbar_height + pad * 2,
+            self.BG_COLOR,
+        )
+
+        # icons plus selection highlight and per-icon border
+        x, y = hotbar_x + gap, hotbar_y + gap
+        for block_type in HOTBAR_BLOCKS:
+            if block_type == selected_block:
+                pad = self.HIGHLIGHT_PAD
+                batch.add_quad(
+                    x - pad,
+                    y - pad,
+                    icon_size + pad * 2,
+                    icon_size + pad * 2,
+                    self.HIGHLIGHT_COLOR,
+                )
+
+            pad = self.ICON_BORDER_THICKNESS
+            batch.add_quad(
+                x - pad,
+                y - pad,
+                icon_size + pad * 2,
+                icon_size + pad * 2,
+                self.ICON_BORDER_COLOR,
+            )
+            batch.add_quad(
+                x,
+                y,
+                icon_size,
+                icon_size,
+                (1.0, 1.0, 1.0, 1.0),
+                uv=self.atlas.uvs[block_type],
+            )
+            x += icon_size + gap
+
+        batch.upload()
+
+    def render(self):
+        self.ctx.disable(mgl.DEPTH_TEST)
+        self.atlas.texture.use(location=GUI_TEXTURE_UNIT)
+        self.batch.render()
+        self.ctx.enable(mgl.DEPTH_TEST)
+        self.app.render_stats.add_draw(self.batch.num_vertices)
+
+    def release(self):
+        self.batch.release()
+        self.atlas.release()
+
+
+class PerfHud:
+    """
+    Debug overlay (F3): the frame time history as a bar graph and the render
+    counters of the last frame as text. The text is rasterized with pygame
+    into a texture a few times per second, the graph is rebuilt every frame.
+    """
+
+    MARGIN = 10.0
+    PAD = 6.0
+    BAR_WIDTH = 2.0
+    GRAPH_HEIGHT = 100.0
+    GRAPH_MAX_MS = 50.0
+    SLOW_FRAME_MS = 1000.0 / 60
+    BG_COLOR = (0.0, 0.0, 0.0, 0.6)
+    BAR_COLOR = (0.3, 0.9, 0.3, 0.9)
+    SLOW_BAR_COLOR = (0.9, 0.3, 0.3, 0.9)
+    TEXT_COLOR = (1.0, 1.0, 1.0, 1.0)
+    FONT_SIZE = 22
+    TEXT_INTERVAL = 0.25  # seconds between text updates
+
+    def __init__(self, app):
+        self.app = app
+        self.ctx = app.ctx
+        self.program = app.shader_program.gui2d
+        self.batch = QuadBatch(self.ctx, self.program)
+        self.font = pg.font.Font(None, self.FONT_SIZE)
+
+        self.text_texture = None
+        self.text_time = -self.TEXT_INTERVAL
+        self.is_visible = False
+
+    def toggle(self):
+        self.is_visible = not self.is_visible
+        # redraw the text right away
+        self.text_time = -self.TEXT_INTERVAL
+
+    def get_lines(self):
+        stats = self.app.render_stats
+        queue_depths = self.app.scene.world.loader.get_queue_depths()
+        frame_times = stats.get_frame_times()
+        if len(frame_times):
+            mean, worst = np.mean(frame_times), np.max(frame_times)
+        else:
+            mean = worst = 0.0
+        return [
+            f"frame {mean:.1f} ms avg, {worst:.1f} ms max",
+            f"chunks {stats.chunks_considered} considered,"
+            f" {stats.chunks_frustum_visible} in frustum, {stats.chunks_drawn} drawn",
+            f"vertices {stats.vertices}  draw calls {stats.draw_calls}"
+            f"  uniform writes {stats.uniform_writes}",
+            f"pending meshes {stats.pending_meshes}",
+            "ready " + " ".join(f"{k} {n}" for k, n in queue_depths.items() if n),
+        ]
+
+    def update_text(self):
+        color = [int(c * 255) for c in self.TEXT_COLOR]
+        lines = [self.font.render(line, True, color) for line in self.get_lines()]
+        width = max(line.get_width() for line in lines)
+        height = sum(line.get_height() for line in lines)
+
+        surface = pg.Surface((width, height), pg.SRCALPHA)
+        y = 0
+        for line in lines:
+            surface.blit(line, (0, y))
+            y += line.get_height()
+
+        data = pg.image.tostring(surface, "RGBA", False)
+        if self.text_texture is not None and self.text_texture.size == (width, height):
+            self.text_texture.write(data)
+            return
+        if self.text_texture is not None:
+            self.text_texture.release()
+        self.text_texture = self.ctx.texture((width, height), 4, data)
+
+    def update(self):
+        if not self.is_visible:
+            return
+        if self.app.time - self.text_time >= self.TEXT_INTERVAL:
+            self.text_time = self.app.time
+            self.update_text()
+        self.build(self.app.get_window_size())
+
+    def build(self, screen_size):
+        screen_w, screen_h = screen_size
+        self.program["u_proj"].write(glm.ortho(0, screen_w, 0, screen_h, -1, 1))
+
+        frame_times = self.app.render_stats.get_frame_times()
+        text_w, text_h = self.text_texture.size
+        graph_w = HUD_FRAME_HISTORY * self.BAR_WIDTH
+        x = self.MARGIN + self.PAD
+        graph_y = screen_h - self.MARGIN - self.PAD - self.GRAPH_HEIGHT
+        text_y = graph_y - self.PAD - text_h
+
+        batch = self.batch
+        batch.begin()
+        batch.add_quad(
+            self.MARGIN,
+            text_y - self.PAD,
+            max(graph_w, text_w) + self.PAD * 2,
+            screen_h - self.MARGIN - text_y + self.PAD,
+            self.BG_COLOR,
+        )
+
+        # newest frame on the right
+        bar_x = x + graph_w - len(frame_times) * self.BAR_WIDTH
+        scale = self.GRAPH_HEIGHT / self.GRAPH_MAX_MS
+        for frame_time in frame_times:
+            is_slow = frame_time > self.SLOW_FRAME_MS
+            batch.add_quad(
+                bar_x,
+                graph_y,
+                self.BAR_WIDTH,
+                min(frame_time * scale, self.GRAPH_HEIGHT),
+                self.SLOW_BAR_COLOR if is_slow else self.BAR_COLOR,
+            )
+            bar_x += self.BAR_WIDTH
+
+        batch.add_quad(
+            x, text_y, text_w, text_h, (1.0, 1.0, 1.0, 1.0), uv=(0.0, 0.0, 1.0, 1.0)
+        )
+        batch.upload()
+
+    def render(self):
+        if not self.is_visible:
+            return
+        self.ctx.disable(mgl.DEPTH_TEST)
+        self.text_texture.use(location=GUI_TEXTURE_UNIT)
+        self.batch.render()
+        self.ctx.enable(mgl.DEPTH_TEST)
+        self.app.render_stats.add_draw(self.batch.num_vertices)
+
+    def release(self):
+        self.batch.release()
+        if self.text_texture is not None:
+            self.text_texture.release()
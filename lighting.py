@@ -0,0 +1,288 @@
+from settings import *
+from voxel_query import mark_neighbours
+
+# light is stored per voxel in World.light: sky light in the high nibble,
+# block light in the low nibble
+SKY_SHIFT, BLOCK_SHIFT = 4, 0
+
+WORLD_SIZE_X = WORLD_W * CHUNK_SIZE
+WORLD_SIZE_Y = WORLD_H * CHUNK_SIZE
+WORLD_SIZE_Z = WORLD_D * CHUNK_SIZE
+
+# (dx, dy, dz) of the 6 face neighbours, DOWN is the index of (0, -1, 0)
+NEIGHBOURS = np.array(
+    [[0, 1, 0], [0, -1, 0], [1, 0, 0], [-1, 0, 0], [0, 0, -1], [0, 0, 1]]
+)
+DOWN = 1
+
+QUEUE_SIZE = 1 << 16
+
+
+@njit
+def encode_pos(wx, wy, wz):
+    return (wy * WORLD_SIZE_Z + wz) * WORLD_SIZE_X + wx
+
+
+@njit
+def decode_pos(pos):
+    wx = pos % WORLD_SIZE_X
+    wz = pos // WORLD_SIZE_X % WORLD_SIZE_Z
+    wy = pos // (WORLD_SIZE_X * WORLD_SIZE_Z)
+    return wx, wy, wz
+
+
+@njit
+def is_in_world(wx, wy, wz):
+    return (
+        0 <= wx < WORLD_SIZE_X and 0 <= wy < WORLD_SIZE_Y and 0 <= wz < WORLD_SIZE_Z
+    )
+
+
+@njit
+def get_indices(wx, wy, wz):
+    cx, cy, cz = wx // CHUNK_SIZE, wy // CHUNK_SIZE, wz // CHUNK_SIZE
+    lx, ly, lz = wx - cx * CHUNK_SIZE, wy - cy * CHUNK_SIZE, wz - cz * CHUNK_SIZE
+    return cx + WORLD_W * cz + WORLD_AREA * cy, lx + CHUNK_SIZE * lz + CHUNK_AREA * ly
+
+
+@njit
+def get_level(light, chunk_index, voxel_index, shift):
+    return (light[chunk_index, voxel_index] >> shift) & MAX_LIGHT
+
+
+@njit
+def set_level(light, chunk_index, voxel_index, shift, level):
+    keep = light[chunk_index, voxel_index] & (0xF0 >> shift)
+    light[chunk_index, voxel_index] = keep | (level << shift)
+
+
+@njit
+def mark_changed(remesh, wx, wy, wz):
+    cx, cy, cz = wx // CHUNK_SIZE, wy // CHUNK_SIZE, wz // CHUNK_SIZE
+    mark_neighbours(
+        remesh,
+        cx,
+        cy,
+        cz,
+        wx - cx * CHUNK_SIZE,
+        wy - cy * CHUNK_SIZE,
+        wz - cz * CHUNK_SIZE,
+    )
+
+
+@njit
+def push(queue, tail, value):
+    if tail == len(queue):
+        grown = np.empty(2 * len(queue), dtype=queue.dtype)
+        grown[:tail] = queue
+        queue = grown
+    queue[tail] = value
+    return queue, tail + 1
+
+
+@njit
+def propagate_increase(world_voxels, light, is_generated, queue, tail, shift, remesh):
+    """
+    Spread light outward from the queued voxels. Each step loses one level,
+    except full sky light which travels straight down unchanged.
+    """
+    head = 0
+    while head < tail:
+        wx, wy, wz = decode_pos(queue[head])
+        head += 1
+        chunk_index, voxel_index = get_indices(wx, wy, wz)
+        level = get_level(light, chunk_index, voxel_index, shift)
+        if level <= 1:
+            continue
+
+        for d in range(6):
+            nx = wx + NEIGHBOURS[d, 0]
+            ny = wy + NEIGHBOURS[d, 1]
+            nz = wz + NEIGHBOURS[d, 2]
+            if not is_in_world(nx, ny, nz):
+                continue
+            n_chunk, n_voxel = get_indices(nx, ny, nz)
+            if not is_generated[n_chunk]:
+                continue
+            if BLOCK_SOLID[world_voxels[n_chunk, n_voxel]]:
+                continue
+
+            new_level = level - 1
+            if shift == SKY_SHIFT and d == DOWN and level == MAX_LIGHT:
+                new_level = MAX_LIGHT
+            if get_level(light, n_chunk, n_voxel, shift) >= new_level:
+                continue
+
+            set_level(light, n_chunk, n_voxel, shift, new_level)
+            mark_changed(remesh, nx, ny, nz)
+            queue, tail = push(queue, tail, encode_pos(nx, ny, nz))
+
+
+@njit
+def propagate_decrease(
+    world_voxels, light, is_generated, rem_queue, rem_tail, queue, tail, shift, remesh
+):
+    """
+    Remove the light that came from the queued (position, old level) entries.
+    Voxels lit by other sources are queued for propagate_increase to refill.
+    """
+    head = 0
+    while head < rem_tail:
+        entry = rem_queue[head]
+        head += 1
+        wx, wy, wz = decode_pos(entry >> 4)
+        level = entry & MAX_LIGHT
+
+        for d in range(6):
+            nx = wx + NEIGHBOURS[d, 0]
+            ny = wy + NEIGHBOURS[d, 1]
+            nz = wz + NEIGHBOURS[d, 2]
+            if not is_in_world(nx, ny, nz):
+                continue
+            n_chunk, n_voxel = get_indices(nx, ny, nz)
+            if not is_generated[n_chunk]:
+                continue
+            n_level = get_level(light, n_chunk, n_voxel, shift)
+            if not n_level:
+                continue
+
+            n_pos = encode_pos(nx, ny, nz)
+            is_sky_column = shift == SKY_SHIFT and d == DOWN and level == MAX_LIGHT
+            if n_level < level or is_sky_column:
+                set_level(light, n_chunk, n_voxel, shift, 0)
+                mark_changed(remesh, nx, ny, nz)
+                rem_queue, rem_tail = push(rem_queue, rem_tail, n_pos << 4 | n_level)
+
+                # light sources keep their own light
+                emission = BLOCK_EMISSION[world_voxels[n_chunk, n_voxel]]
+                if shift == BLOCK_SHIFT and emission:
+                    set_level(light, n_chunk, n_voxel, shift, emission)
+                    queue, tail = push(queue, tail, n_pos)
+            else:
+                queue, tail = push(queue, tail, n_pos)
+
+    return queue, tail
+
+
+@njit
+def light_column(world_voxels, light, is_generated, x, z):
+    """
+    Initial light of a freshly generated chunk column: sky light down to the
+    first solid voxel, emissive blocks, and light flowing in from the already
+    generated neighbour columns, all spread with one BFS per channel.
+    """
+    remesh = np.zeros(WORLD_VOL, dtype=np.bool_)
+    x0, z0 = x * CHUNK_SIZE, z * CHUNK_SIZE
+
+    for shift in (SKY_SHIFT, BLOCK_SHIFT):
+        queue = np.empty(QUEUE_SIZE, dtype=np.int64)
+        tail = 0
+
+        for wx in range(x0, x0 + CHUNK_SIZE):
+            for wz in range(z0, z0 + CHUNK_SIZE):
+                is_open_sky = shift == SKY_SHIFT
+                for wy in range(WORLD_SIZE_Y - 1, -1, -1):
+                    chunk_index, voxel_index = get_indices(wx, wy, wz)
+                    voxel_id = world_voxels[chunk_index, voxel_index]
+                    if BLOCK_SOLID[voxel_id]:
+                        is_open_sky = False
+                        emission = BLOCK_EMISSION[voxel_id]
+                        if shift == BLOCK_SHIFT and emission:
+                            set_level(light, chunk_index, voxel_index, shift, emission)
+                            queue, tail = push(queue, tail, encode_pos(wx, wy, wz))
+                    elif is_open_sky:
+                        set_level(light, chunk_index, voxel_index, shift, MAX_LIGHT)
+                        queue, tail = push(queue, tail, encode_pos(wx, wy, wz))
+
+        # lit voxels just outside the column shine into it
+        for i in range(CHUNK_SIZE):
+            for wy in range(WORLD_SIZE_Y):
+                for nx, nz in (
+                    (x0 - 1, z0 + i),
+                    (x0 + CHUNK_SIZE, z0 + i),
+                    (x0 + i, z0 - 1),
+                    (x0 + i, z0 + CHUNK_SIZE),
+                ):
+                    if not is_in_world(nx, wy, nz):
+                        continue
+                    chunk_index, voxel_index = get_indices(nx, wy, nz)
+                    if is_generated[chunk_index] and get_level(
+                        light, chunk_index, voxel_index, shift
+                    ):
+                        queue, tail = push(queue, tail, encode_pos(nx, wy, nz))
+
+        propagate_increase(
+            world_voxels, light, is_generated, queue, tail, shift, remesh
+        )
+
+
+@njit
+def update_light(world_voxels, light, is_generated, positions, old_ids):
+    """
+    Incrementally relight after the voxels at (N, 3) world positions changed
+    from old_ids to their current ids. Only the region reached by the added
+    or removed light is touched. Returns the mask of chunks to remesh.
+    """
+    remesh = np.zeros(WORLD_VOL, dtype=np.bool_)
+
+    for shift in (SKY_SHIFT, BLOCK_SHIFT):
+        rem_queue = np.empty(QUEUE_SIZE, dtype=np.int64)
+        queue = np.empty(QUEUE_SIZE, dtype=np.int64)
+        rem_tail, tail = 0, 0
+
+        for i in range(len(positions)):
+            wx, wy, wz = positions[i, 0], positions[i, 1], positions[i, 2]
+            if not is_in_world(wx, wy, wz):
+                continue
+            chunk_index, voxel_index = get_indices(wx, wy, wz)
+            voxel_id, old_id = world_voxels[chunk_index, voxel_index], old_ids[i]
+            # e.g. water flowing into air doesn't change the light
+            if (
+                BLOCK_SOLID[voxel_id] == BLOCK_SOLID[old_id]
+                and BLOCK_EMISSION[voxel_id] == BLOCK_EMISSION[old_id]
+            ):
+                continue
+            pos = encode_pos(wx, wy, wz)
+
+            # the old light here is gone, whatever it came from
+            level = get_level(light, chunk_index, voxel_index, shift)
+            if level:
+                set_level(light, chunk_index, voxel_index, shift, 0)
+                mark_changed(remesh, wx, wy, wz)
+                rem_queue, rem_tail = push(rem_queue, rem_tail, pos << 4 | level)
+
+            emission = BLOCK_EMISSION[voxel_id]
+            if shift == BLOCK_SHIFT and emission:
+                set_level(light, chunk_index, voxel_index, shift, emission)
+                mark_changed(remesh, wx, wy, wz)
+                queue, tail = push(queue, tail, pos)
+
+            # an opened voxel is refilled from its neighbours
+            if not BLOCK_SOLID[voxel_id]:
+                for d in range(6):
+                    nx = wx + NEIGHBOURS[d, 0]
+                    ny = wy + NEIGHBOURS[d, 1]
+                    nz = wz + NEIGHBOURS[d, 2]
+                    if is_in_world(nx, ny, nz):
+                        queue, tail = push(queue, tail, encode_pos(nx, ny, nz))
+                # open sky above: sunlight falls straight in
+                if shift == SKY_SHIFT and wy == WORLD_SIZE_Y - 1:
+                    set_level(light, chunk_index, voxel_index, shift, MAX_LIGHT)
+                    queue, tail = push(queue, tail, pos)
+
+        queue, tail = propagate_decrease(
+            world_voxels,
+            light,
+            is_generated,
+            rem_queue,
+            rem_tail,
+            queue,
+            tail,
+            shift,
+            remesh,
+        )
+        propagate_increase(
+            world_voxels, light, is_generated, queue, tail, shift, remesh
+        )
+
+    return remesh
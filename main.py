@@ -2,27 +2,33 @@ from settings import *
 import moderngl as mgl
 import pygame as pg
 import sys
-import struct
+import argparse
 from shader_program import ShaderProgram
 from scene import Scene
 from player import Player
 from textures import Textures
-from gui_quad import create_2d_quad
+from gui_renderer import Hotbar, PerfHud
+from meshes.buffer_manager import BufferManager
+from render_stats import RenderStats
+from memory import MemoryRegistry
+from profiler import Profiler, GpuTimer
+from net import NetClient
 
 
 class VoxelEngine:
-    def __init__(self):
+    def __init__(
+        self, headless=False, win_res=WIN_RES, gl_backend=None, server_address=None
+    ):
+        self.headless = headless
+        # render the world streamed by a server (server.py) instead of generating it
+        self.net = NetClient(server_address) if server_address else None
+        self.win_size = (int(win_res.x), int(win_res.y))
         pg.init()
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, MAJOR_VER)
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, MINOR_VER)
-        pg.display.gl_set_attribute(
-            pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE
-        )
-        pg.display.gl_set_attribute(pg.GL_DEPTH_SIZE, DEPTH_SIZE)
-        pg.display.gl_set_attribute(pg.GL_MULTISAMPLESAMPLES, NUM_SAMPLES)
 
-        pg.display.set_mode(WIN_RES, flags=pg.OPENGL | pg.DOUBLEBUF)
-        self.ctx = mgl.create_context()
+        if headless:
+            self.init_headless_context(gl_backend)
+        else:
+            self.init_window_context()
 
         self.ctx.enable(flags=mgl.DEPTH_TEST | mgl.CULL_FACE | mgl.BLEND)
         self.ctx.gc_mode = "auto"
@@ -31,214 +37,145 @@ class VoxelEngine:
         self.delta_time = 0
         self.time = 0
 
-        pg.event.set_grab(True)
-        pg.mouse.set_visible(False)
+        if not headless:
+            pg.event.set_grab(True)
+            pg.mouse.set_visible(False)
 
+        self.render_stats = RenderStats()
+        self.memory = MemoryRegistry()
+        self.profiler = Profiler()
+        self.gpu_timer = GpuTimer(self.ctx, self.profiler)
         self.is_running = True
         self.on_init()
 
+    def init_window_context(self):
+        pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, MAJOR_VER)
+        pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, MINOR_VER)
+        pg.display.gl_set_attribute(
+            pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE
+        )
+        pg.display.gl_set_attribute(pg.GL_DEPTH_SIZE, DEPTH_SIZE)
+        pg.display.gl_set_attribute(pg.GL_MULTISAMPLESAMPLES, NUM_SAMPLES)
+
+        pg.display.set_mode(
+            self.win_size, flags=pg.OPENGL | pg.DOUBLEBUF, vsync=int(VSYNC)
+        )
+        self.ctx = mgl.create_context()
+        self.fbo = self.ctx.screen
+
+    def init_headless_context(self, gl_backend=None):
+        # standalone context with an offscreen target, works with Mesa's llvmpipe;
+        # use gl_backend="egl" on machines without an X server
+        kwargs = {"backend": gl_backend} if gl_backend else {}
+        self.ctx = mgl.create_standalone_context(
+            require=MAJOR_VER * 100 + MINOR_VER * 10, **kwargs
+        )
+        self.fbo = self.ctx.framebuffer(
+            color_attachments=[self.ctx.renderbuffer(self.win_size)],
+            depth_attachment=self.ctx.depth_renderbuffer(self.win_size),
+        )
+        self.fbo.use()
+
+    def get_window_size(self):
+        if self.headless:
+            return self.win_size
+        return pg.display.get_surface().get_size()
+
     def on_init(self):
+        self.buffer_manager = BufferManager(self.ctx, self.memory)
         self.textures = Textures(self)
         self.player = Player(self)
         self.shader_program = ShaderProgram(self)
         self.scene = Scene(self)
-        self.gui2d_program = self.shader_program.gui2d
-        self.gui_quad_vao, self.gui_quad_vbo = create_2d_quad(
-            self.ctx, self.gui2d_program
-        )
-
-        # We'll also store a dict for icons => mgl.Textures
-        self.icon_textures = {}
-
-    def update(self):
-        self.player.update()
+        self.hotbar = Hotbar(self)
+        self.hud = PerfHud(self)
+
+    def tick(self):
+        # fixed-rate simulation step: physics, input and ray casting
+        with self.profiler.zone("tick"):
+            with self.profiler.zone("Player.tick"):
+                self.player.tick()
+            self.scene.tick()
+
+    def update(self, alpha=1.0):
+        # alpha: how far the frame is between the last two simulation ticks
+        with self.profiler.zone("Player.update"):
+            self.player.update(alpha)
         self.shader_program.update()
         self.scene.update()
-        self.draw_hotbar_2d()
+        with self.profiler.zone("gui"):
+            self.hotbar.update()
+            self.hud.update()
+        self.memory.update()
 
-        self.delta_time = self.clock.tick()
         self.time = pg.time.get_ticks() * 0.001
         pg.display.set_caption(f"{self.clock.get_fps() :.0f}")
 
     def render(self):
-        self.ctx.clear(color=BG_COLOR)
+        self.render_stats.begin_frame()
+        self.gpu_timer.begin_frame()
+        self.fbo.clear(color=BG_COLOR)
         self.scene.render()
-        self.draw_hotbar_2d()
-        pg.display.flip()
+        with self.profiler.zone("gui"), self.gpu_timer.zone("gui"):
+            self.hotbar.render()
+            self.hud.render()
+        if not self.headless:
+            with self.profiler.zone("swap"):
+                pg.display.flip()
 
     def handle_events(self):
-        for event in pg.event.get():
-            if event.type == pg.QUIT or (
-                event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE
-            ):
-                self.is_running = False
-            self.player.handle_event(event=event)
+        with self.profiler.zone("events"):
+            for event in pg.event.get():
+                if event.type == pg.QUIT or (
+                    event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE
+                ):
+                    self.is_running = False
+                self.player.handle_event(event=event)
+
+    def get_fps_limit(self):
+        # throttle rendering while the window is unfocused
+        if not pg.key.get_focused():
+            return IDLE_FPS
+        return FPS_LIMIT
 
     def run(self):
+        accumulator = 0.0
         while self.is_running:
+            self.profiler.begin_frame()
             self.handle_events()
-            self.update()
-            self.render()
-        pg.quit()
-        sys.exit()
 
-    def get_icon_texture(self, block_type):
-        """
-        Convert a Pygame surface (e.g. 'assets/icons/foo.png') to an mgl.Texture
-        on first use, then cache it in self.icon_textures.
-        """
-        if block_type in self.icon_textures:
-            return self.icon_textures[block_type]
-
-        # Suppose we have a dict mapping block type -> file path:
-        file_name = {
-            SAND: "sand.png",
-            GRASS: "grass.png",
-            DIRT: "dirt.png",
-            STONE: "stone.png",
-            SNOW: "snow.png",
-            LEAVES: "leaves.png",
-            WOOD: "wood.png",
-            GREEN_LEAF: "green_leaf.png",
-        }.get(
-            block_type, "sand.png"
-        )  # default to sand if missing
-
-        try:
-            surf = pg.image.load(f"assets/icons/{file_name}").convert_alpha()
-        except Exception as e:
-            print("Failed to load icon:", e)
-        # Flip or not, depending on your preference.
-        # Usually we do flip(True, False) if we want 0,0 at bottom-left:
-        surf = pg.transform.flip(surf, True, False)
-
-        w, h = surf.get_size()
-        raw_data = pg.image.tostring(surf, "RGBA", False)
-
-        # Create an mgl.Texture2D
-        tex = self.ctx.texture((w, h), 4, raw_data)
-        tex.build_mipmaps()
-        tex.filter = (mgl.LINEAR, mgl.LINEAR)
-
-        self.icon_textures[block_type] = tex
-        return tex
-
-    def draw_hotbar_2d(self):
-        self.ctx.disable(mgl.DEPTH_TEST)
-
-        screen_w, screen_h = pg.display.get_surface().get_size()
-        ortho = glm.ortho(0, screen_w, 0, screen_h, -1, 1)
-
-        prog = self.gui2d_program
-        prog["u_proj"].write(ortho.to_bytes())
-        prog["u_texture"].value = 0
-
-        icon_size = 64 * 1.5
-        gap = 10
-        block_types = [SAND, GRASS, DIRT, STONE, SNOW, LEAVES, WOOD, GREEN_LEAF]
-
-        # Figure out the hotbar dimensions
-        hotbar_width = len(block_types) * (icon_size + gap) + gap
-        hotbar_x = (screen_w - hotbar_width) // 2
-        hotbar_y = 30
-        hotbar_height = icon_size + gap * 2
-
-        # ---------------------------
-        # 1) Dark Grey Outer Border
-        # ---------------------------
-        border_color = (0.3, 0.3, 0.3, 1.0)  # RGBA
-        border_thickness = 12.0
-        outer_pad = 5.0
-
-        outer_offset = struct.pack(
-            "2f",
-            hotbar_x - outer_pad - border_thickness,
-            hotbar_y - outer_pad - border_thickness,
-        )
-        outer_scale = struct.pack(
-            "2f",
-            hotbar_width + (outer_pad + border_thickness) * 2,
-            hotbar_height + (outer_pad + border_thickness) * 2,
-        )
+            self.delta_time = self.clock.tick(self.get_fps_limit())
+            self.render_stats.add_frame_time(self.delta_time)
+            accumulator += min(self.delta_time * 0.001, MAX_FRAME_TIME)
 
-        prog["u_use_texture"].value = False
-        prog["u_color"].write(struct.pack("4f", *border_color))
-        prog["u_offset"].write(outer_offset)
-        prog["u_scale"].write(outer_scale)
-        self.gui_quad_vao.render(mode=mgl.TRIANGLE_FAN)
-
-        # ---------------------------
-        # 2) Lighter Grey Background
-        # ---------------------------
-        bg_color = (0.5, 0.5, 0.5, 1.0)
-        bg_offset = struct.pack("2f", hotbar_x - outer_pad, hotbar_y - outer_pad)
-        bg_scale = struct.pack(
-            "2f", hotbar_width + outer_pad * 2, hotbar_height + outer_pad * 2
-        )
+            ticks = 0
+            while accumulator >= SIM_DT and ticks < MAX_TICKS_PER_FRAME:
+                self.tick()
+                accumulator -= SIM_DT
+                ticks += 1
+            # too far behind: drop the backlog instead of spiralling
+            if ticks == MAX_TICKS_PER_FRAME:
+                accumulator = min(accumulator, SIM_DT)
 
-        prog["u_color"].write(struct.pack("4f", *bg_color))
-        prog["u_offset"].write(bg_offset)
-        prog["u_scale"].write(bg_scale)
-        self.gui_quad_vao.render(mode=mgl.TRIANGLE_FAN)
-
-        # --------------------------------
-        # 3) Draw icons (plus highlight and per-icon border)
-        # --------------------------------
-        selected_block = self.scene.world.voxel_handler.new_voxel_id
-        x_cursor = hotbar_x + gap
-        y_cursor = hotbar_y + gap
-
-        for b_type in block_types:
-            # Optional highlight if selected
-            is_selected = b_type == selected_block
-            if is_selected:
-                prog["u_use_texture"].value = False
-                prog["u_color"].write(
-                    struct.pack("4f", 1.0, 1.0, 1.0, 0.3)
-                )  # White, 30% alpha
-                pad = 5.0
-                offset = struct.pack("2f", x_cursor - pad, y_cursor - pad)
-                scale = struct.pack("2f", icon_size + pad * 2, icon_size + pad * 2)
-                prog["u_offset"].write(offset)
-                prog["u_scale"].write(scale)
-                self.gui_quad_vao.render(mode=mgl.TRIANGLE_FAN)
-
-            # 3a) Draw a thin dark-grey border around the icon
-            #     You can do this *before* or *after* the highlight—whichever you prefer
-            icon_border_color = (0.2, 0.2, 0.2, 1.0)
-            icon_border_thickness = 2.0  # thickness of the per-icon border
-
-            prog["u_use_texture"].value = False
-            prog["u_color"].write(struct.pack("4f", *icon_border_color))
-
-            border_offset = struct.pack(
-                "2f", x_cursor - icon_border_thickness, y_cursor - icon_border_thickness
-            )
-            border_scale = struct.pack(
-                "2f",
-                icon_size + icon_border_thickness * 2,
-                icon_size + icon_border_thickness * 2,
-            )
-
-            prog["u_offset"].write(border_offset)
-            prog["u_scale"].write(border_scale)
-            self.gui_quad_vao.render(mode=mgl.TRIANGLE_FAN)
-
-            # 3b) Draw the actual icon
-            tex = self.get_icon_texture(b_type)
-            tex.use(location=0)
-
-            prog["u_use_texture"].value = True
-            prog["u_color"].write(struct.pack("4f", 1.0, 1.0, 1.0, 1.0))
-            prog["u_offset"].write(struct.pack("2f", x_cursor, y_cursor))
-            prog["u_scale"].write(struct.pack("2f", icon_size, icon_size))
-            self.gui_quad_vao.render(mode=mgl.TRIANGLE_FAN)
-
-            x_cursor += icon_size + gap
-
-        self.ctx.enable(mgl.DEPTH_TEST)
+            self.update(alpha=accumulator / SIM_DT)
+            self.render()
+        self.scene.release()
+        self.hotbar.release()
+        self.hud.release()
+        self.buffer_manager.clear()
+        self.memory.dump()
+        if self.net is not None:
+            self.net.close()
+        pg.quit()
+        sys.exit()
 
 
 if __name__ == "__main__":
-    app = VoxelEngine()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--connect", metavar="ADDRESS", help="server host:port or socket path"
+    )
+    args = parser.parse_args()
+
+    app = VoxelEngine(server_address=args.connect)
     app.run()
@@ -0,0 +1,132 @@
+"""
+Top-down map of the world: one colour per voxel column, from the top block id
+and shaded by its height. Writes a PNG of the whole world, from a world file
+(see world_store.py) or generated from WORLD_SEED (noise.py), which is random
+unless SEED is set in settings.py. The seed is printed with the output.
+
+    python map_tiles.py map.png [--world world.vxw] [--scale 2]
+"""
+import argparse
+import pygame as pg
+from settings import *
+from world_store import WorldStore
+from terrain_gen import generate_world_voxels
+from noise import WORLD_SEED
+
+# chunk column index of every chunk
+CHUNK_COLUMNS = np.arange(WORLD_VOL) % WORLD_AREA
+COLUMN_HEIGHT = WORLD_H * CHUNK_SIZE
+
+
+def get_top_blocks(column_voxels):
+    """
+    Top block id and its height per (z, x) of a chunk column, from the
+    [WORLD_H, CHUNK_VOL] voxels of its chunks. Empty columns have id 0 and
+    height -1.
+    """
+    # (y, z, x), bottom chunk first
+    voxels = column_voxels.reshape(COLUMN_HEIGHT, CHUNK_SIZE, CHUNK_SIZE)
+    # first non-air voxel from the top
+    depth = np.argmax(voxels[::-1] != 0, axis=0)
+    heights = COLUMN_HEIGHT - 1 - depth
+    top_ids = np.take_along_axis(voxels, heights[np.newaxis], axis=0)[0]
+    heights[top_ids == 0] = -1
+    return top_ids, heights
+
+
+def get_tile_colors(top_ids, heights):
+    # lower ground is darker, from MAP_SHADE_MIN at y = 0 to full at the top
+    shade = MAP_SHADE_MIN + (1 - MAP_SHADE_MIN) * heights / (COLUMN_HEIGHT - 1)
+    colors = BLOCK_MAP_COLOR[top_ids] * np.clip(shade, 0, 1)[..., np.newaxis]
+    return colors.astype(np.uint8)
+
+
+class MapTiles:
+    """
+    Map tiles (CHUNK_SIZE x CHUNK_SIZE colours, rows along z) cached per chunk
+    column. A tile is rendered the first time it's asked for once its column
+    is generated, and stays cached until an edit reaches the top block of one
+    of its voxel columns, see invalidate().
+    """
+
+    def __init__(self, voxels, is_generated):
+        self.voxels = voxels
+        # per chunk, e.g. ChunkLoader.is_generated
+        self.is_generated = is_generated
+
+        # the tile of column x + WORLD_W * z is tiles[z, x]
+        shape = (WORLD_D, WORLD_W, CHUNK_SIZE, CHUNK_SIZE)
+        self.tiles = np.zeros([*shape, 3], dtype=np.uint8)
+        self.heights = np.full(shape, -1, dtype=np.int16)
+        self.is_valid = np.zeros(WORLD_AREA, dtype=bool)
+
+    @property
+    def nbytes(self):
+        return self.tiles.nbytes + self.heights.nbytes + self.is_valid.nbytes
+
+    def get_tile(self, column):
+        z, x = divmod(column, WORLD_W)
+        if not self.is_valid[column]:
+            chunk_indices = column + WORLD_AREA * np.arange(WORLD_H)
+            if not np.all(self.is_generated[chunk_indices]):
+                return self.tiles[z, x]  # blank until generated
+
+            top_ids, heights = get_top_blocks(self.voxels[chunk_indices])
+            self.tiles[z, x] = get_tile_colors(top_ids, heights)
+            self.heights[z, x] = heights
+            self.is_valid[column] = True
+        return self.tiles[z, x]
+
+    def get_mosaic(self):
+        # the whole world, [WORLD_D * CHUNK_SIZE, WORLD_W * CHUNK_SIZE, 3]
+        for column in np.flatnonzero(~self.is_valid):
+            self.get_tile(column)
+        mosaic = self.tiles.transpose(0, 2, 1, 3, 4)
+        return mosaic.reshape(WORLD_D * CHUNK_SIZE, WORLD_W * CHUNK_SIZE, 3)
+
+    def invalidate(self, positions):
+        """
+        Drop the tiles of edited world positions (N, 3) at or above the top
+        block of their voxel column, edits below it don't change the map.
+        """
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        cx, cz = positions[:, 0] // CHUNK_SIZE, positions[:, 2] // CHUNK_SIZE
+        in_world = (cx >= 0) & (cx < WORLD_W) & (cz >= 0) & (cz < WORLD_D)
+        x, y, z = positions[in_world].T
+        cx, cz = cx[in_world], cz[in_world]
+
+        heights = self.heights[cz, cx, z % CHUNK_SIZE, x % CHUNK_SIZE]
+        reaches_top = y >= heights
+        self.is_valid[cx[reaches_top] + WORLD_W * cz[reaches_top]] = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="PNG file to write")
+    parser.add_argument(
+        "--world", default=WORLD_FILE, help="world file, generated if not given"
+    )
+    parser.add_argument("--scale", type=int, default=1, help="pixels per voxel")
+    args = parser.parse_args()
+
+    if args.world:
+        store = WorldStore(args.world, None, read_only=True)
+        voxels, seed = store.voxels, store.seed
+        is_generated = store.column_flags[CHUNK_COLUMNS] != 0
+    else:
+        voxels, seed = generate_world_voxels(), WORLD_SEED
+        is_generated = np.ones(WORLD_VOL, dtype=bool)
+
+    mosaic = MapTiles(voxels, is_generated).get_mosaic()
+    mosaic = mosaic.repeat(args.scale, axis=0).repeat(args.scale, axis=1)
+
+    # surfarray is indexed (x, y)
+    pg.image.save(pg.surfarray.make_surface(mosaic.swapaxes(0, 1)), args.output)
+    print(
+        f"saved a {mosaic.shape[1]}x{mosaic.shape[0]} map of seed {seed}"
+        f" to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+import time
+from settings import *
+
+
+def get_nbytes(array):
+    # bytes held by an array, counting the whole buffer a slice is a view into
+    base = array.base
+    return base.nbytes if isinstance(base, np.ndarray) else array.nbytes
+
+
+class MemoryRegistry:
+    """
+    Central account of CPU and GPU bytes. Subsystems register what they hold
+    under a category and a key (a chunk index, a file name, ...), and the
+    registry keeps totals and peaks per category, per chunk and overall.
+    Budgets from MEMORY_BUDGETS are checked on every change and an appended
+    JSON line per MEMORY_LOG_INTERVAL seconds keeps a history in MEMORY_LOG_FILE.
+    """
+
+    def __init__(self, budgets=MEMORY_BUDGETS, log_file=MEMORY_LOG_FILE):
+        self.budgets = dict(budgets)
+        self.log_file = log_file
+        self.last_dump = time.perf_counter()
+
+        # (category, key) -> (cpu bytes, gpu bytes)
+        self.entries = {}
+        # category -> [cpu, gpu], and the highest cpu + gpu total seen
+        self.totals = {}
+        self.peaks = {}
+        self.total_cpu = self.total_gpu = 0
+        self.peak_cpu = self.peak_gpu = 0
+
+        # categories whose budget was exceeded since the last dump
+        self.over_budget = set()
+
+    def set(self, category, key=None, cpu=0, gpu=0):
+        old_cpu, old_gpu = self.entries.get((category, key), (0, 0))
+        self.entries[(category, key)] = (cpu, gpu)
+        self.update_totals(category, cpu - old_cpu, gpu - old_gpu)
+
+    def add(self, category, key=None, cpu=0, gpu=0):
+        old_cpu, old_gpu = self.entries.get((category, key), (0, 0))
+        self.set(category, key, old_cpu + cpu, old_gpu + gpu)
+
+    def remove(self, category, key=None):
+        cpu, gpu = self.entries.pop((category, key), (0, 0))
+        self.update_totals(category, -cpu, -gpu)
+
+    def update_totals(self, category, cpu, gpu):
+        totals = self.totals.setdefault(category, [0, 0])
+        totals[0] += cpu
+        totals[1] += gpu
+        self.peaks[category] = max(self.peaks.get(category, 0), sum(totals))
+
+        self.total_cpu += cpu
+        self.total_gpu += gpu
+        self.peak_cpu = max(self.peak_cpu, self.total_cpu)
+        self.peak_gpu = max(self.peak_gpu, self.total_gpu)
+
+        if not self.fits_budget(category):
+            self.over_budget.add(category)
+
+    def get_total(self, category):
+        # (cpu, gpu) bytes of a category
+        return tuple(self.totals.get(category, (0, 0)))
+
+    def get_peak(self, category):
+        return self.peaks.get(category, 0)
+
+    def get_chunk_bytes(self, chunk_index):
+        # (cpu, gpu) bytes registered under a chunk index, over all categories
+        cpu = gpu = 0
+        for (category, key), (entry_cpu, entry_gpu) in self.entries.items():
+            if key == chunk_index:
+                cpu, gpu = cpu + entry_cpu, gpu + entry_gpu
+        return cpu, gpu
+
+    def fits_budget(self, category, extra=0):
+        """
+        Whether the category stays within its budget (cpu + gpu bytes) after
+        adding extra bytes. Categories without a budget always fit.
+        """
+        budget = self.budgets.get(category)
+        return budget is None or sum(self.get_total(category)) + extra <= budget
+
+    def as_dict(self):
+        return {
+            "time": time.time(),
+            "cpu": self.total_cpu,
+            "gpu": self.total_gpu,
+            "peak_cpu": self.peak_cpu,
+            "peak_gpu": self.peak_gpu,
+            "categories": {
+                category: {"cpu": cpu, "gpu": gpu, "peak": self.peaks[category]}
+                for category, (cpu, gpu) in sorted(self.totals.items())
+            },
+            "over_budget": sorted(self.over_budget),
+        }
+
+    def dump(self):
+        with open(self.log_file, "a") as file:
+            file.write(json.dumps(self.as_dict()) + "\n")
+        self.over_budget.clear()
+        self.last_dump = time.perf_counter()
+
+    def update(self):
+        if time.perf_counter() - self.last_dump >= MEMORY_LOG_INTERVAL:
+            self.dump()
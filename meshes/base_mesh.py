@@ -11,6 +11,8 @@ class BaseMesh:
         self.vbo_format = None
         # attribute names according to the format: ("in_position", "in_color")
         self.attrs: tuple[str, ...] = None
+        # vertex buffer object
+        self.vbo = None
         # vertex array object
         self.vao = None
 
@@ -18,11 +20,22 @@ class BaseMesh:
 
     def get_vao(self):
         vertex_data = self.get_vertex_data()
-        vbo = self.ctx.buffer(vertex_data)
+        self.vbo = self.ctx.buffer(vertex_data)
+        self.app.memory.set("meshes", type(self).__name__, gpu=self.vbo.size)
         vao = self.ctx.vertex_array(
-            self.program, [(vbo, self.vbo_format, *self.attrs)], skip_errors=True
+            self.program, [(self.vbo, self.vbo_format, *self.attrs)], skip_errors=True
         )
         return vao
 
+    def release(self):
+        if self.vao is not None:
+            self.vao.release()
+            self.vao = None
+        if self.vbo is not None:
+            self.vbo.release()
+            self.vbo = None
+            self.app.memory.remove("meshes", type(self).__name__)
+
     def render(self):
         self.vao.render()
+        self.app.render_stats.add_draw(self.vao.vertices)
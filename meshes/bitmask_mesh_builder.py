@@ -0,0 +1,287 @@
+from settings import *
+from meshes.chunk_mesh_builder import pack_data, get_light_at
+
+# Occupancy is kept per (x, z) column as a bitmask over y, padded by one voxel
+# on every side (bit y + 1 holds local y, so -1..CHUNK_SIZE fits in 50 bits).
+# Masks are int64 so numba never mixes signed and unsigned integers.
+PAD_SIZE = CHUNK_SIZE + 2
+INTERIOR_MASK = ((1 << CHUNK_SIZE) - 1) << 1
+
+# per face id: the neighbour the face looks into
+FACE_NORMALS = np.array(
+    [[0, 1, 0], [0, -1, 0], [1, 0, 0], [-1, 0, 0], [0, 0, -1], [0, 0, 1]]
+)
+
+# per face id: the four corners v0..v3, as offsets from the voxel
+FACE_CORNERS = np.array(
+    [
+        [[0, 1, 0], [1, 1, 0], [1, 1, 1], [0, 1, 1]],  # top
+        [[0, 0, 0], [1, 0, 0], [1, 0, 1], [0, 0, 1]],  # bottom
+        [[1, 0, 0], [1, 1, 0], [1, 1, 1], [1, 0, 1]],  # right
+        [[0, 0, 0], [0, 1, 0], [0, 1, 1], [0, 0, 1]],  # left
+        [[0, 0, 0], [0, 1, 0], [1, 1, 0], [1, 0, 0]],  # back
+        [[0, 0, 1], [0, 1, 1], [1, 1, 1], [1, 0, 1]],  # front
+    ]
+)
+
+# per face id and flip_id: the corners of the two triangles
+FACE_ORDER = np.array(
+    [
+        [[0, 3, 2, 0, 2, 1], [1, 0, 3, 1, 3, 2]],
+        [[0, 2, 3, 0, 1, 2], [1, 3, 0, 1, 2, 3]],
+        [[0, 1, 2, 0, 2, 3], [3, 0, 1, 3, 1, 2]],
+        [[0, 2, 1, 0, 3, 2], [3, 1, 0, 3, 2, 1]],
+        [[0, 1, 2, 0, 2, 3], [3, 0, 1, 3, 1, 2]],
+        [[0, 2, 1, 0, 3, 2], [3, 1, 0, 3, 2, 1]],
+    ]
+)
+
+# the 8 samples a..h of get_ao around the face neighbour, per plane (Y, X, Z)
+AO_OFFSETS = np.array(
+    [
+        [
+            [0, 0, -1],
+            [-1, 0, -1],
+            [-1, 0, 0],
+            [-1, 0, 1],
+            [0, 0, 1],
+            [1, 0, 1],
+            [1, 0, 0],
+            [1, 0, -1],
+        ],
+        [
+            [0, 0, -1],
+            [0, -1, -1],
+            [0, -1, 0],
+            [0, -1, 1],
+            [0, 0, 1],
+            [0, 1, 1],
+            [0, 1, 0],
+            [0, 1, -1],
+        ],
+        [
+            [-1, 0, 0],
+            [-1, -1, 0],
+            [0, -1, 0],
+            [1, -1, 0],
+            [1, 0, 0],
+            [1, 1, 0],
+            [0, 1, 0],
+            [-1, 1, 0],
+        ],
+    ]
+)
+
+
+@njit
+def count_trailing_zeros(mask):
+    n = 0
+    if not mask & 0xFFFFFFFF:
+        n += 32
+        mask >>= 32
+    if not mask & 0xFFFF:
+        n += 16
+        mask >>= 16
+    if not mask & 0xFF:
+        n += 8
+        mask >>= 8
+    if not mask & 0xF:
+        n += 4
+        mask >>= 4
+    if not mask & 0x3:
+        n += 2
+        mask >>= 2
+    if not mask & 0x1:
+        n += 1
+    return n
+
+
+@njit
+def get_columns(chunk_voxels, chunk_pos, world_voxels):
+    """
+    Padded solid and water occupancy columns of the chunk. Voxels outside the
+    world count as solid, like is_void in the scalar mesher.
+    """
+    columns = np.zeros((PAD_SIZE, PAD_SIZE), dtype=np.int64)
+    water = np.zeros((PAD_SIZE, PAD_SIZE), dtype=np.int64)
+    cx, cy, cz = chunk_pos
+    wx0, wy0, wz0 = cx * CHUNK_SIZE, cy * CHUNK_SIZE, cz * CHUNK_SIZE
+
+    for y in range(CHUNK_SIZE):
+        for z in range(CHUNK_SIZE):
+            for x in range(CHUNK_SIZE):
+                voxel_id = chunk_voxels[x + CHUNK_SIZE * z + CHUNK_AREA * y]
+                if BLOCK_SOLID[voxel_id]:
+                    columns[x + 1, z + 1] |= 1 << (y + 1)
+                elif voxel_id:
+                    water[x + 1, z + 1] |= 1 << (y + 1)
+
+    # the one voxel border from the neighbouring chunks
+    for px in range(PAD_SIZE):
+        for pz in range(PAD_SIZE):
+            is_inner_column = 0 < px < PAD_SIZE - 1 and 0 < pz < PAD_SIZE - 1
+            for py in range(PAD_SIZE):
+                if is_inner_column and 0 < py < PAD_SIZE - 1:
+                    continue
+                wx, wy, wz = wx0 + px - 1, wy0 + py - 1, wz0 + pz - 1
+                wcx, wcy, wcz = wx // CHUNK_SIZE, wy // CHUNK_SIZE, wz // CHUNK_SIZE
+                if not (
+                    0 <= wcx < WORLD_W and 0 <= wcy < WORLD_H and 0 <= wcz < WORLD_D
+                ):
+                    columns[px, pz] |= 1 << py
+                    continue
+                lx = wx - wcx * CHUNK_SIZE
+                ly = wy - wcy * CHUNK_SIZE
+                lz = wz - wcz * CHUNK_SIZE
+                chunk_index = wcx + WORLD_W * wcz + WORLD_AREA * wcy
+                voxel_id = world_voxels[
+                    chunk_index, lx + CHUNK_SIZE * lz + CHUNK_AREA * ly
+                ]
+                if BLOCK_SOLID[voxel_id]:
+                    columns[px, pz] |= 1 << py
+                elif voxel_id:
+                    water[px, pz] |= 1 << py
+    return columns, water
+
+
+@njit
+def is_solid(columns, x, y, z):
+    # local coords in -1..CHUNK_SIZE
+    return (columns[x + 1, z + 1] >> (y + 1)) & 1
+
+
+@njit
+def get_visible(solid, water, next_solid, next_water):
+    # solid faces show next to anything see-through, water only next to air
+    return solid & ~next_solid | water & ~(next_solid | next_water)
+
+
+@njit
+def get_face_masks(columns, water):
+    """
+    Visible faces per face id and (x, z) column, as bitmasks over padded y.
+    """
+    masks = np.zeros((6, CHUNK_SIZE, CHUNK_SIZE), dtype=np.int64)
+    for x in range(CHUNK_SIZE):
+        for z in range(CHUNK_SIZE):
+            solid_column, water_column = columns[x + 1, z + 1], water[x + 1, z + 1]
+            s = solid_column & INTERIOR_MASK
+            w = water_column & INTERIOR_MASK
+            if not (s | w):
+                continue
+            masks[0, x, z] = get_visible(s, w, solid_column >> 1, water_column >> 1)
+            masks[1, x, z] = get_visible(s, w, solid_column << 1, water_column << 1)
+            masks[2, x, z] = get_visible(
+                s, w, columns[x + 2, z + 1], water[x + 2, z + 1]
+            )
+            masks[3, x, z] = get_visible(s, w, columns[x, z + 1], water[x, z + 1])
+            masks[4, x, z] = get_visible(s, w, columns[x + 1, z], water[x + 1, z])
+            masks[5, x, z] = get_visible(
+                s, w, columns[x + 1, z + 2], water[x + 1, z + 2]
+            )
+    return masks
+
+
+@njit
+def is_void_around(columns, plane, i, nx, ny, nz):
+    # sample i (a..h) of get_ao around the face neighbour (nx, ny, nz)
+    return 1 - is_solid(
+        columns,
+        nx + AO_OFFSETS[plane, i, 0],
+        ny + AO_OFFSETS[plane, i, 1],
+        nz + AO_OFFSETS[plane, i, 2],
+    )
+
+
+@njit
+def add_face(vertex_data, index, columns, x, y, z, voxel_id, face_id, light):
+    nx = x + FACE_NORMALS[face_id, 0]
+    ny = y + FACE_NORMALS[face_id, 1]
+    nz = z + FACE_NORMALS[face_id, 2]
+
+    plane = face_id // 2
+    a = is_void_around(columns, plane, 0, nx, ny, nz)
+    b = is_void_around(columns, plane, 1, nx, ny, nz)
+    c = is_void_around(columns, plane, 2, nx, ny, nz)
+    d = is_void_around(columns, plane, 3, nx, ny, nz)
+    e = is_void_around(columns, plane, 4, nx, ny, nz)
+    f = is_void_around(columns, plane, 5, nx, ny, nz)
+    g = is_void_around(columns, plane, 6, nx, ny, nz)
+    h = is_void_around(columns, plane, 7, nx, ny, nz)
+    ao = (a + b + c), (g + h + a), (e + f + g), (c + d + e)
+    flip_id = 1 if ao[1] + ao[3] > ao[0] + ao[2] else 0
+
+    for i in range(6):
+        corner = FACE_ORDER[face_id, flip_id, i]
+        vertex_data[index] = pack_data(
+            x + FACE_CORNERS[face_id, corner, 0],
+            y + FACE_CORNERS[face_id, corner, 1],
+            z + FACE_CORNERS[face_id, corner, 2],
+            voxel_id,
+            face_id,
+            ao[corner],
+            flip_id,
+        )
+        vertex_data[index + 1] = light
+        index += 2
+    return index
+
+
+@njit
+def build_chunk_mesh_bitmask(
+    chunk_voxels, format_size, chunk_pos, world_voxels, world_light
+):
+    """
+    Same output as build_chunk_mesh, but visible faces are found with shifts
+    and ANDs on occupancy bitmasks and only voxels with a visible face are
+    visited, in the same x, y, z order.
+    """
+    vertex_data = np.empty(CHUNK_VOL * 18 * format_size, dtype="uint32")
+    index = 0
+
+    columns, water = get_columns(chunk_voxels, chunk_pos, world_voxels)
+    face_masks = get_face_masks(columns, water)
+
+    # voxels with any visible face, transposed to rows over z per (x, y)
+    rows = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.int64)
+    for x in range(CHUNK_SIZE):
+        for z in range(CHUNK_SIZE):
+            visible = (
+                face_masks[0, x, z]
+                | face_masks[1, x, z]
+                | face_masks[2, x, z]
+                | face_masks[3, x, z]
+                | face_masks[4, x, z]
+                | face_masks[5, x, z]
+            ) >> 1
+            while visible:
+                y = count_trailing_zeros(visible)
+                visible &= visible - 1
+                rows[x, y] |= 1 << z
+
+    cx, cy, cz = chunk_pos
+    for x in range(CHUNK_SIZE):
+        for y in range(CHUNK_SIZE):
+            row = rows[x, y]
+            while row:
+                z = count_trailing_zeros(row)
+                row &= row - 1
+
+                voxel_id = chunk_voxels[x + CHUNK_SIZE * z + CHUNK_AREA * y]
+                wx = x + cx * CHUNK_SIZE
+                wy = y + cy * CHUNK_SIZE
+                wz = z + cz * CHUNK_SIZE
+                for face_id in range(6):
+                    if not (face_masks[face_id, x, z] >> (y + 1)) & 1:
+                        continue
+                    light = get_light_at(
+                        world_light,
+                        wx + FACE_NORMALS[face_id, 0],
+                        wy + FACE_NORMALS[face_id, 1],
+                        wz + FACE_NORMALS[face_id, 2],
+                    )
+                    index = add_face(
+                        vertex_data, index, columns, x, y, z, voxel_id, face_id, light
+                    )
+
+    return vertex_data[:index]
@@ -0,0 +1,80 @@
+class BufferManager:
+    """
+    Hands out vertex buffers in power-of-two size classes and keeps released
+    buffers on free lists, so mesh rebuilds reuse GPU memory instead of
+    allocating a new buffer on every edit. The free lists are capped by the
+    "buffer_pool" memory budget.
+    """
+
+    MIN_SIZE_CLASS = 12  # 4 KiB
+
+    def __init__(self, ctx, memory):
+        self.ctx = ctx
+        self.memory = memory
+        # size class -> list of released buffers ready for reuse
+        self.free_buffers = {}
+        self.free_bytes = 0
+
+        # bytes handed out to meshes / bytes held on the GPU including free lists
+        self.bytes_in_use = 0
+        self.bytes_allocated = 0
+        self.peak_bytes_allocated = 0
+
+        self.num_allocations = 0
+        self.num_reuses = 0
+        self.num_orphans = 0
+
+    def get_size_class(self, num_bytes):
+        return max(self.MIN_SIZE_CLASS, (max(num_bytes, 1) - 1).bit_length())
+
+    def acquire(self, num_bytes):
+        size_class = self.get_size_class(num_bytes)
+        free_list = self.free_buffers.get(size_class)
+
+        if free_list:
+            buffer = free_list.pop()
+            self.free_bytes -= buffer.size
+            self.memory.set("buffer_pool", gpu=self.free_bytes)
+            self.num_reuses += 1
+        else:
+            buffer = self.ctx.buffer(reserve=1 << size_class, dynamic=True)
+            self.bytes_allocated += buffer.size
+            self.peak_bytes_allocated = max(
+                self.peak_bytes_allocated, self.bytes_allocated
+            )
+            self.num_allocations += 1
+
+        self.bytes_in_use += buffer.size
+        return buffer
+
+    def release(self, buffer):
+        self.bytes_in_use -= buffer.size
+
+        if not self.memory.fits_budget("buffer_pool", buffer.size):
+            self.bytes_allocated -= buffer.size
+            buffer.release()
+            return
+
+        self.free_buffers.setdefault(buffer.size.bit_length() - 1, []).append(buffer)
+        self.free_bytes += buffer.size
+        self.memory.set("buffer_pool", gpu=self.free_bytes)
+
+    def fits(self, buffer, num_bytes):
+        # reuse only if the data fits and the buffer isn't oversized for it
+        size_class = self.get_size_class(num_bytes)
+        return size_class <= buffer.size.bit_length() - 1 <= size_class + 1
+
+    def write(self, buffer, data):
+        # orphan the old storage so the driver doesn't stall on in-flight draws
+        buffer.orphan()
+        buffer.write(data)
+        self.num_orphans += 1
+
+    def clear(self):
+        for free_list in self.free_buffers.values():
+            for buffer in free_list:
+                self.bytes_allocated -= buffer.size
+                buffer.release()
+        self.free_buffers.clear()
+        self.free_bytes = 0
+        self.memory.remove("buffer_pool")
@@ -1,28 +1,86 @@
 from meshes.base_mesh import BaseMesh
 from meshes.chunk_mesh_builder import build_chunk_mesh
+from meshes.bitmask_mesh_builder import build_chunk_mesh_bitmask
+from settings import BITMASK_MESHER
+from memory import get_nbytes
 
 
 class ChunkMesh(BaseMesh):
-    def __init__(self, chunk):
+    VBO_FORMAT = "1u4 1u4"
+    FORMAT_SIZE = sum(int(fmt[:1]) for fmt in VBO_FORMAT.split())
+
+    def __init__(self, chunk, vertex_data=None):
         super().__init__()
         self.app = chunk.app
         self.chunk = chunk
         self.ctx = self.app.ctx
         self.program = self.app.shader_program.chunk
+        self.buffer_manager = self.app.buffer_manager
+        self.memory = self.app.memory
+        self.num_vertices = 0
 
-        self.vbo_format = "1u4"
-        self.format_size = sum(int(fmt[:1]) for fmt in self.vbo_format.split())
-        self.attrs = ("packed_data",)
-        self.vao = self.get_vao()
+        self.vbo_format = self.VBO_FORMAT
+        self.format_size = self.FORMAT_SIZE
+        self.attrs = ("packed_data", "light_data")
+        # vertex data can be built ahead of time, see ChunkLoader
+        self.vao = self.get_vao(vertex_data)
 
     def rebuild(self):
         self.vao = self.get_vao()
+        self.chunk.world.occlusion.update_chunk(self.chunk)
 
-    def get_vertex_data(self):
-        mesh = build_chunk_mesh(
-            chunk_voxels=self.chunk.voxels,
-            format_size=self.format_size,
-            chunk_pos=self.chunk.position,
-            world_voxels=self.chunk.world.voxels,
+    def get_vao(self, vertex_data=None):
+        if vertex_data is None:
+            vertex_data = self.get_vertex_data()
+        self.num_vertices = len(vertex_data) // self.format_size
+        self.chunk.world.chunk_vertex_counts[self.chunk.index] = self.num_vertices
+        # the builder's worst-case scratch array lives until the upload is done
+        index = self.chunk.index
+        self.memory.set("mesh_scratch", index, cpu=get_nbytes(vertex_data))
+
+        # the new mesh fits: orphan and refill the buffer, the vao stays valid
+        if self.vbo is not None and self.buffer_manager.fits(
+            self.vbo, vertex_data.nbytes
+        ):
+            self.buffer_manager.write(self.vbo, vertex_data)
+            self.memory.remove("mesh_scratch", index)
+            return self.vao
+
+        self.release()
+        self.vbo = self.buffer_manager.acquire(vertex_data.nbytes)
+        self.buffer_manager.write(self.vbo, vertex_data)
+        self.memory.remove("mesh_scratch", index)
+        self.memory.set("chunk_vbo", index, gpu=self.vbo.size)
+        vao = self.ctx.vertex_array(
+            self.program, [(self.vbo, self.vbo_format, *self.attrs)], skip_errors=True
         )
-        return mesh
+        return vao
+
+    def release(self):
+        if self.vao is not None:
+            self.vao.release()
+            self.vao = None
+        if self.vbo is not None:
+            self.buffer_manager.release(self.vbo)
+            self.vbo = None
+            self.memory.remove("chunk_vbo", self.chunk.index)
+
+    def render(self):
+        self.vao.render(vertices=self.num_vertices)
+        self.app.render_stats.add_draw(self.num_vertices)
+
+    def get_vertex_data(self):
+        return self.build_vertex_data(self.chunk)
+
+    @classmethod
+    def build_vertex_data(cls, chunk):
+        # a view into the builder's scratch array, copy it to keep it around
+        builder = build_chunk_mesh_bitmask if BITMASK_MESHER else build_chunk_mesh
+        with chunk.app.profiler.zone("mesh build"):
+            return builder(
+                chunk_voxels=chunk.voxels,
+                format_size=cls.FORMAT_SIZE,
+                chunk_pos=chunk.position,
+                world_voxels=chunk.world.voxels,
+                world_light=chunk.world.light,
+            )
@@ -78,6 +78,34 @@ def get_chunk_index(world_voxel_pos):
     return index
 
 
+@njit
+def get_voxel_id_at(world_voxels, wx, wy, wz):
+    # voxel id at integer world coords, 0 outside the world
+    if wx < 0 or wy < 0 or wz < 0:
+        return 0
+    cx, cy, cz = wx // CHUNK_SIZE, wy // CHUNK_SIZE, wz // CHUNK_SIZE
+    if cx >= WORLD_W or cy >= WORLD_H or cz >= WORLD_D:
+        return 0
+
+    lx, ly, lz = wx - cx * CHUNK_SIZE, wy - cy * CHUNK_SIZE, wz - cz * CHUNK_SIZE
+    chunk_index = cx + WORLD_W * cz + WORLD_AREA * cy
+    return world_voxels[chunk_index, lx + CHUNK_SIZE * lz + CHUNK_AREA * ly]
+
+
+@njit
+def get_light_at(world_light, wx, wy, wz):
+    # packed sky | block light at integer world coords, full sky outside the world
+    if wx < 0 or wy < 0 or wz < 0:
+        return MAX_LIGHT << 4
+    cx, cy, cz = wx // CHUNK_SIZE, wy // CHUNK_SIZE, wz // CHUNK_SIZE
+    if cx >= WORLD_W or cy >= WORLD_H or cz >= WORLD_D:
+        return MAX_LIGHT << 4
+
+    lx, ly, lz = wx - cx * CHUNK_SIZE, wy - cy * CHUNK_SIZE, wz - cz * CHUNK_SIZE
+    chunk_index = cx + WORLD_W * cz + WORLD_AREA * cy
+    return world_light[chunk_index, lx + CHUNK_SIZE * lz + CHUNK_AREA * ly]
+
+
 @njit
 def is_void(local_voxel_pos, world_voxel_pos, world_voxels):
     chunk_index = get_chunk_index(world_voxel_pos)
@@ -90,21 +118,34 @@ def is_void(local_voxel_pos, world_voxel_pos, world_voxels):
         x % CHUNK_SIZE + z % CHUNK_SIZE * CHUNK_SIZE + y % CHUNK_SIZE * CHUNK_AREA
     )
 
-    if chunk_voxels[voxel_index]:
+    if BLOCK_SOLID[chunk_voxels[voxel_index]]:
         return False
     return True
 
 
 @njit
-def add_data(vertex_data, index, *vertices):
+def is_face_visible(voxel_id, local_voxel_pos, world_voxel_pos, world_voxels):
+    # solid voxels show faces next to anything see-through, water only next to air
+    if BLOCK_SOLID[voxel_id]:
+        return is_void(local_voxel_pos, world_voxel_pos, world_voxels)
+    wx, wy, wz = world_voxel_pos
+    if get_chunk_index(world_voxel_pos) == -1:
+        return False
+    return get_voxel_id_at(world_voxels, wx, wy, wz) == 0
+
+
+@njit
+def add_data(vertex_data, index, light, *vertices):
+    # each vertex: packed_data, light_data
     for vertex in vertices:
         vertex_data[index] = vertex
-        index += 1
+        vertex_data[index + 1] = light
+        index += 2
     return index
 
 
 @njit
-def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
+def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels, world_light):
     vertex_data = np.empty(CHUNK_VOL * 18 * format_size, dtype="uint32")
     index = 0
 
@@ -123,7 +164,10 @@ def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
                 wz = z + cz * CHUNK_SIZE
 
                 # top face
-                if is_void((x, y + 1, z), (wx, wy + 1, wz), world_voxels):
+                if is_face_visible(
+                    voxel_id, (x, y + 1, z), (wx, wy + 1, wz), world_voxels
+                ):
+                    light = get_light_at(world_light, wx, wy + 1, wz)
                     # get ao values
                     ao = get_ao(
                         (x, y + 1, z), (wx, wy + 1, wz), world_voxels, plane="Y"
@@ -137,12 +181,19 @@ def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
                     v3 = pack_data(x, y + 1, z + 1, voxel_id, 0, ao[3], flip_id)
 
                     if flip_id:
-                        index = add_data(vertex_data, index, v1, v0, v3, v1, v3, v2)
+                        index = add_data(
+                            vertex_data, index, light, v1, v0, v3, v1, v3, v2
+                        )
                     else:
-                        index = add_data(vertex_data, index, v0, v3, v2, v0, v2, v1)
+                        index = add_data(
+                            vertex_data, index, light, v0, v3, v2, v0, v2, v1
+                        )
 
                 # bottom face
-                if is_void((x, y - 1, z), (wx, wy - 1, wz), world_voxels):
+                if is_face_visible(
+                    voxel_id, (x, y - 1, z), (wx, wy - 1, wz), world_voxels
+                ):
+                    light = get_light_at(world_light, wx, wy - 1, wz)
                     ao = get_ao(
                         (x, y - 1, z), (wx, wy - 1, wz), world_voxels, plane="Y"
                     )
@@ -154,12 +205,19 @@ def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
                     v3 = pack_data(x, y, z + 1, voxel_id, 1, ao[3], flip_id)
 
                     if flip_id:
-                        index = add_data(vertex_data, index, v1, v3, v0, v1, v2, v3)
+                        index = add_data(
+                            vertex_data, index, light, v1, v3, v0, v1, v2, v3
+                        )
                     else:
-                        index = add_data(vertex_data, index, v0, v2, v3, v0, v1, v2)
+                        index = add_data(
+                            vertex_data, index, light, v0, v2, v3, v0, v1, v2
+                        )
 
                 # right face
-                if is_void((x + 1, y, z), (wx + 1, wy, wz), world_voxels):
+                if is_face_visible(
+                    voxel_id, (x + 1, y, z), (wx + 1, wy, wz), world_voxels
+                ):
+                    light = get_light_at(world_light, wx + 1, wy, wz)
                     ao = get_ao(
                         (x + 1, y, z), (wx + 1, wy, wz), world_voxels, plane="X"
                     )
@@ -171,12 +229,19 @@ def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
                     v3 = pack_data(x + 1, y, z + 1, voxel_id, 2, ao[3], flip_id)
 
                     if flip_id:
-                        index = add_data(vertex_data, index, v3, v0, v1, v3, v1, v2)
+                        index = add_data(
+                            vertex_data, index, light, v3, v0, v1, v3, v1, v2
+                        )
                     else:
-                        index = add_data(vertex_data, index, v0, v1, v2, v0, v2, v3)
+                        index = add_data(
+                            vertex_data, index, light, v0, v1, v2, v0, v2, v3
+                        )
 
                 # left face
-                if is_void((x - 1, y, z), (wx - 1, wy, wz), world_voxels):
+                if is_face_visible(
+                    voxel_id, (x - 1, y, z), (wx - 1, wy, wz), world_voxels
+                ):
+                    light = get_light_at(world_light, wx - 1, wy, wz)
                     ao = get_ao(
                         (x - 1, y, z), (wx - 1, wy, wz), world_voxels, plane="X"
                     )
@@ -188,12 +253,19 @@ def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
                     v3 = pack_data(x, y, z + 1, voxel_id, 3, ao[3], flip_id)
 
                     if flip_id:
-                        index = add_data(vertex_data, index, v3, v1, v0, v3, v2, v1)
+                        index = add_data(
+                            vertex_data, index, light, v3, v1, v0, v3, v2, v1
+                        )
                     else:
-                        index = add_data(vertex_data, index, v0, v2, v1, v0, v3, v2)
+                        index = add_data(
+                            vertex_data, index, light, v0, v2, v1, v0, v3, v2
+                        )
 
                 # back face
-                if is_void((x, y, z - 1), (wx, wy, wz - 1), world_voxels):
+                if is_face_visible(
+                    voxel_id, (x, y, z - 1), (wx, wy, wz - 1), world_voxels
+                ):
+                    light = get_light_at(world_light, wx, wy, wz - 1)
                     ao = get_ao(
                         (x, y, z - 1), (wx, wy, wz - 1), world_voxels, plane="Z"
                     )
@@ -205,12 +277,19 @@ def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
                     v3 = pack_data(x + 1, y, z, voxel_id, 4, ao[3], flip_id)
 
                     if flip_id:
-                        index = add_data(vertex_data, index, v3, v0, v1, v3, v1, v2)
+                        index = add_data(
+                            vertex_data, index, light, v3, v0, v1, v3, v1, v2
+                        )
                     else:
-                        index = add_data(vertex_data, index, v0, v1, v2, v0, v2, v3)
+                        index = add_data(
+                            vertex_data, index, light, v0, v1, v2, v0, v2, v3
+                        )
 
                 # front face
-                if is_void((x, y, z + 1), (wx, wy, wz + 1), world_voxels):
+                if is_face_visible(
+                    voxel_id, (x, y, z + 1), (wx, wy, wz + 1), world_voxels
+                ):
+                    light = get_light_at(world_light, wx, wy, wz + 1)
                     ao = get_ao(
                         (x, y, z + 1), (wx, wy, wz + 1), world_voxels, plane="Z"
                     )
@@ -222,8 +301,12 @@ def build_chunk_mesh(chunk_voxels, format_size, chunk_pos, world_voxels):
                     v3 = pack_data(x + 1, y, z + 1, voxel_id, 5, ao[3], flip_id)
 
                     if flip_id:
-                        index = add_data(vertex_data, index, v3, v1, v0, v3, v2, v1)
+                        index = add_data(
+                            vertex_data, index, light, v3, v1, v0, v3, v2, v1
+                        )
                     else:
-                        index = add_data(vertex_data, index, v0, v2, v1, v0, v3, v2)
+                        index = add_data(
+                            vertex_data, index, light, v0, v2, v1, v0, v3, v2
+                        )
 
-    return vertex_data[: index + 1]
+    return vertex_data[:index]
@@ -0,0 +1,173 @@
+import socket
+import struct
+import zlib
+from settings import *
+
+# message types
+MSG_HELLO = 1  # s -> c: client id
+MSG_POSITION = 2  # c -> s: player position
+MSG_CHUNK = 3  # s -> c: chunk index + compressed voxels
+MSG_EDIT = 4  # c -> s: edit request
+MSG_EDIT_DELTA = 5  # s -> c: voxel at a position changed
+
+HEADER = struct.Struct("<IB")  # payload length, message type
+HELLO = struct.Struct("<I")
+POSITION = struct.Struct("<3f")
+CHUNK_HEADER = struct.Struct("<I")
+EDIT = struct.Struct("<I3iB")  # seq, x, y, z, voxel id
+EDIT_DELTA = struct.Struct("<II3iB")  # client id, seq, x, y, z, voxel id
+
+
+def parse_address(address):
+    """
+    "host:port" for TCP, anything else is a Unix socket path.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def encode_message(msg_type, payload=b""):
+    return HEADER.pack(len(payload), msg_type) + payload
+
+
+def encode_chunk(chunk_index, voxels):
+    payload = CHUNK_HEADER.pack(chunk_index) + zlib.compress(
+        voxels.tobytes(), NET_COMPRESSION_LEVEL
+    )
+    return encode_message(MSG_CHUNK, payload)
+
+
+def decode_chunk(payload):
+    (chunk_index,) = CHUNK_HEADER.unpack_from(payload)
+    data = zlib.decompress(payload[CHUNK_HEADER.size :])
+    return chunk_index, np.frombuffer(data, dtype="uint8")
+
+
+class MessageReader:
+    """
+    Splits a byte stream into (msg_type, payload) messages.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            length, msg_type = HEADER.unpack_from(self.buffer, offset)
+            end = offset + HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            messages.append((msg_type, bytes(self.buffer[offset + HEADER.size : end])))
+            offset = end
+        del self.buffer[:offset]
+        return messages
+
+
+class Connection:
+    """
+    Non-blocking socket with buffered, framed reads and writes.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sock.setblocking(False)
+        if sock.family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = MessageReader()
+        self.out_buffer = bytearray()
+        self.is_closed = False
+
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    @classmethod
+    def connect(cls, address):
+        family, addr = parse_address(address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.connect(addr)
+        return cls(sock)
+
+    def send(self, msg_type, payload=b""):
+        self.out_buffer += encode_message(msg_type, payload)
+
+    def send_raw(self, data):
+        self.out_buffer += data
+
+    def flush(self):
+        while self.out_buffer and not self.is_closed:
+            try:
+                sent = self.sock.send(self.out_buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                self.close()
+                return
+            del self.out_buffer[:sent]
+            self.bytes_sent += sent
+
+    def receive(self):
+        messages = []
+        while not self.is_closed:
+            try:
+                data = self.sock.recv(NET_RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self.close()
+                break
+            if not data:
+                self.close()
+                break
+            self.bytes_received += len(data)
+            messages += self.reader.feed(data)
+        return messages
+
+    def close(self):
+        if not self.is_closed:
+            self.is_closed = True
+            self.sock.close()
+
+
+class NetClient:
+    """
+    Client side of the chunk stream: sends the player position and edit
+    requests, and hands received chunks and edit deltas to the world.
+    """
+
+    def __init__(self, address):
+        self.conn = Connection.connect(address)
+        self.client_id = None
+        self.edit_seq = 0
+
+    def send_position(self, position):
+        self.conn.send(MSG_POSITION, POSITION.pack(*position))
+
+    def send_edit(self, position, voxel_id):
+        self.edit_seq += 1
+        self.conn.send(MSG_EDIT, EDIT.pack(self.edit_seq, *position, voxel_id))
+        return self.edit_seq
+
+    def poll(self):
+        """
+        Flush pending requests and return the received messages as
+        ("chunk", index, voxels) and ("edit", client_id, seq, position, voxel_id).
+        """
+        self.conn.flush()
+        events = []
+        for msg_type, payload in self.conn.receive():
+            if msg_type == MSG_HELLO:
+                (self.client_id,) = HELLO.unpack(payload)
+            elif msg_type == MSG_CHUNK:
+                events.append(("chunk", *decode_chunk(payload)))
+            elif msg_type == MSG_EDIT_DELTA:
+                client_id, seq, x, y, z, voxel_id = EDIT_DELTA.unpack(payload)
+                events.append(("edit", client_id, seq, (x, y, z), voxel_id))
+        return events
+
+    def close(self):
+        self.conn.close()
@@ -1,15 +1,13 @@
-from settings import SEED
+from settings import SEED, WORLD_FILE
 from numba import njit
 from opensimplex.internals import _noise2, _noise3, _init
+from world_store import read_seed
 import numpy as np
 
-perm, perm_grad_index3 = _init(seed=SEED)
-
-if SEED == 0:
-    rando = np.random.randint(0, 20000)
-    perm, perm_grad_index3 = _init(rando)
-else:
-    perm, perm_grad_index3 = _init(seed=SEED)
+# the seed the terrain is generated with: SEED, else the one of an existing
+# world file, so it keeps generating seamlessly, else a random one
+WORLD_SEED = SEED or read_seed(WORLD_FILE) or np.random.randint(1, 20000)
+perm, perm_grad_index3 = _init(seed=WORLD_SEED)
 
 
 @njit(cache=False)
@@ -0,0 +1,212 @@
+from settings import *
+
+# face ids follow the mesher: top, bottom, right, left, back, front
+# so the opposite of face f is always f ^ 1
+FACE_DIRS = np.array(
+    [(0, 1, 0), (0, -1, 0), (1, 0, 0), (-1, 0, 0), (0, 0, -1), (0, 0, 1)],
+    dtype=np.int32,
+)
+ALL_FACES = 0b111111
+
+
+@njit
+def get_face_links(voxels):
+    """
+    Flood fill the air regions of a chunk and return, for each of its six faces,
+    a bitmask of the faces reachable from it through empty voxels.
+    """
+    links = np.zeros(6, dtype=np.uint8)
+    visited = np.zeros(CHUNK_VOL, dtype=np.bool_)
+    stack = np.empty(CHUNK_VOL, dtype=np.int32)
+
+    for start in range(CHUNK_VOL):
+        if voxels[start] or visited[start]:
+            continue
+
+        visited[start] = True
+        stack[0] = start
+        top = 1
+        faces = 0
+
+        while top:
+            top -= 1
+            index = stack[top]
+            x = index % CHUNK_SIZE
+            z = index // CHUNK_SIZE % CHUNK_SIZE
+            y = index // CHUNK_AREA
+
+            if y == CHUNK_SIZE - 1:
+                faces |= 1
+            if y == 0:
+                faces |= 2
+            if x == CHUNK_SIZE - 1:
+                faces |= 4
+            if x == 0:
+                faces |= 8
+            if z == 0:
+                faces |= 16
+            if z == CHUNK_SIZE - 1:
+                faces |= 32
+
+            for face in range(6):
+                nx = x + FACE_DIRS[face, 0]
+                ny = y + FACE_DIRS[face, 1]
+                nz = z + FACE_DIRS[face, 2]
+                if not (
+                    0 <= nx < CHUNK_SIZE
+                    and 0 <= ny < CHUNK_SIZE
+                    and 0 <= nz < CHUNK_SIZE
+                ):
+                    continue
+                n_index = nx + CHUNK_SIZE * nz + CHUNK_AREA * ny
+                if voxels[n_index] or visited[n_index]:
+                    continue
+                visited[n_index] = True
+                stack[top] = n_index
+                top += 1
+
+        # every pair of faces touched by this air region can see each other
+        for face in range(6):
+            if faces >> face & 1:
+                links[face] |= faces
+
+        if faces == ALL_FACES:
+            links[:] = ALL_FACES
+            break
+
+    return links
+
+
+@njit
+def get_occlusion_mask(face_links, frustum_mask, cam_x, cam_y, cam_z):
+    """
+    Breadth-first visibility search over chunks, starting at the camera chunk.
+    A chunk is entered through one face and left through another only if its
+    air connects those faces, and the search never steps back towards the
+    camera along a direction it already travelled.
+    """
+    visible = np.zeros(WORLD_VOL, dtype=np.bool_)
+    queue = np.empty(WORLD_VOL, dtype=np.int32)
+    entry_face = np.full(WORLD_VOL, -1, dtype=np.int8)
+    travelled = np.zeros(WORLD_VOL, dtype=np.uint8)
+    head, tail = 0, 0
+
+    if 0 <= cam_x < WORLD_W and 0 <= cam_y < WORLD_H and 0 <= cam_z < WORLD_D:
+        index = cam_x + WORLD_W * cam_z + WORLD_AREA * cam_y
+        visible[index] = True
+        queue[tail] = index
+        tail += 1
+    else:
+        # camera outside the world: enter through the boundary faces it looks at
+        for y in range(WORLD_H):
+            for z in range(WORLD_D):
+                for x in range(WORLD_W):
+                    index = x + WORLD_W * z + WORLD_AREA * y
+                    if not frustum_mask[index]:
+                        continue
+                    for face in range(6):
+                        dx = FACE_DIRS[face, 0]
+                        dy = FACE_DIRS[face, 1]
+                        dz = FACE_DIRS[face, 2]
+                        outside = (
+                            (dy > 0 and y == WORLD_H - 1 and cam_y >= WORLD_H)
+                            or (dy < 0 and y == 0 and cam_y < 0)
+                            or (dx > 0 and x == WORLD_W - 1 and cam_x >= WORLD_W)
+                            or (dx < 0 and x == 0 and cam_x < 0)
+                            or (dz > 0 and z == WORLD_D - 1 and cam_z >= WORLD_D)
+                            or (dz < 0 and z == 0 and cam_z < 0)
+                        )
+                        if outside and not visible[index]:
+                            visible[index] = True
+                            entry_face[index] = face
+                            travelled[index] = 1 << (face ^ 1)
+                            queue[tail] = index
+                            tail += 1
+
+    while head < tail:
+        index = queue[head]
+        head += 1
+
+        x = index % WORLD_W
+        z = index // WORLD_W % WORLD_D
+        y = index // WORLD_AREA
+
+        for face in range(6):
+            if travelled[index] >> (face ^ 1) & 1:
+                continue
+            entry = entry_face[index]
+            if entry >= 0 and not face_links[index, entry] >> face & 1:
+                continue
+
+            nx = x + FACE_DIRS[face, 0]
+            ny = y + FACE_DIRS[face, 1]
+            nz = z + FACE_DIRS[face, 2]
+            if not (0 <= nx < WORLD_W and 0 <= ny < WORLD_H and 0 <= nz < WORLD_D):
+                continue
+
+            n_index = nx + WORLD_W * nz + WORLD_AREA * ny
+            if visible[n_index] or not frustum_mask[n_index]:
+                continue
+
+            visible[n_index] = True
+            entry_face[n_index] = face ^ 1
+            travelled[n_index] = travelled[index] | (1 << face)
+            queue[tail] = n_index
+            tail += 1
+
+    return visible
+
+
+class OcclusionCuller:
+    def __init__(self, world):
+        self.world = world
+        self.face_links = np.full([WORLD_VOL, 6], ALL_FACES, dtype="uint8")
+        self.is_enabled = True
+
+        # stats of the last frame and running totals
+        self.num_frustum_visible = 0
+        self.num_occluded = 0
+        self.total_frustum_visible = 0
+        self.total_occluded = 0
+
+    def update_chunk(self, chunk):
+        if chunk.is_empty:
+            self.face_links[chunk.index] = ALL_FACES
+        else:
+            self.face_links[chunk.index] = get_face_links(chunk.voxels)
+
+    def get_traversal_mask(self, frustum):
+        # full chunk boxes: empty chunks still have to be walked through
+        centers = self.world.chunk_centers
+        candidates = np.ones(WORLD_VOL, dtype=bool)
+        indices = frustum.cull_chunks(
+            centers - H_CHUNK_SIZE, centers + H_CHUNK_SIZE, candidates
+        )
+        mask = np.zeros(WORLD_VOL, dtype=bool)
+        mask[indices] = True
+        return mask
+
+    def cull(self, visible_indices, camera):
+        """
+        Filter frustum-visible chunk indices down to those reachable from the camera.
+        """
+        self.num_frustum_visible = len(visible_indices)
+        if not self.is_enabled:
+            self.num_occluded = 0
+            return visible_indices
+
+        cam_x, cam_y, cam_z = glm.ivec3(
+            glm.floor(camera.get_camera_position() / CHUNK_SIZE)
+        )
+        mask = get_occlusion_mask(
+            self.face_links, self.get_traversal_mask(camera.frustum), cam_x, cam_y, cam_z
+        )
+        visible_indices = visible_indices[mask[visible_indices]]
+
+        self.num_occluded = self.num_frustum_visible - len(visible_indices)
+        self.total_frustum_visible += self.num_frustum_visible
+        self.total_occluded += self.num_occluded
+        return visible_indices
+
+    def toggle(self):
+        self.is_enabled = not self.is_enabled
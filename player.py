@@ -1,14 +1,18 @@
 import pygame as pg
 import glm
 from camera import Camera
+from flythrough import FlythroughRecorder
+from collision import move_box, box_overlaps_solid, push_out_up
 from settings import *
 
-GRAVITY = 0.1
+GRAVITY = 28.0  # blocks per second^2
+MAX_FALL_SPEED = 50.0
 PLAYER_HALF_WIDTH = 0.2
 PLAYER_HEIGHT = 1.8
 HALF_HEIGHT = PLAYER_HEIGHT * 0.5
-JUMP_VELOCITY = 0.05
+JUMP_VELOCITY = 8.5  # blocks per second
 EYE_OFFSET = glm.vec3(0, HALF_HEIGHT * 0.9, 0)
+HALF_EXTENTS = np.array([PLAYER_HALF_WIDTH, HALF_HEIGHT, PLAYER_HALF_WIDTH])
 
 
 # Let’s reduce the step height to half a block
@@ -18,56 +22,66 @@ STEP_OFFSET = 1
 class Player(Camera):
     def __init__(self, app, position=PLAYER_POS, yaw=-90, pitch=0):
         self.app = app
-        super().__init__(position, yaw, pitch)
+        width, height = app.win_size
+        super().__init__(position, yaw, pitch, aspect_ratio=width / height)
 
         self.velocity = glm.vec3(0, 0, 0)
+        # positions of the last two ticks, interpolated for rendering
+        self.prev_position = glm.vec3(self.position)
+        self.render_position = glm.vec3(self.position)
         self.on_ground = False
         self.gravity = True
+        self.recorder = FlythroughRecorder(self)
 
     def get_camera_position(self):
-        return self.position + EYE_OFFSET
-
-    def update(self):
-        self.keyboard_control()
-        self.mouse_control()
-        if self.gravity:
-            self.apply_gravity()
+        return self.render_position + EYE_OFFSET
+
+    def teleport(self, position):
+        super().teleport(position)
+        self.prev_position = glm.vec3(position)
+        self.render_position = glm.vec3(position)
+
+    def tick(self):
+        self.prev_position = glm.vec3(self.position)
+        # hold the player in place until the ground beneath is loaded
+        if self.app.scene.world.loader.is_ground_loaded(self.position):
+            self.keyboard_control()
+            if self.gravity:
+                self.apply_gravity()
+
+    def update(self, alpha=1.0):
+        if pg.key.get_focused():
+            self.mouse_control()
+        self.render_position = glm.mix(self.prev_position, self.position, alpha)
         super().update()
+        self.recorder.update()
+
+    def get_world_voxels(self):
+        return self.app.scene.world.voxels
+
+    def sweep(self, position, delta):
+        """
+        Move the player box from position by delta against the voxel grid.
+        Returns the new position and per-axis collision flags.
+        """
+        return move_box(
+            self.get_world_voxels(),
+            np.array(position, dtype="float64"),
+            HALF_EXTENTS,
+            np.array(delta, dtype="float64"),
+        )
 
     def apply_gravity(self):
-        dt = self.app.delta_time * 0.001
-        if not self.on_ground:
-            self.velocity.y -= GRAVITY * dt
-
-        new_position = glm.vec3(self.position)
-        new_position.y += self.velocity.y
-
-        if self.check_bounding_box_collision(new_position):
-            # partial snap
-            sign = glm.sign(self.velocity.y)
-            step_size = 0.02
-            test_y = self.position.y
-
-            while True:
-                test_y += sign * step_size
-                test_pos = glm.vec3(self.position.x, test_y, self.position.z)
-                if self.check_bounding_box_collision(test_pos):
-                    # revert
-                    test_y -= sign * step_size
-                    break
-                # break if we've reached or passed the intended new_position.y
-                if (sign < 0 and test_y <= new_position.y) or (
-                    sign > 0 and test_y >= new_position.y
-                ):
-                    break
-
-            self.position.y = test_y
-            if sign < 0:  # landed
-                self.on_ground = True
-                self.velocity.y = 0.0
-        else:
-            self.on_ground = False
-            self.position.y = new_position.y
+        dt = SIM_DT
+        # always pull down so ground contact is detected every tick
+        self.velocity.y = max(self.velocity.y - GRAVITY * dt, -MAX_FALL_SPEED)
+
+        new_position, hits = self.sweep(self.position, (0, self.velocity.y * dt, 0))
+        self.position.y = new_position[1]
+
+        self.on_ground = bool(hits[1]) and self.velocity.y < 0
+        if hits[1]:
+            self.velocity.y = 0.0
 
     def handle_event(self, event):
         if event.type == pg.MOUSEBUTTONDOWN:
@@ -78,150 +92,65 @@ class Player(Camera):
                 voxel_handler.switch_mode()
                 voxel_handler.set_voxel()
                 voxel_handler.switch_mode()
+        elif event.type == pg.KEYDOWN:
+            if event.key == pg.K_o:
+                self.app.scene.world.occlusion.toggle()
+            elif event.key == pg.K_F9:
+                self.recorder.toggle()
+            elif event.key == pg.K_F3:
+                self.app.hud.toggle()
+            elif event.key == pg.K_F8:
+                self.app.profiler.toggle()
+            elif event.key == pg.K_RIGHTBRACKET:
+                self.app.scene.world.render_distance.change(CHUNK_SIZE)
+            elif event.key == pg.K_LEFTBRACKET:
+                self.app.scene.world.render_distance.change(-CHUNK_SIZE)
+            elif event.key == pg.K_r:
+                self.app.scene.world.render_distance.toggle_adaptive()
+            elif event.key == pg.K_g:
+                self.gravity = not self.gravity
+                self.velocity.y = 0.0
 
     def move_and_slide(self, direction, velocity):
         """
-        Moves the player horizontally in separate passes for X and Z,
-        allowing 'sliding' around obstacles.
+        Moves the player horizontally, resolving X and Z against the voxels
+        so the player slides along obstacles up to the point of contact.
         Returns True if any movement happened, False if fully blocked.
         """
-        old_position = glm.vec3(self.position)
-
-        # 1) Move along X
-        self.position.x += direction.x * velocity
-        if self.check_bounding_box_collision(self.position):
-            self.position.x = old_position.x  # revert if collision
+        delta = (direction.x * velocity, 0, direction.z * velocity)
+        new_position, _ = self.sweep(self.position, delta)
 
-        # 2) Move along Z
-        self.position.z += direction.z * velocity
-        if self.check_bounding_box_collision(self.position):
-            self.position.z = old_position.z  # revert if collision
-
-        # Check if we moved at all
-        moved_dist = glm.distance(old_position, self.position)
+        moved_dist = glm.distance(self.position, glm.vec3(*new_position))
+        self.position = glm.vec3(*new_position)
         return moved_dist > 0.0001
 
     def move(self, direction, velocity):
         """
-        Attempts movement in 'direction' * velocity, with step-up logic
-        if the forward path is blocked.
+        Attempts movement in 'direction' * velocity. If the path is blocked
+        while on the ground, tries to step up at most STEP_OFFSET: lift,
+        move, then drop back down onto the step.
         """
-
-        # 1) First, try a normal move & slide
         if self.move_and_slide(direction, velocity):
-            # we successfully moved at least some of the distance
             return True
 
-        # 2) If we get here, movement is fully blocked. Attempt step-up if on ground
         if not self.on_ground:
             return False
 
-        # 3) (Same logic as before) -> check if there's actually a block in front
-        if not self.is_block_in_front(direction, velocity):
+        lifted, _ = self.sweep(self.position, (0, STEP_OFFSET, 0))
+        delta = (direction.x * velocity, 0, direction.z * velocity)
+        moved, _ = self.sweep(lifted, delta)
+        if abs(moved[0] - lifted[0]) + abs(moved[2] - lifted[2]) < 0.0001:
             return False
 
-        current_foot_y = self.position.y - HALF_HEIGHT
-        front_floor_y = self.get_front_floor_height(direction, velocity)
-        slope = front_floor_y - current_foot_y
-
-        if 0 < slope <= STEP_OFFSET:
-            # Try stepping
-            step_pos = glm.vec3(self.position)
-            step_pos.y += slope
-
-            # Check overhead collision
-            if self.check_bounding_box_collision(step_pos):
-                return False
-
-            # Move horizontally from stepped position, again with move_and_slide
-            old_y = self.position.y
-            self.position.y += slope
-            if not self.move_and_slide(direction, velocity):
-                # revert to old Y
-                self.position.y = old_y
-                return False
-
-            return True
-
-        # 4) If slope <= 0 or slope > STEP_OFFSET -> blocked
-        return False
-
-    def is_block_in_front(self, direction, velocity):
-        """
-        Checks if there's a solid block at foot level directly in front.
-        This helps confirm the collision is from an actual block in front
-        rather than an angled corner or diagonal brush.
-        """
-        voxel_handler = self.app.scene.world.voxel_handler
-
-        # For robustness, check multiple corners at foot level in front
-        foot_level_y = self.position.y - HALF_HEIGHT
-        foot_corners = [
-            glm.vec3(-PLAYER_HALF_WIDTH, 0, -PLAYER_HALF_WIDTH),
-            glm.vec3(PLAYER_HALF_WIDTH, 0, -PLAYER_HALF_WIDTH),
-            glm.vec3(PLAYER_HALF_WIDTH, 0, PLAYER_HALF_WIDTH),
-            glm.vec3(-PLAYER_HALF_WIDTH, 0, PLAYER_HALF_WIDTH),
-        ]
-
-        for corner in foot_corners:
-            corner_world = (
-                glm.vec3(self.position.x, foot_level_y, self.position.z) + corner
-            )
-            corner_in_front = corner_world + direction * velocity
-            if voxel_handler.is_colliding(corner_in_front):
-                # Return True if we find a collision in front at foot level
-                return True
-
-        return False
-
-    def get_front_floor_height(self, direction, velocity):
-        """
-        Returns the Y coordinate of the floor (block top) in front of the player,
-        at foot-level XZ + direction * velocity. If no block is found,
-        returns the player's current foot level (meaning it's flat/downhill).
-
-        This requires a function like 'voxel_handler.get_floor_height(x, z)'
-        which you would implement to look up or raycast the top surface.
-        """
-        voxel_handler = self.app.scene.world.voxel_handler
-
-        # XZ in front
-        foot_level_pos = glm.vec3(
-            self.position.x, self.position.y - HALF_HEIGHT, self.position.z
-        )
-        front_xz = foot_level_pos + direction * velocity
-        x, z = front_xz.x, front_xz.z
-
-        # Hypothetical function: get the terrain's top Y at (x, z)
-        # If your voxel system doesn't have such a function,
-        # you'll need to implement a raycast or block lookup yourself.
-        floor_y = voxel_handler.get_floor_height(x, z)
-
-        # If we fail to find a block (e.g. air), return current foot level
-        if floor_y is None:
-            return foot_level_pos.y
-
-        return floor_y
+        dropped, _ = self.sweep(moved, (0, self.position.y - lifted[1], 0))
+        self.position = glm.vec3(*dropped)
+        return True
 
     def check_bounding_box_collision(self, test_pos):
-        voxel_handler = self.app.scene.world.voxel_handler
-
-        corners = [
-            glm.vec3(-PLAYER_HALF_WIDTH, -HALF_HEIGHT, -PLAYER_HALF_WIDTH),
-            glm.vec3(PLAYER_HALF_WIDTH, -HALF_HEIGHT, -PLAYER_HALF_WIDTH),
-            glm.vec3(PLAYER_HALF_WIDTH, -HALF_HEIGHT, PLAYER_HALF_WIDTH),
-            glm.vec3(-PLAYER_HALF_WIDTH, -HALF_HEIGHT, PLAYER_HALF_WIDTH),
-            glm.vec3(-PLAYER_HALF_WIDTH, HALF_HEIGHT, -PLAYER_HALF_WIDTH),
-            glm.vec3(PLAYER_HALF_WIDTH, HALF_HEIGHT, -PLAYER_HALF_WIDTH),
-            glm.vec3(PLAYER_HALF_WIDTH, HALF_HEIGHT, PLAYER_HALF_WIDTH),
-            glm.vec3(-PLAYER_HALF_WIDTH, HALF_HEIGHT, PLAYER_HALF_WIDTH),
-        ]
-
-        for corner_offset in corners:
-            corner_world_pos = test_pos + corner_offset
-            if voxel_handler.is_colliding(corner_world_pos):
-                return True
-        return False
+        pos = np.array(test_pos, dtype="float64")
+        return box_overlaps_solid(
+            self.get_world_voxels(), pos - HALF_EXTENTS, pos + HALF_EXTENTS
+        )
 
     # Movement helpers
     def move_left(self, velocity):
@@ -265,7 +194,7 @@ class Player(Camera):
 
     def keyboard_control(self):
         key_state = pg.key.get_pressed()
-        vel = PLAYER_SPEED * self.app.delta_time
+        vel = PLAYER_SPEED * SIM_DT
         sprint_mult = 2.5 if key_state[pg.K_LSHIFT] else 1.0
 
         if key_state[pg.K_w]:
@@ -301,20 +230,21 @@ class Player(Camera):
             voxel_handler.set_voxel_type(WOOD)
         elif key_state[pg.K_8]:
             voxel_handler.set_voxel_type(GREEN_LEAF)
-
-        # Toggle gravity
-        if key_state[pg.K_g]:
-            self.gravity = not self.gravity
+        elif key_state[pg.K_9]:
+            voxel_handler.set_voxel_type(LAMP)
+        elif key_state[pg.K_0]:
+            voxel_handler.set_voxel_type(WATER)
 
 
-def snap_to_ground(player, step=0.1, max_iterations=256):
+def snap_to_ground(player, max_dist=256):
     """
     Utility function to ensure the player's bounding box
     is above terrain at spawn. Moves up until no collision.
     """
-    count = 0
-    while count < max_iterations:
-        if not player.check_bounding_box_collision(player.position):
-            break
-        player.position.y += step
-        count += 1
+    pos = push_out_up(
+        player.get_world_voxels(),
+        np.array(player.position, dtype="float64"),
+        HALF_EXTENTS,
+        max_dist,
+    )
+    player.teleport(glm.vec3(*pos))
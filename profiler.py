@@ -0,0 +1,225 @@
+import json
+import time
+from settings import *
+
+
+class NullZone:
+    # what Profiler.zone returns while the profiler is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_ZONE = NullZone()
+
+# trace tracks (Chrome trace thread ids)
+CPU_TRACK, GPU_TRACK = 0, 1
+
+
+class Profiler:
+    """
+    Named, nestable timing zones recorded into a fixed-size ring buffer, so
+    the last PROFILE_RING_SIZE zones are kept at a constant cost per zone.
+    Off by default (F8 toggles, and stopping writes a Chrome trace to
+    PROFILE_FILE for chrome://tracing or Perfetto). While off, zone() is a
+    shared no-op context manager.
+
+        with app.profiler.zone("render"):
+            ...
+    """
+
+    def __init__(self, size=PROFILE_RING_SIZE):
+        self.size = size
+        self.is_enabled = False
+
+        # ring buffer of finished zones
+        self.starts = np.zeros(size, dtype=np.int64)  # ns
+        self.durations = np.zeros(size, dtype=np.int64)  # ns
+        self.name_ids = np.zeros(size, dtype=np.int32)
+        self.frames = np.zeros(size, dtype=np.int64)
+        self.tracks = np.zeros(size, dtype=np.int8)
+        self.num_records = 0
+
+        self.names = []
+        self.name_to_id = {}
+        # (name id, start) of the open zones, innermost last
+        self.stack = []
+        self.pending_name_id = 0
+        self.frame = 0
+
+    def toggle(self, file_path=PROFILE_FILE):
+        if self.is_enabled:
+            self.export_chrome_trace(file_path)
+        else:
+            self.clear()
+        self.is_enabled = not self.is_enabled
+
+    def clear(self):
+        self.num_records = 0
+        self.stack = []
+
+    def begin_frame(self):
+        self.frame += 1
+
+    def get_name_id(self, name):
+        name_id = self.name_to_id.get(name)
+        if name_id is None:
+            name_id = self.name_to_id[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def zone(self, name):
+        if not self.is_enabled:
+            return NULL_ZONE
+        self.pending_name_id = self.get_name_id(name)
+        return self
+
+    def add_record(self, name_id, start, duration, frame, track=CPU_TRACK):
+        i = self.num_records % self.size
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.name_ids[i] = name_id
+        self.frames[i] = frame
+        self.tracks[i] = track
+        self.num_records += 1
+
+    def __enter__(self):
+        self.stack.append((self.pending_name_id, time.perf_counter_ns()))
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        # zones opened before a toggle mid-frame have no entry
+        if self.stack:
+            name_id, start = self.stack.pop()
+            self.add_record(name_id, start, end - start, self.frame)
+        return False
+
+    def get_records(self):
+        # indices of the kept records, oldest first
+        if self.num_records <= self.size:
+            return np.arange(self.num_records)
+        return (np.arange(self.size) + self.num_records) % self.size
+
+    def get_zone_times(self):
+        # total ms per zone name over the kept records
+        records = self.get_records()
+        totals = np.bincount(
+            self.name_ids[records],
+            weights=self.durations[records],
+            minlength=len(self.names),
+        )
+        return {name: totals[i] * 1e-6 for i, name in enumerate(self.names)}
+
+    def export_chrome_trace(self, file_path):
+        records = self.get_records()
+        events = [
+            {
+                "name": self.names[self.name_ids[i]],
+                "ph": "X",
+                "ts": self.starts[i] / 1000,
+                "dur": self.durations[i] / 1000,
+                "pid": 0,
+                "tid": int(self.tracks[i]),
+                "args": {"frame": int(self.frames[i])},
+            }
+            for i in records
+        ]
+        num_zones = len(events)
+        # track names
+        for tid, name in ((CPU_TRACK, "CPU"), (GPU_TRACK, "GPU")):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 0,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        with open(file_path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        print(f"Saved {num_zones} profiler zones to {file_path}")
+
+
+class GpuTimer:
+    """
+    GPU time of render passes from time-elapsed queries. Reading a query
+    result waits for the GPU, so every pass cycles through GPU_TIMER_LATENCY
+    queries and reads the result of the one it is about to reuse, issued that
+    many frames ago and finished by now. Timing runs while the profiler
+    records (the passes then show up on a GPU track of the trace, at the CPU
+    time they were issued) or when is_enabled is set.
+
+        with app.gpu_timer.zone("chunks"):
+            ...
+
+    Each pass must be timed once per frame and passes can't nest, only one
+    time-elapsed query can be active at a time.
+    """
+
+    def __init__(self, ctx, profiler, latency=GPU_TIMER_LATENCY):
+        self.ctx = ctx
+        self.profiler = profiler
+        self.latency = latency
+        self.is_enabled = False
+        self.frame = 0
+
+        # pass name -> queries, and the (frame, cpu start) each was issued at
+        self.queries = {}
+        self.issued = {}
+
+        # pass name -> last result and total since clear(), in ms
+        self.times = {}
+        self.totals = {}
+        self.counts = {}
+
+    def begin_frame(self):
+        self.frame += 1
+
+    def clear(self):
+        self.times, self.totals, self.counts = {}, {}, {}
+
+    def zone(self, name):
+        if not (self.is_enabled or self.profiler.is_enabled):
+            return NULL_ZONE
+        if name not in self.queries:
+            self.queries[name] = [
+                self.ctx.query(time=True) for _ in range(self.latency)
+            ]
+            self.issued[name] = [None] * self.latency
+
+        slot = self.frame % self.latency
+        self.read(name, slot)
+        self.issued[name][slot] = (self.frame, time.perf_counter_ns())
+        return self.queries[name][slot]
+
+    def read(self, name, slot):
+        if self.issued[name][slot] is None:
+            return
+        frame, start = self.issued[name][slot]
+        self.issued[name][slot] = None
+        elapsed = self.queries[name][slot].elapsed  # ns
+
+        time_ms = elapsed * 1e-6
+        self.times[name] = time_ms
+        self.totals[name] = self.totals.get(name, 0.0) + time_ms
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.profiler.is_enabled:
+            name_id = self.profiler.get_name_id(f"gpu {name}")
+            self.profiler.add_record(name_id, start, elapsed, frame, GPU_TRACK)
+
+    def flush(self):
+        # read every outstanding query, waits for the GPU
+        for name in self.queries:
+            for slot in range(self.latency):
+                self.read(name, slot)
+
+    def get_zone_times(self):
+        # total ms per pass, like Profiler.get_zone_times
+        return dict(self.totals)
+
+    def get_mean_times(self):
+        return {name: self.totals[name] / self.counts[name] for name in self.totals}
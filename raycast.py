@@ -0,0 +1,85 @@
+from settings import *
+from meshes.chunk_mesh_builder import get_voxel_id_at
+
+NO_HIT = 1e30
+
+
+@njit
+def ray_cast_single(world_voxels, origin, direction, max_dist, hit_pos, normal):
+    """
+    Voxel grid traversal (DDA) of one ray. Writes the hit voxel position and
+    the normal of the face it entered through into hit_pos and normal.
+    Returns (voxel_id, distance), voxel_id 0 if nothing was hit within max_dist.
+    """
+    length = math.sqrt(direction[0] ** 2 + direction[1] ** 2 + direction[2] ** 2)
+    if length == 0.0:
+        return 0, -1.0
+
+    pos = np.empty(3, dtype=np.int64)
+    step = np.zeros(3, dtype=np.int64)
+    t_delta = np.full(3, NO_HIT)
+    t_max = np.full(3, NO_HIT)
+
+    for i in range(3):
+        d = direction[i] / length
+        pos[i] = int(math.floor(origin[i]))
+        if d > 0:
+            step[i] = 1
+            t_delta[i] = 1.0 / d
+            t_max[i] = (pos[i] + 1 - origin[i]) * t_delta[i]
+        elif d < 0:
+            step[i] = -1
+            t_delta[i] = -1.0 / d
+            t_max[i] = (origin[i] - pos[i]) * t_delta[i]
+
+    t = 0.0
+    axis = -1
+    while t <= max_dist:
+        voxel_id = get_voxel_id_at(world_voxels, pos[0], pos[1], pos[2])
+        if BLOCK_SOLID[voxel_id]:
+            for i in range(3):
+                hit_pos[i] = pos[i]
+                normal[i] = 0
+            if axis >= 0:
+                normal[axis] = -step[axis]
+            return voxel_id, t
+
+        # advance along whichever t_max is smallest
+        if t_max[0] < t_max[1]:
+            axis = 0 if t_max[0] < t_max[2] else 2
+        else:
+            axis = 1 if t_max[1] < t_max[2] else 2
+
+        pos[axis] += step[axis]
+        t = t_max[axis]
+        t_max[axis] += t_delta[axis]
+
+    return 0, -1.0
+
+
+@njit
+def ray_cast_batch(world_voxels, origins, directions, max_dist):
+    """
+    Cast N rays given as (N, 3) origins and directions.
+    Returns hit voxel positions (N, 3), face normals (N, 3), voxel ids (N,)
+    and hit distances (N,); rays that hit nothing have id 0 and distance -1.
+    """
+    num_rays = len(origins)
+    hit_positions = np.zeros((num_rays, 3), dtype=np.int32)
+    normals = np.zeros((num_rays, 3), dtype=np.int32)
+    voxel_ids = np.zeros(num_rays, dtype=np.uint8)
+    distances = np.full(num_rays, -1.0, dtype=np.float32)
+
+    for i in range(num_rays):
+        voxel_id, dist = ray_cast_single(
+            world_voxels,
+            origins[i],
+            directions[i],
+            max_dist,
+            hit_positions[i],
+            normals[i],
+        )
+        voxel_ids[i] = voxel_id
+        distances[i] = dist
+
+    return hit_positions, normals, voxel_ids, distances
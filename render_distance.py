@@ -0,0 +1,37 @@
+from settings import *
+
+
+class RenderDistance:
+    """
+    Radius beyond which chunks are skipped. The chunk shader fades into
+    bg_color towards it, so the cut is hidden in the fog. In adaptive mode
+    the radius shrinks or grows to hold TARGET_FRAME_TIME.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.value = RENDER_DIST
+        self.is_adaptive = ADAPTIVE_RENDER_DIST
+        # smoothed frame time in ms
+        self.frame_time = TARGET_FRAME_TIME
+
+    def set(self, value):
+        self.value = glm.clamp(value, MIN_RENDER_DIST, MAX_RENDER_DIST)
+        self.app.shader_program.chunk["render_dist"] = self.value
+        self.app.shader_program.water["render_dist"] = self.value
+
+    def change(self, delta):
+        self.set(self.value + delta)
+
+    def toggle_adaptive(self):
+        self.is_adaptive = not self.is_adaptive
+
+    def update(self):
+        self.frame_time = glm.mix(self.frame_time, self.app.delta_time, 0.05)
+        if not self.is_adaptive:
+            return
+
+        if self.frame_time > TARGET_FRAME_TIME * 1.1:
+            self.change(-RENDER_DIST_STEP)
+        elif self.frame_time < TARGET_FRAME_TIME * 0.8:
+            self.change(RENDER_DIST_STEP)
@@ -0,0 +1,57 @@
+from settings import *
+
+
+class RenderStats:
+    """
+    Per-frame render counters, reset at the start of every frame, and a ring
+    of the last HUD_FRAME_HISTORY frame times.
+    """
+
+    def __init__(self):
+        self.chunks_considered = 0
+        self.chunks_frustum_visible = 0
+        self.chunks_drawn = 0
+        self.draw_calls = 0
+        self.vertices = 0
+        self.uniform_writes = 0
+        self.pending_meshes = 0
+
+        self.frame_times = np.zeros(HUD_FRAME_HISTORY, dtype="float32")  # ms
+        self.num_frames = 0
+
+    def begin_frame(self):
+        self.chunks_considered = 0
+        self.chunks_frustum_visible = 0
+        self.chunks_drawn = 0
+        self.draw_calls = 0
+        self.vertices = 0
+        self.uniform_writes = 0
+        self.pending_meshes = 0
+
+    def add_draw(self, num_vertices):
+        self.draw_calls += 1
+        self.vertices += num_vertices
+
+    def add_uniform_writes(self, num_writes=1):
+        self.uniform_writes += num_writes
+
+    def add_frame_time(self, frame_time):
+        self.frame_times[self.num_frames % HUD_FRAME_HISTORY] = frame_time
+        self.num_frames += 1
+
+    def get_frame_times(self):
+        # kept frame times, oldest first
+        if self.num_frames < HUD_FRAME_HISTORY:
+            return self.frame_times[: self.num_frames]
+        return np.roll(self.frame_times, -(self.num_frames % HUD_FRAME_HISTORY))
+
+    def as_dict(self):
+        return {
+            "chunks_considered": self.chunks_considered,
+            "chunks_frustum_visible": self.chunks_frustum_visible,
+            "chunks_drawn": self.chunks_drawn,
+            "draw_calls": self.draw_calls,
+            "vertices": self.vertices,
+            "uniform_writes": self.uniform_writes,
+            "pending_meshes": self.pending_meshes,
+        }
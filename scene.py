@@ -4,6 +4,7 @@ from world import World
 from world_objects.voxel_marker import VoxelMarker
 from world_objects.water import Water
 from world_objects.clouds import Clouds
+from entities import EntitySystem
 
 
 class Scene:
@@ -13,21 +14,42 @@ class Scene:
         self.voxel_marker = VoxelMarker(self.world.voxel_handler)
         self.water = Water(app)
         self.clouds = Clouds(app)
+        self.entities = EntitySystem(self.world)
+        # the cloud mesh is built once the chunks have been loaded
+        self.world.loader.add_task(self.clouds.build_mesh)
+
+    def tick(self):
+        self.world.tick()
+        with self.app.profiler.zone("entities"):
+            self.entities.tick()
+        self.voxel_marker.update()
 
     def update(self):
         self.world.update()
-        self.voxel_marker.update()
-        self.clouds.update()
+        with self.app.profiler.zone("clouds"):
+            self.clouds.update()
+
+    def release(self):
+        self.world.release()
+        if self.clouds.mesh is not None:
+            self.clouds.mesh.release()
+        self.water.mesh.release()
+        self.voxel_marker.mesh.release()
 
     def render(self):
+        profiler, gpu_timer = self.app.profiler, self.app.gpu_timer
         # chunks rendering
-        self.world.render()
+        with profiler.zone("World.render"), gpu_timer.zone("chunks"):
+            self.world.render()
 
         # rendering without cull face
         self.app.ctx.disable(mgl.CULL_FACE)
-        self.clouds.render()
-        self.water.render()
+        with profiler.zone("clouds"), gpu_timer.zone("clouds"):
+            self.clouds.render()
+        with profiler.zone("water"), gpu_timer.zone("water"):
+            self.water.render()
         self.app.ctx.enable(mgl.CULL_FACE)
 
         # voxel selection
-        self.voxel_marker.render()
+        with gpu_timer.zone("voxel marker"):
+            self.voxel_marker.render()
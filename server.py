@@ -0,0 +1,234 @@
+"""
+Headless world server: owns the authoritative voxels and streams chunks and
+edit deltas to clients over a local TCP or Unix socket, nearest chunks first.
+No pygame or OpenGL is needed.
+
+    python server.py [--address 127.0.0.1:25570]
+"""
+import argparse
+import os
+import selectors
+import socket
+import time
+from settings import *
+from world_objects.chunk import Chunk
+from net import *
+import voxel_query
+
+
+class ServerWorld:
+    """
+    Voxel storage of the server. Chunk columns are generated the first time
+    a client needs them, and compressed chunk payloads are cached until edited.
+    """
+
+    def __init__(self):
+        self.voxels = np.zeros([WORLD_VOL, CHUNK_VOL], dtype="uint8")
+        self.is_generated = np.zeros(WORLD_VOL, dtype=bool)
+        self.payloads = {}
+
+    def generate_column(self, x, z):
+        for y in range(WORLD_H):
+            chunk_index = x + WORLD_W * z + WORLD_AREA * y
+            Chunk.generate_terrain(
+                self.voxels[chunk_index], x * CHUNK_SIZE, y * CHUNK_SIZE, z * CHUNK_SIZE
+            )
+            self.is_generated[chunk_index] = True
+
+    def ensure_generated(self, chunk_index):
+        if not self.is_generated[chunk_index]:
+            self.generate_column(chunk_index % WORLD_W, chunk_index // WORLD_W % WORLD_D)
+
+    def get_chunk_payload(self, chunk_index):
+        payload = self.payloads.get(chunk_index)
+        if payload is None:
+            self.ensure_generated(chunk_index)
+            payload = encode_chunk(chunk_index, self.voxels[chunk_index])
+            self.payloads[chunk_index] = payload
+        return payload
+
+    def set_voxel(self, position, voxel_id):
+        """
+        Apply an edit and return the chunk index it landed in, or -1 if the
+        position is outside the world or the voxel didn't change.
+        """
+        x, y, z = position
+        if 0 <= x < WORLD_W * CHUNK_SIZE and 0 <= z < WORLD_D * CHUNK_SIZE:
+            self.ensure_generated(x // CHUNK_SIZE + WORLD_W * (z // CHUNK_SIZE))
+
+        positions = np.array([position], dtype=np.int64)
+        changed, _ = voxel_query.set_voxel_ids(
+            self.voxels, positions, np.array([voxel_id], dtype=np.uint8)
+        )
+        chunk_indices = np.flatnonzero(changed)
+        if not len(chunk_indices):
+            return -1
+        chunk_index = int(chunk_indices[0])
+        self.payloads.pop(chunk_index, None)
+        return chunk_index
+
+    def get_voxel_id(self, position):
+        positions = np.array([position], dtype=np.int64)
+        return int(voxel_query.get_voxel_ids(self.voxels, positions)[0])
+
+
+class ClientSession:
+    def __init__(self, client_id, conn):
+        self.client_id = client_id
+        self.conn = conn
+        self.column = None
+        self.is_sent = np.zeros(WORLD_VOL, dtype=bool)
+        self.stream_queue = []
+
+    def set_position(self, position):
+        column = int(position[0] // CHUNK_SIZE), int(position[2] // CHUNK_SIZE)
+        if column != self.column:
+            self.column = column
+            self.stream_queue = self.get_stream_order(*column)
+
+    def get_stream_order(self, cx, cz):
+        # unsent chunks within STREAM_RADIUS columns, sorted so the nearest
+        # is popped from the end first
+        r = STREAM_RADIUS
+        chunks = []
+        for x in range(max(cx - r, 0), min(cx + r + 1, WORLD_W)):
+            for z in range(max(cz - r, 0), min(cz + r + 1, WORLD_D)):
+                dist = (x - cx) ** 2 + (z - cz) ** 2
+                for y in range(WORLD_H):
+                    chunk_index = x + WORLD_W * z + WORLD_AREA * y
+                    if not self.is_sent[chunk_index]:
+                        chunks.append((dist, chunk_index))
+        chunks.sort(reverse=True)
+        return [chunk_index for _, chunk_index in chunks]
+
+
+class WorldServer:
+    def __init__(self, address=NET_ADDRESS):
+        self.world = ServerWorld()
+        self.sessions = {}
+        self.next_client_id = 1
+        self.is_running = True
+
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX and os.path.exists(addr):
+            os.remove(addr)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(addr)
+        self.listener.listen()
+        self.listener.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+
+        # stats
+        self.num_chunks_sent = 0
+        self.num_edits = 0
+
+    def accept(self):
+        sock, _ = self.listener.accept()
+        session = ClientSession(self.next_client_id, Connection(sock))
+        self.next_client_id += 1
+        self.sessions[sock] = session
+        self.selector.register(sock, selectors.EVENT_READ, session)
+        session.conn.send(MSG_HELLO, HELLO.pack(session.client_id))
+
+    def disconnect(self, session):
+        self.selector.unregister(session.conn.sock)
+        del self.sessions[session.conn.sock]
+        session.conn.close()
+
+    def handle_messages(self, session):
+        for msg_type, payload in session.conn.receive():
+            if msg_type == MSG_POSITION:
+                session.set_position(POSITION.unpack(payload))
+            elif msg_type == MSG_EDIT:
+                self.handle_edit(session, *EDIT.unpack(payload))
+
+    def handle_edit(self, session, seq, x, y, z, voxel_id):
+        chunk_index = self.world.set_voxel((x, y, z), voxel_id)
+        self.num_edits += 1
+
+        # the sender always gets the result, other clients only if they have the chunk
+        delta = encode_message(
+            MSG_EDIT_DELTA,
+            EDIT_DELTA.pack(
+                session.client_id, seq, x, y, z, self.world.get_voxel_id((x, y, z))
+            ),
+        )
+        session.conn.send_raw(delta)
+        if chunk_index < 0:
+            return
+        for other in self.sessions.values():
+            if other is not session and other.is_sent[chunk_index]:
+                other.conn.send_raw(delta)
+
+    def stream_chunks(self, session):
+        num_sent = 0
+        while (
+            session.stream_queue
+            and num_sent < CHUNKS_PER_TICK
+            and len(session.conn.out_buffer) < MAX_SEND_BUFFER
+        ):
+            chunk_index = session.stream_queue.pop()
+            if session.is_sent[chunk_index]:
+                continue
+            session.conn.send_raw(self.world.get_chunk_payload(chunk_index))
+            session.is_sent[chunk_index] = True
+            num_sent += 1
+        self.num_chunks_sent += num_sent
+
+    def tick(self):
+        for session in list(self.sessions.values()):
+            self.stream_chunks(session)
+            session.conn.flush()
+            if session.conn.is_closed:
+                self.disconnect(session)
+
+    def poll(self, timeout):
+        for key, _ in self.selector.select(timeout):
+            if key.fileobj is self.listener:
+                self.accept()
+                continue
+            session = key.data
+            self.handle_messages(session)
+            if session.conn.is_closed:
+                self.disconnect(session)
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while self.is_running:
+            self.poll(max(next_tick - time.perf_counter(), 0.0))
+            now = time.perf_counter()
+            if now >= next_tick:
+                self.tick()
+                # don't try to catch up on missed ticks
+                next_tick = max(next_tick + SIM_DT, now)
+
+    def close(self):
+        for session in list(self.sessions.values()):
+            self.disconnect(session)
+        self.selector.close()
+        self.listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--address", default=NET_ADDRESS, help="host:port or socket path"
+    )
+    args = parser.parse_args()
+
+    server = WorldServer(args.address)
+    print(f"serving on {args.address}")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
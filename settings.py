@@ -2,6 +2,7 @@ from numba import njit
 import numpy as np
 import glm
 import math
+import os
 
 # OpenGL settings
 MAJOR_VER, MINOR_VER = 3, 3
@@ -11,25 +12,54 @@ NUM_SAMPLES = 4  # antialiasing
 # resolution
 WIN_RES = glm.vec2(2880, 1920)
 
+# frame pacing: FPS_LIMIT = 0 renders uncapped, IDLE_FPS applies while unfocused
+FPS_LIMIT = 0
+VSYNC = False
+IDLE_FPS = 10
+
+# fixed-rate simulation (physics, input, ray casting)
+SIM_TICK_RATE = 60
+SIM_DT = 1.0 / SIM_TICK_RATE
+MAX_TICKS_PER_FRAME = 5
+MAX_FRAME_TIME = 0.25  # seconds
+
 # world generation, set to 0 for random seed
 SEED = 0
+# back the world voxels and light with this memory-mapped file (world_store.py),
+# e.g. "world.vxw"; the first run generates into it, later runs load from it
+WORLD_FILE = None
+WORLD_FLUSH_INTERVAL = 30.0  # seconds between writes of changed chunks
 
 # ray casting
 MAX_RAY_DIST = 6
 
+# chunk and world sizes are baked into the njit kernels, the VOXEL_CHUNK_SIZE,
+# VOXEL_WORLD_W and VOXEL_WORLD_H environment variables override them for a
+# fresh process (see benchmarks/sweep.py)
+
 # chunk
-CHUNK_SIZE = 48
+CHUNK_SIZE = int(os.environ.get("VOXEL_CHUNK_SIZE", 48))
 H_CHUNK_SIZE = CHUNK_SIZE // 2
 CHUNK_AREA = CHUNK_SIZE * CHUNK_SIZE
 CHUNK_VOL = CHUNK_AREA * CHUNK_SIZE
-CHUNK_SPHERE_RADIUS = H_CHUNK_SIZE * math.sqrt(3)
+# occupancy bitmask mesher, same output as the scalar one; padded columns
+# must fit in 64 bits, so CHUNK_SIZE <= 61
+BITMASK_MESHER = CHUNK_SIZE <= 61
 
 # world
-WORLD_W, WORLD_H = 20, 2
+WORLD_W = int(os.environ.get("VOXEL_WORLD_W", 20))
+WORLD_H = int(os.environ.get("VOXEL_WORLD_H", 2))
 WORLD_D = WORLD_W
 WORLD_AREA = WORLD_W * WORLD_D
 WORLD_VOL = WORLD_AREA * WORLD_H
 
+# progressive startup: columns generated before the first frame (chunks
+# around the spawn) and time budget per frame for the rest, in ms
+STARTUP_RADIUS = 1
+CHUNK_LOAD_BUDGET = 4
+# extra distance (chunks) for pipeline work outside the view frustum
+CHUNK_OFF_SCREEN_PENALTY = 4.0
+
 # world center
 CENTER_XZ = WORLD_W * H_CHUNK_SIZE
 CENTER_Y = WORLD_H * H_CHUNK_SIZE
@@ -43,13 +73,56 @@ NEAR = 0.1
 FAR = 2000.0
 PITCH_MAX = glm.radians(89)
 
+# render distance in world units, chunks beyond it fade into the fog
+RENDER_DIST = CHUNK_SIZE * 8.0
+MIN_RENDER_DIST, MAX_RENDER_DIST = CHUNK_SIZE * 2.0, CHUNK_SIZE * WORLD_W * 1.5
+FOG_START = 0.6  # fraction of the render distance where the fade starts
+# adapt the render distance to hold the target frame time (ms)
+ADAPTIVE_RENDER_DIST = False
+TARGET_FRAME_TIME = 1000 / 60
+RENDER_DIST_STEP = 1.0
+
 # player
-PLAYER_SPEED = 0.01
+PLAYER_SPEED = 10.0  # blocks per second
 PLAYER_ROT_SPEED = 0.003
 # PLAYER_POS = glm.vec3(CENTER_XZ, WORLD_H * CHUNK_SIZE, CENTER_XZ)
 PLAYER_POS = glm.vec3(CENTER_XZ, CHUNK_SIZE, CENTER_XZ)
 MOUSE_SENSITIVITY = 0.002
 
+# flythrough recording (F9 toggles)
+FLYTHROUGH_FILE = "flythrough.json"
+
+# entities
+MAX_ENTITIES = 10000
+ENTITY_CELL_SIZE = 4.0  # spatial hash cell size
+
+# networking (python server.py, then python main.py --connect ADDRESS)
+NET_ADDRESS = "127.0.0.1:25570"
+NET_COMPRESSION_LEVEL = 1
+NET_RECV_SIZE = 1 << 16
+STREAM_RADIUS = 4  # chunk columns around the player
+CHUNKS_PER_TICK = 4  # per client
+MAX_SEND_BUFFER = 1 << 20  # bytes queued per client before streaming pauses
+NET_CONNECT_TIMEOUT = 10.0  # seconds to wait for the first chunks
+
+# performance HUD (F3 toggles)
+HUD_FRAME_HISTORY = 240  # frame times kept for the graph
+
+# frame profiler (F8 toggles, stopping writes a Chrome trace)
+PROFILE_FILE = "profile.json"
+PROFILE_RING_SIZE = 1 << 16  # zones kept
+GPU_TIMER_LATENCY = 4  # frames before a GPU timer query is read back
+
+# memory accounting (memory.py)
+MEMORY_LOG_FILE = "memory.log"
+MEMORY_LOG_INTERVAL = 10.0  # seconds between log lines
+# cpu + gpu bytes per category
+MEMORY_BUDGETS = {
+    "buffer_pool": 64 * 1024 * 1024,  # released vertex buffers kept for reuse
+    "chunk_vbo": 512 * 1024 * 1024,
+    "mesh_scratch": 128 * 1024 * 1024,
+}
+
 # colors
 BG_COLOR = glm.vec3(0.58, 0.83, 0.99)
 
@@ -62,6 +135,37 @@ SNOW = 5
 LEAVES = 6
 WOOD = 7
 GREEN_LEAF = 8
+LAMP = 9
+
+# water: one voxel id per flow level 1..WATER_LEVELS, the last one is a source
+WATER_BASE = 10
+WATER_LEVELS = 8
+WATER = WATER_BASE + WATER_LEVELS - 1
+
+# voxels that block movement, ray casts and light; the rest are see-through
+BLOCK_SOLID = np.ones(256, dtype=np.bool_)
+BLOCK_SOLID[0] = False
+BLOCK_SOLID[WATER_BASE : WATER_BASE + WATER_LEVELS] = False
+
+# lighting: sky and block light levels 0..MAX_LIGHT
+MAX_LIGHT = 15
+BLOCK_EMISSION = np.zeros(256, dtype=np.uint8)
+BLOCK_EMISSION[LAMP] = MAX_LIGHT
+
+# top-down map (map_tiles.py): colour per voxel id, and the brightness of the
+# lowest ground, the highest is at full brightness
+BLOCK_MAP_COLOR = np.zeros((256, 3), dtype=np.uint8)
+BLOCK_MAP_COLOR[SAND] = (219, 203, 150)
+BLOCK_MAP_COLOR[GRASS] = (96, 160, 64)
+BLOCK_MAP_COLOR[DIRT] = (134, 96, 67)
+BLOCK_MAP_COLOR[STONE] = (125, 125, 125)
+BLOCK_MAP_COLOR[SNOW] = (240, 245, 250)
+BLOCK_MAP_COLOR[LEAVES] = (230, 150, 190)
+BLOCK_MAP_COLOR[WOOD] = (102, 81, 51)
+BLOCK_MAP_COLOR[GREEN_LEAF] = (60, 120, 40)
+BLOCK_MAP_COLOR[LAMP] = (255, 220, 120)
+BLOCK_MAP_COLOR[WATER_BASE : WATER_BASE + WATER_LEVELS] = (50, 100, 200)
+MAP_SHADE_MIN = 0.5
 
 
 # terrain levels
@@ -79,6 +183,19 @@ TREE_H_WIDTH, TREE_H_HEIGHT = TREE_WIDTH // 2, TREE_HEIGHT // 2
 # water
 WATER_LINE = 5.6
 WATER_AREA = 5 * CHUNK_SIZE * WORLD_W
+SEA_LEVEL = math.ceil(WATER_LINE)  # voxels below are generated as water
+WATER_TICK_INTERVAL = 5  # simulation ticks per water update
+WATER_TICK_BUDGET = 4096  # cells updated per water update
+
+# block ticks: scheduled updates (falling sand) and random ticks (growth, decay)
+BLOCK_FALLS = np.zeros(256, dtype=np.bool_)
+BLOCK_FALLS[SAND] = True
+FALL_DELAY = 3  # simulation ticks per voxel fallen
+BLOCK_TICK_BUDGET = 512  # scheduled updates per simulation tick
+RANDOM_TICKS_PER_CHUNK = 32  # random voxels sampled per chunk per simulation tick
+RANDOM_TICK_RADIUS = 2  # chunk columns around the player that get random ticks
+GRASS_MIN_LIGHT = 9  # light level above dirt needed for grass to spread onto it
+LEAF_DECAY_RADIUS = 4  # leaves without wood this close decay
 
 # cloud
 CLOUD_SCALE = 25
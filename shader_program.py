@@ -22,6 +22,8 @@ class ShaderProgram:
         self.chunk["u_texture_array_0"] = 1
         self.chunk["bg_color"].write(BG_COLOR)
         self.chunk["water_line"] = WATER_LINE
+        self.chunk["render_dist"] = RENDER_DIST
+        self.chunk["fog_start"] = FOG_START
 
         # marker
         self.voxel_marker["m_proj"].write(self.player.m_proj)
@@ -33,6 +35,8 @@ class ShaderProgram:
         self.water["u_texture_0"] = 2
         self.water["water_area"] = WATER_AREA
         self.water["water_line"] = WATER_LINE
+        self.water["render_dist"] = RENDER_DIST
+        self.water["fog_start"] = FOG_START
 
         # clouds
         self.clouds["m_proj"].write(self.player.m_proj)
@@ -44,8 +48,10 @@ class ShaderProgram:
 
     def update(self):
         self.chunk["m_view"].write(self.player.m_view)
+        self.chunk["cam_pos"].write(self.player.get_camera_position())
         self.voxel_marker["m_view"].write(self.player.m_view)
         self.water["m_view"].write(self.player.m_view)
+        self.water["cam_pos"].write(self.player.get_camera_position())
         self.clouds["m_view"].write(self.player.m_view)
 
     def get_program(self, shader_name):
@@ -8,9 +8,13 @@ const vec3 inv_gamma = 1 / gamma;
 uniform sampler2DArray u_texture_array_0;
 uniform vec3 bg_color;
 uniform float water_line;
+uniform float render_dist;
+uniform float fog_start;
+uniform vec3 cam_pos;
 
 in vec2 uv;
 in float shading;
+in vec3 light_color;
 in vec3 frag_world_pos;
 
 flat in int face_id;
@@ -24,14 +28,18 @@ void main() {
     vec3 tex_col = texture(u_texture_array_0, vec3(face_uv, voxel_id)).rgb;
     tex_col = pow(tex_col, gamma);
 
-    tex_col *= shading;
+    tex_col *= shading * light_color;
 
     // underwater effect
     if (frag_world_pos.y < water_line) tex_col *= vec3(0.0, 0.3, 1.0);
 
     //fog
     float fog_dist = gl_FragCoord.z / gl_FragCoord.w;
-    tex_col = mix(tex_col, bg_color, (1.0 - exp2(-0.00001 * fog_dist * fog_dist)));
+    float fog = 1.0 - exp2(-0.00001 * fog_dist * fog_dist);
+    // fade out completely at the render distance so culled chunks don't pop
+    float cam_dist = length(frag_world_pos - cam_pos);
+    fog = max(fog, smoothstep(fog_start * render_dist, render_dist, cam_dist));
+    tex_col = mix(tex_col, bg_color, fog);
 
     tex_col = pow(tex_col, inv_gamma);
     fragColor = vec4(tex_col, 1.0);
@@ -1,6 +1,7 @@
 #version 330 core
 
 layout (location = 0) in uint packed_data;
+layout (location = 1) in uint light_data;
 
 int x, y, z;
 int ao_id;
@@ -16,6 +17,7 @@ flat out int face_id;
 //out vec3 voxel_color;
 out vec2 uv;
 out float shading;
+out vec3 light_color;
 out vec3 frag_world_pos;
 
 const float ao_values[4] = float[4](0.1, 0.25, 0.5, 1.0);
@@ -26,6 +28,9 @@ const float face_shading[6] = float[6](
     0.5, 0.8   // front back
 );
 
+const float min_light = 0.03;
+const vec3 block_light_tint = vec3(1.0, 0.85, 0.6);
+
 const vec2 uv_coords[4] = vec2[4](
     vec2(0, 0), vec2(0, 1),
     vec2(1, 0), vec2(1, 1)
@@ -68,6 +73,12 @@ void unpack(uint packed_data) {
 }
 
 
+float get_brightness(uint level) {
+    // each light level is 80% as bright as the one above
+    return pow(0.8, 15.0 - float(level));
+}
+
+
 void main() {
     unpack(packed_data);
 
@@ -78,6 +89,11 @@ void main() {
 
     shading = face_shading[face_id] * ao_values[ao_id];
 
+    float sky_light = get_brightness((light_data >> 4u) & 15u);
+    float block_light = get_brightness(light_data & 15u);
+    light_color = max(vec3(sky_light), block_light * block_light_tint);
+    light_color = max(light_color, vec3(min_light));
+
     frag_world_pos = (m_model * vec4(in_position, 1.0)).xyz;
 
     gl_Position = m_proj * m_view * vec4(frag_world_pos, 1.0);
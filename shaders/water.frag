@@ -6,9 +6,13 @@ const vec3 gamma = vec3(2.2);
 const vec3 inv_gamma = 1 / gamma;
 
 in vec2 uv;
+in vec3 frag_world_pos;
 
 uniform sampler2D u_texture_0;
 uniform float water_line;
+uniform float render_dist;
+uniform float fog_start;
+uniform vec3 cam_pos;
 
 
 void main() {
@@ -18,6 +22,8 @@ void main() {
     // fog
     float fog_dist = gl_FragCoord.z / gl_FragCoord.w;
     float alpha = mix(0.5, 0.0, 1.0 - exp(-0.000002 * fog_dist * fog_dist));
+    float cam_dist = length(frag_world_pos - cam_pos);
+    alpha *= 1.0 - smoothstep(fog_start * render_dist, render_dist, cam_dist);
 
     // gamma corretion
     tex_col = pow(tex_col, inv_gamma);
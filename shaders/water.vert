@@ -10,6 +10,7 @@ uniform int water_area;
 uniform float water_line;
 
 out vec2 uv;
+out vec3 frag_world_pos;
 
 
 void main() {
@@ -19,5 +20,6 @@ void main() {
 
     pos.y += water_line;
     uv = in_tex_coord * water_area;
+    frag_world_pos = pos;
     gl_Position = m_proj * m_view * vec4(pos, 1.0);
 }
\ No newline at end of file
@@ -73,13 +73,51 @@ def set_voxel_id(voxels, x, y, z, wx, wy, wz, world_height):
     # setting ID
     voxels[get_index(x, y, z)] = voxel_id
 
-    # randomly place a pink or green tree
-    if wy < DIRT_LVL:
-        rando = np.random.randint(0, 2)
-        if rando == 0:
-            place_pink_tree(voxels, x, y, z, voxel_id)
-        elif rando == 1:
-            place_green_tree(voxels, x, y, z, voxel_id)
+
+@njit
+def get_heightmap(cx, cz):
+    # terrain height per local (x, z) of the chunk column at world (cx, cz)
+    heightmap = np.empty((CHUNK_SIZE, CHUNK_SIZE), dtype=np.int32)
+    for x in range(CHUNK_SIZE):
+        for z in range(CHUNK_SIZE):
+            heightmap[x, z] = get_height(x + cx, z + cz)
+    return heightmap
+
+
+@njit
+def fill_terrain(voxels, cx, cy, cz, heightmap):
+    for x in range(CHUNK_SIZE):
+        wx = x + cx
+        for z in range(CHUNK_SIZE):
+            wz = z + cz
+            world_height = heightmap[x, z]
+            local_height = min(world_height - cy, CHUNK_SIZE)
+
+            for y in range(local_height):
+                wy = y + cy
+                set_voxel_id(voxels, x, y, z, wx, wy, wz, world_height)
+
+            # fill the sea up to SEA_LEVEL with still water
+            for y in range(max(local_height, 0), min(SEA_LEVEL - cy, CHUNK_SIZE)):
+                voxel_index = get_index(x, y, z)
+                if not voxels[voxel_index]:
+                    voxels[voxel_index] = WATER
+
+
+@njit
+def decorate(voxels, cy, heightmap):
+    # randomly place a pink or green tree on the surface voxels
+    for x in range(CHUNK_SIZE):
+        for z in range(CHUNK_SIZE):
+            wy = heightmap[x, z] - 1
+            y = wy - cy
+            if not 0 <= y < CHUNK_SIZE or wy >= DIRT_LVL:
+                continue
+            voxel_id = voxels[get_index(x, y, z)]
+            if np.random.randint(0, 2) == 0:
+                place_pink_tree(voxels, x, y, z, voxel_id)
+            else:
+                place_green_tree(voxels, x, y, z, voxel_id)
 
 
 # @njit
@@ -182,3 +220,28 @@ def place_green_tree(voxels, x, y, z, voxel_id):
 
     # top
     voxels[get_index(x, y + TREE_HEIGHT - 2, z)] = GREEN_LEAF
+
+
+def get_chunk_position(chunk_index):
+    x = chunk_index % WORLD_W
+    z = chunk_index // WORLD_W % WORLD_D
+    y = chunk_index // WORLD_AREA
+    return x, y, z
+
+
+def generate_world_voxels():
+    """
+    Generate the voxels of the whole world at once, without a window or GL
+    context, running the generation stages of ChunkLoader per chunk column.
+    Use a fixed SEED in settings.py for reproducible worlds.
+    """
+    voxels = np.zeros([WORLD_VOL, CHUNK_VOL], dtype="uint8")
+    for column in range(WORLD_AREA):
+        x, _, z = get_chunk_position(column)
+        cx, cz = x * CHUNK_SIZE, z * CHUNK_SIZE
+        heightmap = get_heightmap(cx, cz)
+        for y in range(WORLD_H):
+            chunk_voxels = voxels[column + WORLD_AREA * y]
+            fill_terrain(chunk_voxels, cx, y * CHUNK_SIZE, cz, heightmap)
+            decorate(chunk_voxels, y * CHUNK_SIZE, heightmap)
+    return voxels
@@ -1,11 +1,16 @@
+from settings import *
 import pygame as pg
 import moderngl as mgl
 
+LAMP_TINT = (90, 70, 20)
+
 
 class Textures:
     def __init__(self, app):
         self.app = app
         self.ctx = app.ctx
+        # block texture array with the generated layers, as a pygame surface
+        self.block_surface = None
 
         # load textures
         self.texture_0 = self.load("frame.png")
@@ -17,11 +22,42 @@ class Textures:
         self.texture_array_0.use(location=1)
         self.texture_1.use(location=2)
 
+    def add_generated_layers(self, texture):
+        """
+        The atlas has no lamp or water layers yet: append a brightened copy of
+        sand for the lamp, and the water texture for every water level.
+        """
+        width, height = texture.get_size()
+        layer_height = width // 3
+        num_layers = WATER_BASE + WATER_LEVELS
+
+        surface = pg.Surface((width, num_layers * layer_height), pg.SRCALPHA)
+        surface.blit(texture, (0, 0))
+
+        lamp_rect = pg.Rect(0, LAMP * layer_height, width, layer_height)
+        sand_rect = pg.Rect(0, SAND * layer_height, width, layer_height)
+        surface.blit(texture, lamp_rect, area=sand_rect)
+        surface.fill(LAMP_TINT, rect=lamp_rect, special_flags=pg.BLEND_RGB_ADD)
+
+        water = pg.image.load("assets/water.png")
+        water = pg.transform.scale(water, (layer_height, layer_height))
+        for voxel_id in range(WATER_BASE, num_layers):
+            for i in range(3):  # top, bottom and side faces
+                surface.blit(water, (i * layer_height, voxel_id * layer_height))
+        return surface
+
+    def get_block_face(self, voxel_id):
+        # a face of the block's layer, e.g. for blocks without an icon file
+        size = self.block_surface.get_width() // 3
+        return self.block_surface.subsurface((0, voxel_id * size, size, size))
+
     def load(self, file_name, is_tex_array=False):
         texture = pg.image.load(f"assets/{file_name}")
         texture = pg.transform.flip(texture, flip_x=True, flip_y=False)
 
         if is_tex_array:
+            texture = self.add_generated_layers(texture)
+            self.block_surface = texture
             num_layers = (
                 3 * texture.get_height() // texture.get_width()
             )  # 3 textures per layer
@@ -43,4 +79,8 @@ class Textures:
         texture.anisotropy = 32.0
         texture.build_mipmaps()
         texture.filter = (mgl.NEAREST, mgl.NEAREST)
+
+        # base level plus a third for the mipmaps
+        num_bytes = math.prod(texture.size) * texture.components
+        self.app.memory.set("textures", file_name, gpu=num_bytes * 4 // 3)
         return texture
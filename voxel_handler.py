@@ -1,14 +1,17 @@
 # voxel_handler.py
 
 from settings import *
-from meshes.chunk_mesh_builder import get_chunk_index
+from meshes.chunk_mesh_builder import get_voxel_id_at
+from raycast import ray_cast_batch
 import glm
 
 
 class VoxelHandler:
     def __init__(self, world):
         self.app = world.app
+        self.world = world
         self.chunks = world.chunks
+        self.world_voxels = world.voxels
 
         # ray casting result
         self.chunk = None
@@ -27,78 +30,15 @@ class VoxelHandler:
         :param position: A glm.vec3 (float) representing the position to check.
         :return: True if there is a collision, False otherwise.
         """
-        # Convert float position to an integer world-space block position.
-        voxel_world_pos = glm.ivec3(
-            glm.floor(position.x), glm.floor(position.y), glm.floor(position.z)
-        )
-
-        # Get the chunk index from the world-space block coords
-        chunk_index = get_chunk_index(voxel_world_pos)
+        wx, wy, wz = glm.ivec3(glm.floor(position))
+        voxel_id = get_voxel_id_at(self.world_voxels, wx, wy, wz)
 
         if debug:
-            print(
-                f"[is_colliding] Checking: {position} -> world block {voxel_world_pos}"
-            )
-            print(f"[is_colliding] Chunk index = {chunk_index}")
-
-        # If chunk index is out of world bounds, no collision in your finite world.
-        if chunk_index < 0 or chunk_index >= len(self.chunks):
-            if debug:
-                print("[is_colliding] Out of valid chunk range -> no collision")
-            return False
-
-        chunk = self.chunks[chunk_index]
-        if chunk is None:
-            if debug:
-                print("[is_colliding] Chunk is None -> no collision")
-            return False
-
-        # Convert the world block position to local chunk coords
-        # chunk.position is presumably (cx, cy, cz) in chunk-space
-        local_pos = voxel_world_pos - glm.ivec3(chunk.position) * CHUNK_SIZE
+            print(f"[is_colliding] {position} -> world block {(wx, wy, wz)}")
+            print(f"[is_colliding] voxel_id={voxel_id}")
 
-        if debug:
-            print(f"[is_colliding] Local pos = {local_pos}")
-
-        # Range check for local coords
-        if not (
-            0 <= local_pos.x < CHUNK_SIZE
-            and 0 <= local_pos.y < CHUNK_SIZE
-            and 0 <= local_pos.z < CHUNK_SIZE
-        ):
-            if debug:
-                print(
-                    "[is_colliding] Local position out of chunk bounds -> no collision"
-                )
-            return False
-
-        # -------------------------------
-        # FIX THE INDEXING HERE:
-        # (x, z, y) to match build_chunk_mesh & terrain_gen
-        # -------------------------------
-        x, y, z = local_pos.x, local_pos.y, local_pos.z
-        voxel_index = x + (CHUNK_SIZE * z) + (CHUNK_AREA * y)  # <-- FIXED LINE HERE
-
-        # Double-check in-bounds:
-        if voxel_index < 0 or voxel_index >= len(chunk.voxels):
-            if debug:
-                print("[is_colliding] Invalid voxel index -> no collision")
-            return False
-
-        voxel_id = chunk.voxels[voxel_index]
-
-        # Zero typically means "air" or "empty"
-        collision = voxel_id != 0
-
-        if debug:
-            print(f"[is_colliding] voxel_id={voxel_id}, collision={collision}")
-            print(f"Chunk position (in chunk coords): {chunk.position}")
-            print(f"World block position: {voxel_world_pos}")
-            print(f"Local chunk coords: {local_pos}")
-            print(f"Hit collision type: {collision}")
-            print(f"chunk.voxels[{voxel_index}] = {voxel_id}")
-
-        return collision
+        # air, water or outside the world don't collide
+        return bool(BLOCK_SOLID[voxel_id])
 
     def set_voxel_type(self, type_id):
         self.new_voxel_id = type_id
@@ -106,46 +46,32 @@ class VoxelHandler:
     def add_voxel(self):
         if self.voxel_id:
             # check voxel id along normal
-            result = self.get_voxel_id(self.voxel_world_pos + self.voxel_normal)
-            if not result[0]:  # i.e. if that position is empty
-                _, voxel_index, _, chunk = result
-                chunk.voxels[voxel_index] = self.new_voxel_id
-                chunk.mesh.rebuild()
-                if chunk.is_empty:
-                    chunk.is_empty = False
-
-    def rebuild_adj_chunk(self, adj_voxel_pos):
-        index = get_chunk_index(adj_voxel_pos)
-        if index != -1:
-            self.chunks[index].mesh.rebuild()
-
-    def rebuild_adjacent_chunks(self):
-        lx, ly, lz = self.voxel_local_pos
-        wx, wy, wz = self.voxel_world_pos
-
-        if lx == 0:
-            self.rebuild_adj_chunk((wx - 1, wy, wz))
-        elif lx == CHUNK_SIZE - 1:
-            self.rebuild_adj_chunk((wx + 1, wy, wz))
-
-        if ly == 0:
-            self.rebuild_adj_chunk((wx, wy - 1, wz))
-        elif ly == CHUNK_SIZE - 1:
-            self.rebuild_adj_chunk((wx, wy + 1, wz))
-
-        if lz == 0:
-            self.rebuild_adj_chunk((wx, wy, wz - 1))
-        elif lz == CHUNK_SIZE - 1:
-            self.rebuild_adj_chunk((wx, wy, wz + 1))
+            position = self.voxel_world_pos + self.voxel_normal
+            # i.e. if that position is empty (or water)
+            if not BLOCK_SOLID[self.get_voxel_id(position)[0]]:
+                # relights and remeshes the chunks around it
+                self.world.set_voxel_ids([tuple(position)], self.new_voxel_id)
 
     def remove_voxel(self):
         if self.voxel_id:
-            self.chunk.voxels[self.voxel_index] = 0
-            self.chunk.mesh.rebuild()
-            self.rebuild_adjacent_chunks()
+            self.world.set_voxel_ids([tuple(self.voxel_world_pos)], 0)
 
-    def set_voxel(self):
+    def send_edit(self):
+        # connected to a server: the edit is applied when its delta comes back
+        if not self.voxel_id:
+            return
         if self.interaction_mode:
+            position = self.voxel_world_pos + self.voxel_normal
+            if BLOCK_SOLID[self.get_voxel_id(position)[0]]:
+                return
+            self.app.net.send_edit(tuple(position), self.new_voxel_id)
+        else:
+            self.app.net.send_edit(tuple(self.voxel_world_pos), 0)
+
+    def set_voxel(self):
+        if self.app.net is not None:
+            self.send_edit()
+        elif self.interaction_mode:
             self.add_voxel()
         else:
             self.remove_voxel()
@@ -154,67 +80,28 @@ class VoxelHandler:
         self.interaction_mode = not self.interaction_mode
 
     def update(self):
-        self.ray_cast()
+        with self.app.profiler.zone("VoxelHandler.ray_cast"):
+            self.ray_cast()
 
     def ray_cast(self):
-        # Standard DDA or Grid Traversal for ray-cast
-        x1, y1, z1 = self.app.player.position
-        x2, y2, z2 = self.app.player.position + self.app.player.forward * MAX_RAY_DIST
+        # camera pick: a one-ray call of the batched traversal kernel
+        origin = np.array([self.app.player.position], dtype="float64")
+        direction = np.array([self.app.player.forward], dtype="float64")
+        hit_positions, normals, voxel_ids, _ = ray_cast_batch(
+            self.world_voxels, origin, direction, MAX_RAY_DIST
+        )
 
-        current_voxel_pos = glm.ivec3(x1, y1, z1)
         self.voxel_id = 0
         self.voxel_normal = glm.ivec3(0)
-        step_dir = -1
-
-        dx = glm.sign(x2 - x1)
-        delta_x = min(dx / (x2 - x1), 1e7) if dx != 0 else 1e7
-        max_x = delta_x * (1.0 - glm.fract(x1)) if dx > 0 else delta_x * glm.fract(x1)
-
-        dy = glm.sign(y2 - y1)
-        delta_y = min(dy / (y2 - y1), 1e7) if dy != 0 else 1e7
-        max_y = delta_y * (1.0 - glm.fract(y1)) if dy > 0 else delta_y * glm.fract(y1)
-
-        dz = glm.sign(z2 - z1)
-        delta_z = min(dz / (z2 - z1), 1e7) if dz != 0 else 1e7
-        max_z = delta_z * (1.0 - glm.fract(z1)) if dz > 0 else delta_z * glm.fract(z1)
-
-        while not (max_x > 1.0 and max_y > 1.0 and max_z > 1.0):
-            result = self.get_voxel_id(voxel_world_pos=current_voxel_pos)
-            if result[0]:
-                self.voxel_id, self.voxel_index, self.voxel_local_pos, self.chunk = (
-                    result
-                )
-                self.voxel_world_pos = current_voxel_pos
-
-                # Figure out the face normal from which side we stepped
-                if step_dir == 0:
-                    self.voxel_normal.x = -dx
-                elif step_dir == 1:
-                    self.voxel_normal.y = -dy
-                else:
-                    self.voxel_normal.z = -dz
-                return True
-
-            # Advance along whichever tMax is smallest
-            if max_x < max_y:
-                if max_x < max_z:
-                    current_voxel_pos.x += dx
-                    max_x += delta_x
-                    step_dir = 0
-                else:
-                    current_voxel_pos.z += dz
-                    max_z += delta_z
-                    step_dir = 2
-            else:
-                if max_y < max_z:
-                    current_voxel_pos.y += dy
-                    max_y += delta_y
-                    step_dir = 1
-                else:
-                    current_voxel_pos.z += dz
-                    max_z += delta_z
-                    step_dir = 2
-        return False
+        if not voxel_ids[0]:
+            return False
+
+        self.voxel_world_pos = glm.ivec3(*hit_positions[0])
+        self.voxel_id, self.voxel_index, self.voxel_local_pos, self.chunk = (
+            self.get_voxel_id(self.voxel_world_pos)
+        )
+        self.voxel_normal = glm.ivec3(*normals[0])
+        return True
 
     def get_voxel_id(self, voxel_world_pos):
         chunk_x = voxel_world_pos.x // CHUNK_SIZE
@@ -0,0 +1,114 @@
+from settings import *
+from meshes.chunk_mesh_builder import get_voxel_id_at
+
+
+@njit
+def mark_neighbours(remesh, cx, cy, cz, lx, ly, lz):
+    # chunks whose meshes (faces and ao) read the voxel at local (lx, ly, lz)
+    for dx in range(-1, 2):
+        if (dx == -1 and lx != 0) or (dx == 1 and lx != CHUNK_SIZE - 1):
+            continue
+        for dy in range(-1, 2):
+            if (dy == -1 and ly != 0) or (dy == 1 and ly != CHUNK_SIZE - 1):
+                continue
+            for dz in range(-1, 2):
+                if (dz == -1 and lz != 0) or (dz == 1 and lz != CHUNK_SIZE - 1):
+                    continue
+                nx, ny, nz = cx + dx, cy + dy, cz + dz
+                if 0 <= nx < WORLD_W and 0 <= ny < WORLD_H and 0 <= nz < WORLD_D:
+                    remesh[nx + WORLD_W * nz + WORLD_AREA * ny] = True
+
+
+@njit
+def set_voxel_id_at(world_voxels, wx, wy, wz, voxel_id, changed, remesh):
+    if wx < 0 or wy < 0 or wz < 0:
+        return
+    cx, cy, cz = wx // CHUNK_SIZE, wy // CHUNK_SIZE, wz // CHUNK_SIZE
+    if cx >= WORLD_W or cy >= WORLD_H or cz >= WORLD_D:
+        return
+
+    lx, ly, lz = wx - cx * CHUNK_SIZE, wy - cy * CHUNK_SIZE, wz - cz * CHUNK_SIZE
+    chunk_index = cx + WORLD_W * cz + WORLD_AREA * cy
+    voxel_index = lx + CHUNK_SIZE * lz + CHUNK_AREA * ly
+    if world_voxels[chunk_index, voxel_index] == voxel_id:
+        return
+
+    world_voxels[chunk_index, voxel_index] = voxel_id
+    changed[chunk_index] = True
+    mark_neighbours(remesh, cx, cy, cz, lx, ly, lz)
+
+
+@njit
+def get_voxel_ids(world_voxels, positions):
+    """
+    Voxel ids at (N, 3) integer world positions, 0 outside the world.
+    """
+    voxel_ids = np.zeros(len(positions), dtype=np.uint8)
+    for i in range(len(positions)):
+        voxel_ids[i] = get_voxel_id_at(
+            world_voxels, positions[i, 0], positions[i, 1], positions[i, 2]
+        )
+    return voxel_ids
+
+
+@njit
+def set_voxel_ids(world_voxels, positions, voxel_ids):
+    """
+    Write voxel ids at (N, 3) integer world positions, skipping those outside
+    the world. Returns masks of the chunks whose voxels changed and of the
+    chunks that need a remesh (the changed ones plus bordering neighbours).
+    """
+    changed = np.zeros(WORLD_VOL, dtype=np.bool_)
+    remesh = np.zeros(WORLD_VOL, dtype=np.bool_)
+    for i in range(len(positions)):
+        set_voxel_id_at(
+            world_voxels,
+            positions[i, 0],
+            positions[i, 1],
+            positions[i, 2],
+            voxel_ids[i],
+            changed,
+            remesh,
+        )
+    return changed, remesh
+
+
+@njit
+def read_box(world_voxels, box_min, box_max):
+    """
+    Copy the voxels of the box [box_min, box_max) into a dense (x, y, z) array.
+    """
+    block = np.zeros(
+        (box_max[0] - box_min[0], box_max[1] - box_min[1], box_max[2] - box_min[2]),
+        dtype=np.uint8,
+    )
+    for x in range(block.shape[0]):
+        for y in range(block.shape[1]):
+            for z in range(block.shape[2]):
+                block[x, y, z] = get_voxel_id_at(
+                    world_voxels, box_min[0] + x, box_min[1] + y, box_min[2] + z
+                )
+    return block
+
+
+@njit
+def write_box(world_voxels, box_min, block):
+    """
+    Write a dense (x, y, z) block into the world at box_min.
+    Returns the same changed / remesh chunk masks as set_voxel_ids.
+    """
+    changed = np.zeros(WORLD_VOL, dtype=np.bool_)
+    remesh = np.zeros(WORLD_VOL, dtype=np.bool_)
+    for x in range(block.shape[0]):
+        for y in range(block.shape[1]):
+            for z in range(block.shape[2]):
+                set_voxel_id_at(
+                    world_voxels,
+                    box_min[0] + x,
+                    box_min[1] + y,
+                    box_min[2] + z,
+                    block[x, y, z],
+                    changed,
+                    remesh,
+                )
+    return changed, remesh
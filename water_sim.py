@@ -0,0 +1,163 @@
+import itertools
+from settings import *
+from meshes.chunk_mesh_builder import get_voxel_id_at
+from lighting import encode_pos, decode_pos, is_in_world
+
+# stands in for voxels outside the world, which water treats as solid
+OUTSIDE = 255
+
+# horizontal neighbours
+SIDES = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]])
+
+
+@njit
+def get_cell(world_voxels, wx, wy, wz):
+    if not is_in_world(wx, wy, wz):
+        return OUTSIDE
+    return get_voxel_id_at(world_voxels, wx, wy, wz)
+
+
+@njit
+def get_water_level(voxel_id):
+    # 1..WATER_LEVELS for water, 0 for anything else
+    if WATER_BASE <= voxel_id < WATER_BASE + WATER_LEVELS:
+        return voxel_id - WATER_BASE + 1
+    return 0
+
+
+@njit
+def get_new_level(world_voxels, wx, wy, wz):
+    """
+    Flow level a non-source cell should have: water falling from above fills
+    it, otherwise it is one less than the highest horizontal neighbour that
+    rests on something. Two resting source neighbours make a new source.
+    """
+    if get_water_level(get_cell(world_voxels, wx, wy + 1, wz)):
+        return WATER_LEVELS - 1
+
+    below = get_cell(world_voxels, wx, wy - 1, wz)
+    is_supported = BLOCK_SOLID[below] or get_water_level(below) == WATER_LEVELS
+
+    level = 0
+    num_sources = 0
+    for i in range(4):
+        nx, nz = wx + SIDES[i, 0], wz + SIDES[i, 1]
+        n_level = get_water_level(get_cell(world_voxels, nx, wy, nz))
+        if not n_level:
+            continue
+        # water that can still fall doesn't spread sideways
+        n_below = get_cell(world_voxels, nx, wy - 1, nz)
+        if not (BLOCK_SOLID[n_below] or get_water_level(n_below)):
+            continue
+        num_sources += n_level == WATER_LEVELS
+        level = max(level, n_level - 1)
+
+    if num_sources >= 2 and is_supported:
+        return WATER_LEVELS
+    return level
+
+
+@njit
+def step_water(world_voxels, active):
+    """
+    One cellular automaton step over the active cells (encoded positions).
+    New levels are computed from the current state first and returned as
+    (positions, voxel_ids) of the cells that change, so the update doesn't
+    depend on the order of the cells.
+    """
+    positions = np.empty((len(active), 3), dtype=np.int64)
+    voxel_ids = np.empty(len(active), dtype=np.uint8)
+    num_changed = 0
+
+    for i in range(len(active)):
+        wx, wy, wz = decode_pos(active[i])
+        voxel_id = get_cell(world_voxels, wx, wy, wz)
+        if BLOCK_SOLID[voxel_id]:
+            continue
+        if get_water_level(voxel_id) == WATER_LEVELS:
+            continue  # sources only go away when edited
+
+        level = get_new_level(world_voxels, wx, wy, wz)
+        new_id = WATER_BASE + level - 1 if level else 0
+        if new_id != voxel_id:
+            positions[num_changed, 0] = wx
+            positions[num_changed, 1] = wy
+            positions[num_changed, 2] = wz
+            voxel_ids[num_changed] = new_id
+            num_changed += 1
+
+    return positions[:num_changed], voxel_ids[:num_changed]
+
+
+@njit
+def get_neighbourhood(positions):
+    # encoded positions of the cells and their 6 face neighbours
+    cells = np.empty(7 * len(positions), dtype=np.int64)
+    num_cells = 0
+    for i in range(len(positions)):
+        wx, wy, wz = positions[i, 0], positions[i, 1], positions[i, 2]
+        for dx, dy, dz in (
+            (0, 0, 0),
+            (1, 0, 0),
+            (-1, 0, 0),
+            (0, 1, 0),
+            (0, -1, 0),
+            (0, 0, 1),
+            (0, 0, -1),
+        ):
+            if is_in_world(wx + dx, wy + dy, wz + dz):
+                cells[num_cells] = encode_pos(wx + dx, wy + dy, wz + dz)
+                num_cells += 1
+    return cells[:num_cells]
+
+
+class WaterSimulation:
+    """
+    Water flow as a cellular automaton over an active set: only cells next to
+    recent changes are updated, at most WATER_TICK_BUDGET of them per water
+    tick. Cells over the budget wait for the next tick, so breaching a large
+    reservoir spreads the work out instead of stalling a frame. The backlog is
+    deduplicated as cells are queued and a tick only touches the cells it
+    takes, so its cost doesn't grow with the backlog.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        # encoded positions, oldest first; a dict keeps each cell queued once
+        self.pending = {}
+        self.num_ticks = 0
+
+        # stats of the last water tick
+        self.num_updated = 0
+        self.num_changed = 0
+
+    @property
+    def num_active(self):
+        return len(self.pending)
+
+    def activate(self, positions):
+        """
+        Wake up the cells at (N, 3) world positions and their neighbours,
+        called for every voxel edit.
+        """
+        if len(positions):
+            cells = get_neighbourhood(np.asarray(positions, dtype=np.int64))
+            self.pending.update(dict.fromkeys(cells.tolist()))
+
+    def tick(self):
+        self.num_ticks += 1
+        if not self.pending or self.num_ticks % WATER_TICK_INTERVAL:
+            return
+
+        # the oldest cells, up to the budget
+        active = np.fromiter(
+            itertools.islice(self.pending, WATER_TICK_BUDGET), dtype=np.int64
+        )
+        for cell in active.tolist():
+            del self.pending[cell]
+
+        positions, voxel_ids = step_water(self.world.voxels, active)
+        self.num_updated, self.num_changed = len(active), len(positions)
+        if len(positions):
+            # relights, remeshes each changed chunk once and activates around
+            self.world.set_voxel_ids(positions, voxel_ids)
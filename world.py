@@ -1,21 +1,74 @@
 from settings import *
 from world_objects.chunk import Chunk
 from voxel_handler import VoxelHandler
+from occlusion import OcclusionCuller
+from render_distance import RenderDistance
+from chunk_loader import ChunkLoader, RemoteChunkLoader
+from water_sim import WaterSimulation
+from block_ticks import BlockTicker
+from world_store import WorldStore
+from map_tiles import MapTiles
+from noise import WORLD_SEED
+import voxel_query
+import lighting
 
 
 class World:
     def __init__(self, app):
         self.app = app
         self.chunks = [None for _ in range(WORLD_VOL)]
-        self.voxels = np.empty([WORLD_VOL, CHUNK_VOL], dtype="uint8")
-        self.build_chunks()
-        self.build_chunk_mesh()
+        # a world streamed from a server is never stored locally
+        self.store = None
+        if WORLD_FILE and app.net is None:
+            self.store = WorldStore(WORLD_FILE, WORLD_SEED)
+            self.voxels, self.light = self.store.voxels, self.store.light
+        else:
+            # zeroed so chunks that aren't generated yet read as air
+            self.voxels = np.zeros([WORLD_VOL, CHUNK_VOL], dtype="uint8")
+            # packed sky | block light per voxel, see lighting.py
+            self.light = np.zeros([WORLD_VOL, CHUNK_VOL], dtype="uint8")
+        app.memory.set("voxels", cpu=self.voxels.nbytes)
+        app.memory.set("light", cpu=self.light.nbytes)
+
+        # per-chunk metadata as struct-of-arrays for vectorized culling
+        self.chunk_centers = np.zeros([WORLD_VOL, 3], dtype="float32")
+        self.chunk_bounds_min = np.zeros([WORLD_VOL, 3], dtype="float32")
+        self.chunk_bounds_max = np.zeros([WORLD_VOL, 3], dtype="float32")
+        self.chunk_is_empty = np.ones(WORLD_VOL, dtype=bool)
+        self.chunk_vertex_counts = np.zeros(WORLD_VOL, dtype="int32")
+        self.occlusion = OcclusionCuller(self)
+        self.render_distance = RenderDistance(self.app)
+        self.water_sim = WaterSimulation(self)
+        self.block_ticker = BlockTicker(self)
+
+        self.create_chunks()
+        if app.net is not None:
+            self.loader = RemoteChunkLoader(self, app.net)
+        else:
+            self.loader = ChunkLoader(self)
+        self.map_tiles = MapTiles(self.voxels, self.loader.is_generated)
+        app.memory.set("map_tiles", cpu=self.map_tiles.nbytes)
+        self.loader.load_initial()
         self.voxel_handler = VoxelHandler(self)
 
-    def update(self):
+    def tick(self):
+        profiler = self.app.profiler
         self.voxel_handler.update()
+        # a server is authoritative over the voxels, it doesn't simulate them yet
+        if self.app.net is None:
+            with profiler.zone("water"):
+                self.water_sim.tick()
+            with profiler.zone("block ticks"):
+                self.block_ticker.tick()
 
-    def build_chunks(self):
+    def update(self):
+        with self.app.profiler.zone("chunk loading"):
+            self.loader.update()
+        self.render_distance.update()
+        if self.store is not None:
+            self.store.update()
+
+    def create_chunks(self):
         for x in range(WORLD_W):
             for y in range(WORLD_H):
                 for z in range(WORLD_D):
@@ -24,16 +77,145 @@ class World:
                     chunk_index = x + WORLD_W * z + WORLD_AREA * y
                     self.chunks[chunk_index] = chunk
 
-                    # put the chunk voxels in a separate array
-                    self.voxels[chunk_index] = chunk.build_voxels()
-
                     # get pointer to voxels
                     chunk.voxels = self.voxels[chunk_index]
 
-    def build_chunk_mesh(self):
+    def light_column(self, x, z):
+        lighting.light_column(self.voxels, self.light, self.loader.is_generated, x, z)
+        if self.store is not None:
+            # light spreads into the neighbour columns
+            self.store.mark_columns_dirty(x, z, radius=1)
+            self.store.mark_column_generated(x, z)
+
+    def is_column_stored(self, x, z):
+        # generated and lit in an earlier run, see world_store.py
+        return self.store is not None and self.store.is_column_generated(x, z)
+
+    def get_voxel_ids(self, positions):
+        """
+        Voxel ids at an (N, 3) array of world positions (floats are floored).
+        """
+        positions = np.floor(np.asarray(positions)).astype(np.int64).reshape(-1, 3)
+        return voxel_query.get_voxel_ids(self.voxels, positions)
+
+    def set_voxel_ids(self, positions, voxel_ids):
+        """
+        Set voxel ids at an (N, 3) array of world positions, relight and remesh
+        the affected chunks once each, and wake up water and falling blocks
+        around them.
+        """
+        positions = np.floor(np.asarray(positions)).astype(np.int64).reshape(-1, 3)
+        voxel_ids = np.broadcast_to(
+            np.asarray(voxel_ids, dtype=np.uint8), len(positions)
+        )
+        old_ids = voxel_query.get_voxel_ids(self.voxels, positions)
+        changed, remesh = voxel_query.set_voxel_ids(self.voxels, positions, voxel_ids)
+        remesh |= self.update_light(positions, old_ids)
+        self.rebuild_changed_chunks(changed, remesh)
+        self.map_tiles.invalidate(positions)
+        self.water_sim.activate(positions)
+        self.block_ticker.schedule_around(positions)
+
+    def read_box(self, box_min, box_max):
+        """
+        Voxels of the axis-aligned box [box_min, box_max) as a dense (x, y, z)
+        array. If the box lies within one chunk this is a zero-copy view into
+        World.voxels, so use write_box to modify it (that remeshes).
+        """
+        box_min = np.asarray(box_min, dtype=np.int64)
+        box_max = np.asarray(box_max, dtype=np.int64)
+
+        chunk_min, chunk_max = box_min // CHUNK_SIZE, (box_max - 1) // CHUNK_SIZE
+        in_world = np.all(box_min >= 0) and np.all(
+            chunk_max < (WORLD_W, WORLD_H, WORLD_D)
+        )
+        if in_world and np.array_equal(chunk_min, chunk_max):
+            cx, cy, cz = chunk_min
+            x0, y0, z0 = box_min - chunk_min * CHUNK_SIZE
+            x1, y1, z1 = box_max - chunk_min * CHUNK_SIZE
+            # chunk voxels are laid out x + CHUNK_SIZE * z + CHUNK_AREA * y
+            chunk_voxels = self.voxels[cx + WORLD_W * cz + WORLD_AREA * cy].reshape(
+                CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE
+            )
+            return chunk_voxels[y0:y1, z0:z1, x0:x1].transpose(2, 0, 1)
+
+        return voxel_query.read_box(self.voxels, box_min, box_max)
+
+    def write_box(self, box_min, block):
+        """
+        Write a dense (x, y, z) block of voxel ids at box_min, across chunk borders.
+        """
+        box_min = np.asarray(box_min, dtype=np.int64)
+        block = np.asarray(block, dtype=np.uint8)
+        old_block = voxel_query.read_box(self.voxels, box_min, box_min + block.shape)
+        changed, remesh = voxel_query.write_box(self.voxels, box_min, block)
+
+        is_edited = old_block != block
+        positions = box_min + np.argwhere(is_edited)
+        remesh |= self.update_light(positions, old_block[is_edited])
+        self.rebuild_changed_chunks(changed, remesh)
+        self.map_tiles.invalidate(positions)
+        self.water_sim.activate(positions)
+        self.block_ticker.schedule_around(positions)
+
+    def update_light(self, positions, old_ids):
+        # incremental relight around edited voxels, returns the chunks to remesh
+        return lighting.update_light(
+            self.voxels, self.light, self.loader.is_generated, positions, old_ids
+        )
+
+    def rebuild_changed_chunks(self, changed, remesh):
+        # relit chunks are remeshed, so remesh covers every stored change
+        if self.store is not None:
+            self.store.mark_dirty(changed | remesh)
+        for chunk_index in np.flatnonzero(changed):
+            self.chunks[chunk_index].update_bounds()
+        for chunk_index in np.flatnonzero(remesh):
+            chunk = self.chunks[chunk_index]
+            if chunk.mesh is not None:
+                chunk.mesh.rebuild()
+            else:
+                self.loader.discard_mesh(chunk_index)
+
+    def release(self):
         for chunk in self.chunks:
-            chunk.build_mesh()
+            if chunk.mesh is not None:
+                chunk.mesh.release()
+        if self.store is not None:
+            # drop the views into the mapping before it's closed
+            for chunk in self.chunks:
+                chunk.voxels = None
+            self.voxels = self.light = self.map_tiles.voxels = None
+            self.store.close()
+
+    def get_visible_chunks(self):
+        player = self.app.player
+        candidates = ~self.chunk_is_empty & (self.chunk_vertex_counts > 0)
+        visible = player.frustum.cull_chunks(
+            self.chunk_bounds_min, self.chunk_bounds_max, candidates
+        )
+
+        # distance from the camera to the closest point of each chunk box
+        cam_pos = np.array(player.get_camera_position(), dtype="float32")
+        closest = np.clip(
+            cam_pos, self.chunk_bounds_min[visible], self.chunk_bounds_max[visible]
+        )
+        dist = np.linalg.norm(closest - cam_pos, axis=1)
+        in_range = dist < self.render_distance.value
+        visible, dist = visible[in_range], dist[in_range]
+
+        # front-to-back order so the depth test rejects hidden fragments early
+        visible = visible[np.argsort(dist, kind="stable")]
+        return self.occlusion.cull(visible, player)
 
     def render(self):
-        for chunk in self.chunks:
-            chunk.render()
+        with self.app.profiler.zone("culling"):
+            visible = self.get_visible_chunks()
+        stats = self.app.render_stats
+        stats.chunks_considered = WORLD_VOL
+        stats.chunks_frustum_visible = self.occlusion.num_frustum_visible
+        stats.chunks_drawn = len(visible)
+        stats.pending_meshes = self.loader.num_pending_meshes
+
+        for chunk_index in visible:
+            self.chunks[chunk_index].render()
@@ -9,13 +9,21 @@ class Chunk:
         self.app = world.app
         self.world = world
         self.position = position
+        self.index = position[0] + WORLD_W * position[2] + WORLD_AREA * position[1]
         self.m_model = self.get_model_matrix()
         self.voxels: np.array = None
         self.mesh: ChunkMesh = None
-        self.is_empty = True
 
         self.center = (glm.vec3(self.position) + 0.5) * CHUNK_SIZE
-        self.is_on_frustum = self.app.player.frustum.is_on_frustum
+        self.world.chunk_centers[self.index] = self.center
+
+    @property
+    def is_empty(self):
+        return self.world.chunk_is_empty[self.index]
+
+    @is_empty.setter
+    def is_empty(self, value):
+        self.world.chunk_is_empty[self.index] = value
 
     def get_model_matrix(self):
         m_model = glm.translate(glm.mat4(), glm.vec3(self.position) * CHUNK_SIZE)
@@ -24,34 +32,57 @@ class Chunk:
     def set_uniform(self):
         self.mesh.program["m_model"].write(self.m_model)
 
-    def build_mesh(self):
-        self.mesh = ChunkMesh(self)
+    def build_mesh(self, vertex_data=None):
+        self.mesh = ChunkMesh(self, vertex_data)
+        self.world.occlusion.update_chunk(self)
 
     def render(self):
-        if not self.is_empty and self.is_on_frustum(self):
-            self.set_uniform()
-            self.mesh.render()
+        self.set_uniform()
+        self.app.render_stats.add_uniform_writes()
+        self.mesh.render()
 
-    def build_voxels(self):
-        voxels = np.zeros(CHUNK_VOL, dtype="uint8")
+    def update_bounds(self):
+        """
+        Recompute the tight AABB of the solid voxels and the empty flag,
+        stored in the world metadata arrays used for culling.
+        """
+        bounds = self.get_voxel_bounds(self.voxels)
+        if bounds[0] < 0:
+            self.is_empty = True
+            return
 
-        cx, cy, cz = glm.ivec3(self.position) * CHUNK_SIZE
-        self.generate_terrain(voxels, cx, cy, cz)
-
-        if np.any(voxels):
-            self.is_empty = False
-        return voxels
+        origin = np.array(self.position, dtype="float32") * CHUNK_SIZE
+        self.world.chunk_bounds_min[self.index] = origin + bounds[:3]
+        self.world.chunk_bounds_max[self.index] = origin + bounds[3:]
+        self.is_empty = False
 
     @staticmethod
     @njit
-    def generate_terrain(voxels, cx, cy, cz):
-        for x in range(CHUNK_SIZE):
-            wx = x + cx
+    def get_voxel_bounds(voxels):
+        # (min_x, min_y, min_z, max_x, max_y, max_z), max is exclusive
+        bounds = np.array(
+            [CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE, -1, -1, -1], dtype=np.int32
+        )
+        for y in range(CHUNK_SIZE):
             for z in range(CHUNK_SIZE):
-                wz = z + cz
-                world_height = get_height(wx, wz)
-                local_height = min(world_height - cy, CHUNK_SIZE)
+                for x in range(CHUNK_SIZE):
+                    if not voxels[x + CHUNK_SIZE * z + CHUNK_AREA * y]:
+                        continue
+                    bounds[0] = min(bounds[0], x)
+                    bounds[1] = min(bounds[1], y)
+                    bounds[2] = min(bounds[2], z)
+                    bounds[3] = max(bounds[3], x + 1)
+                    bounds[4] = max(bounds[4], y + 1)
+                    bounds[5] = max(bounds[5], z + 1)
 
-                for y in range(local_height):
-                    wy = y + cy
-                    set_voxel_id(voxels, x, y, z, wx, wy, wz, world_height)
+        if bounds[3] < 0:
+            bounds[:] = -1
+        return bounds
+
+    @staticmethod
+    @njit
+    def generate_terrain(voxels, cx, cy, cz):
+        # all generation stages at once, ChunkLoader runs them separately
+        heightmap = get_heightmap(cx, cz)
+        fill_terrain(voxels, cx, cy, cz, heightmap)
+        decorate(voxels, cy, heightmap)
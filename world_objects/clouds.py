@@ -5,10 +5,14 @@ from meshes.cloud_mesh import CloudMesh
 class Clouds:
     def __init__(self, app):
         self.app = app
-        self.mesh = CloudMesh(app)
+        self.mesh = None
+
+    def build_mesh(self):
+        self.mesh = CloudMesh(self.app)
 
     def update(self):
-        self.mesh.program["u_time"] = self.app.time
+        self.app.shader_program.clouds["u_time"] = self.app.time
 
     def render(self):
-        self.mesh.render()
+        if self.mesh is not None:
+            self.mesh.render()
@@ -0,0 +1,155 @@
+import mmap
+import os
+import struct
+import time
+from settings import *
+
+# file layout: header, a generated flag per chunk column, then the voxel and
+# light arrays of World, each [WORLD_VOL, CHUNK_VOL] uint8
+MAGIC = b"VOXWORLD"
+VERSION = 1
+HEADER_FORMAT = "<8sIqIIII"  # magic, version, seed, chunk size, world w, h, d
+HEADER_SIZE = 64
+FLAGS_OFFSET = HEADER_SIZE
+# aligned, so flushed chunk ranges start at a mappable offset
+GRANULARITY = mmap.ALLOCATIONGRANULARITY
+VOXELS_OFFSET = -(-(FLAGS_OFFSET + WORLD_AREA) // GRANULARITY) * GRANULARITY
+ARRAY_SIZE = WORLD_VOL * CHUNK_VOL
+LIGHT_OFFSET = VOXELS_OFFSET + ARRAY_SIZE
+FILE_SIZE = LIGHT_OFFSET + ARRAY_SIZE
+
+
+def read_header(file):
+    file.seek(0)
+    data = file.read(struct.calcsize(HEADER_FORMAT))
+    if len(data) < struct.calcsize(HEADER_FORMAT):
+        return None
+    magic, version, seed, *dims = struct.unpack(HEADER_FORMAT, data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return seed, tuple(dims)
+
+
+def read_seed(file_path):
+    # seed recorded in an existing world file, or None
+    if not file_path or not os.path.exists(file_path):
+        return None
+    with open(file_path, "rb") as file:
+        header = read_header(file)
+    return header[0] if header else None
+
+
+class WorldStore:
+    """
+    World voxels and light backed by a memory-mapped file. Pages are read in
+    lazily as chunks are touched, so a generated world opens instantly, and
+    other processes (e.g. the map renderer) can map the same file read-only
+    without copying it. The header records the seed and dimensions and is
+    validated on open. Changed chunks are marked dirty and flush() writes
+    back only their ranges, every WORLD_FLUSH_INTERVAL seconds via update().
+    Newly generated columns are only flagged in the file once their chunks
+    are written, so a crash can't leave a flagged column without its data.
+    """
+
+    def __init__(self, file_path, seed, read_only=False):
+        self.file_path = file_path
+        self.read_only = read_only
+        dims = (CHUNK_SIZE, WORLD_W, WORLD_H, WORLD_D)
+
+        is_new = not os.path.exists(file_path)
+        if is_new and read_only:
+            raise FileNotFoundError(file_path)
+        mode = "rb" if read_only else "w+b" if is_new else "r+b"
+        self.file = open(file_path, mode)
+
+        if is_new:
+            self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, seed, *dims))
+            self.file.truncate(FILE_SIZE)  # sparse, zeroed: nothing generated
+            self.file.flush()
+        else:
+            header = read_header(self.file)
+            if header is None:
+                raise ValueError(f"{file_path} is not a world file")
+            file_seed, file_dims = header
+            if file_dims != dims:
+                raise ValueError(
+                    f"{file_path} has chunk size and world dimensions {file_dims},"
+                    f" settings have {dims}"
+                )
+            if seed is not None and file_seed != seed:
+                raise ValueError(f"{file_path} was generated with seed {file_seed}")
+            seed = file_seed
+        self.seed = seed
+
+        access = mmap.ACCESS_READ if read_only else mmap.ACCESS_WRITE
+        self.mmap = mmap.mmap(self.file.fileno(), FILE_SIZE, access=access)
+        self.column_flags = np.frombuffer(
+            self.mmap, dtype=np.uint8, count=WORLD_AREA, offset=FLAGS_OFFSET
+        )
+        self.voxels = np.frombuffer(
+            self.mmap, dtype=np.uint8, count=ARRAY_SIZE, offset=VOXELS_OFFSET
+        ).reshape(WORLD_VOL, CHUNK_VOL)
+        self.light = np.frombuffer(
+            self.mmap, dtype=np.uint8, count=ARRAY_SIZE, offset=LIGHT_OFFSET
+        ).reshape(WORLD_VOL, CHUNK_VOL)
+
+        self.dirty = np.zeros(WORLD_VOL, dtype=bool)
+        # column indices generated since the last flush, not flagged yet
+        self.pending_columns = set()
+        self.last_flush = time.perf_counter()
+
+    def is_column_generated(self, x, z):
+        column = x + WORLD_W * z
+        return bool(self.column_flags[column]) or column in self.pending_columns
+
+    def mark_column_generated(self, x, z):
+        # flagged by flush(), after the column's chunks are written
+        self.pending_columns.add(x + WORLD_W * z)
+
+    def mark_dirty(self, chunk_mask):
+        self.dirty |= chunk_mask
+
+    def mark_columns_dirty(self, x, z, radius=0):
+        # the chunks of the columns within radius of (x, z)
+        x0, x1 = max(x - radius, 0), min(x + radius + 1, WORLD_W)
+        z0, z1 = max(z - radius, 0), min(z + radius + 1, WORLD_D)
+        self.dirty.reshape(WORLD_H, WORLD_D, WORLD_W)[:, z0:z1, x0:x1] = True
+
+    def flush_range(self, offset, size):
+        # mmap.flush wants an offset aligned to the allocation granularity
+        start = offset - offset % GRANULARITY
+        self.mmap.flush(start, offset + size - start)
+
+    def flush(self):
+        """
+        Write the dirty chunks (in runs of consecutive chunk indices) back to
+        the file, then flag the columns generated since the last flush.
+        """
+        if self.read_only:
+            return
+        dirty = np.flatnonzero(self.dirty)
+        if len(dirty):
+            # split into runs of consecutive indices
+            breaks = np.flatnonzero(np.diff(dirty) != 1) + 1
+            for run in np.split(dirty, breaks):
+                size = len(run) * CHUNK_VOL
+                for array_offset in (VOXELS_OFFSET, LIGHT_OFFSET):
+                    self.flush_range(array_offset + int(run[0]) * CHUNK_VOL, size)
+            self.dirty[:] = False
+
+        if self.pending_columns:
+            self.column_flags[list(self.pending_columns)] = 1
+            self.flush_range(FLAGS_OFFSET, WORLD_AREA)
+            self.pending_columns.clear()
+        self.last_flush = time.perf_counter()
+
+    def close(self):
+        # views into the mapping (World.voxels, Chunk.voxels, ...) must be gone
+        self.flush()
+        self.column_flags = self.voxels = self.light = None
+        self.mmap.close()
+        self.file.close()
+
+    def update(self):
+        if time.perf_counter() - self.last_flush >= WORLD_FLUSH_INTERVAL:
+            self.flush()